@@ -0,0 +1,343 @@
+#!/usr/bin/python3
+"""Defines the read-only JSON API of the HBnB storage.
+
+Each model class is served under the snake_case plural of its name,
+places for Place or base_models for BaseModel:
+
+    GET /api/v1/status            {"status": "OK"}
+    GET /api/v1/stats             the number of objects of each route
+    GET /api/v1/<route>           the objects of the class, a page at a
+                                  time, filtered by the query
+    GET /api/v1/<route>/<id>      one object
+
+A list query holds conditions as the where command of the console does,
+<attribute><operator><value> with one of =, ==, !=, <, <=, >, >=, and
+order=[-]<attribute>, limit=<n> (at most MAX_LIMIT) and offset=<n>. The
+operators may be percent-encoded, as browsers do.
+
+Responses carry a weak ETag made of the upd_at of the objects they hold;
+a request whose If-None-Match matches it is answered 304 Not Modified,
+without encoding the objects. Connections are kept alive as HTTP/1.1
+asks, so many requests are served on each.
+
+Run with python3 -m api.v1.app; HBNB_API_HOST and HBNB_API_PORT set the
+address to listen on, 0.0.0.0:5000 by default.
+"""
+import asyncio
+import hashlib
+import json
+import re
+import traceback
+from http import HTTPStatus
+from os import getenv
+from urllib.parse import unquote_plus
+from models import storage
+from models.base_model import BaseModel
+
+PREFIX = "/api/v1/"
+DEFAULT_LIMIT = 25
+MAX_LIMIT = 100
+MAX_HEAD = 16 * 1024
+CONDITION = re.compile(r"(\w+)(==|!=|<=|>=|<|>|=)(.*)$", re.S)
+
+
+def route_name(cls_name):
+    """Return the route of the class named cls_name, e.g. places."""
+    name = re.sub(r"(?<=[a-z0-9])([A-Z])", r"_\1", cls_name).lower()
+    if name.endswith("y") and name[-2:-1] not in "aeiou":
+        return name[:-1] + "ies"
+    return name + "s"
+
+
+def etag_of(objs):
+    """Return the weak ETag of a response holding the objects objs."""
+    digest = hashlib.blake2b(digest_size=12)
+    for obj in objs:
+        digest.update("{} {}\n".format(obj.id, obj.upd_at.isoformat())
+                      .encode())
+    return 'W/"{}"'.format(digest.hexdigest())
+
+
+def matches_etag(header, etag):
+    """Return True if the If-None-Match header lists etag, or is *."""
+    if header is None:
+        return False
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*" or (tag[2:] if tag.startswith("W/") else tag) == opaque:
+            return True
+    return False
+
+
+class APIError(Exception):
+    """Represent an error answered with an HTTP status.
+
+    Attributes:
+        status (HTTPStatus): The status of the response.
+        headers (dict): The headers to add to the response.
+    """
+
+    def __init__(self, status, message=None, headers=None):
+        """Initialize a new APIError.
+
+        Args:
+            status (HTTPStatus): The status of the response.
+            message (str): The error message, the status phrase if None.
+            headers (dict): The headers to add to the response.
+        """
+        super().__init__(message or status.phrase)
+        self.status = status
+        self.headers = headers or {}
+
+
+class API:
+    """Represent the read-only JSON API of a storage, served by asyncio.
+
+    Attributes:
+        storage (FileStorage): The storage served.
+        routes (dict): The model class of each route name.
+    """
+
+    def __init__(self, storage):
+        """Initialize a new API.
+
+        Args:
+            storage (FileStorage): The storage to serve.
+        """
+        self.storage = storage
+        self.routes = {route_name(name): cls
+                       for name, cls in BaseModel.classes.items()}
+
+    async def serve(self, host, port):
+        """Serve the API on host and port until cancelled."""
+        server = await asyncio.start_server(self.connection, host, port,
+                                            limit=MAX_HEAD)
+        async with server:
+            await server.serve_forever()
+
+    async def connection(self, reader, writer):
+        """Answer the requests read from one connection, in order, until
+        the client or a response closes it."""
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    self.write(writer, HTTPStatus.BAD_REQUEST, {},
+                               self.error_body("Headers too large"), False)
+                    break
+                keep_alive = await self.request(head, reader, writer)
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    async def request(self, head, reader, writer):
+        """Answer the request whose head was read, returning True if the
+        connection is kept alive."""
+        try:
+            method, target, version, headers = self.parse(head)
+        except ValueError:
+            self.write(writer, HTTPStatus.BAD_REQUEST, {},
+                       self.error_body("Bad request"), False)
+            return False
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.1":
+            keep_alive = connection != "close"
+        else:
+            keep_alive = connection == "keep-alive"
+        length = headers.get("content-length", "0")
+        if not length.isdigit() or "transfer-encoding" in headers:
+            self.write(writer, HTTPStatus.BAD_REQUEST, {},
+                       self.error_body("Bad request"), False)
+            return False
+        if int(length):
+            await reader.readexactly(int(length))
+        try:
+            if method not in ("GET", "HEAD"):
+                raise APIError(HTTPStatus.METHOD_NOT_ALLOWED,
+                               headers={"Allow": "GET, HEAD"})
+            status, extra, body = await self.route(
+                target, headers.get("if-none-match"))
+        except APIError as error:
+            status, extra = error.status, error.headers
+            body = self.error_body(str(error))
+        except Exception:
+            traceback.print_exc()
+            status, extra = HTTPStatus.INTERNAL_SERVER_ERROR, {}
+            body = self.error_body(status.phrase)
+            keep_alive = False
+        if method == "HEAD":
+            extra["Content-Length"] = str(len(body))
+            body = b""
+        self.write(writer, status, extra, body, keep_alive)
+        return keep_alive
+
+    def parse(self, head):
+        """Return the method, target, version and headers of a request
+        head, the header names lowercased.
+
+        Raises:
+            ValueError: If the head is not one of an HTTP/1.x request.
+        """
+        lines = head.decode("latin-1").split("\r\n")
+        method, target, version = lines[0].split(" ")
+        if version not in ("HTTP/1.0", "HTTP/1.1"):
+            raise ValueError("unsupported version: {}".format(version))
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, sep, value = line.partition(":")
+                if not sep:
+                    raise ValueError("invalid header: {}".format(line))
+                headers[name.strip().lower()] = value.strip()
+        return method, target, version, headers
+
+    async def route(self, target, if_none_match):
+        """Return the status, headers and body answering GET target.
+
+        Raises:
+            APIError: If there is nothing to answer with.
+        """
+        path, sep, query = target.partition("?")
+        if not path.startswith(PREFIX):
+            raise APIError(HTTPStatus.NOT_FOUND)
+        parts = [unquote_plus(part) for part in
+                 path[len(PREFIX):].rstrip("/").split("/")]
+        if parts == ["status"]:
+            return HTTPStatus.OK, {}, self.json_body({"status": "OK"})
+        if parts == ["stats"]:
+            return HTTPStatus.OK, {}, self.json_body({
+                name: self.storage.count(cls)
+                for name, cls in self.routes.items()})
+        cls = self.routes.get(parts[0])
+        if cls is None or len(parts) > 2:
+            raise APIError(HTTPStatus.NOT_FOUND)
+        if len(parts) == 2:
+            obj = await self.storage.aget(cls, parts[1])
+            if obj is None:
+                raise APIError(HTTPStatus.NOT_FOUND)
+            objs = [obj]
+            etag = etag_of(objs)
+            if matches_etag(if_none_match, etag):
+                return HTTPStatus.NOT_MODIFIED, {"ETag": etag}, b""
+            return (HTTPStatus.OK, {"ETag": etag},
+                    self.json_body(obj.to_dict()))
+        return await self.page(parts[0], cls, query, if_none_match)
+
+    async def page(self, name, cls, query, if_none_match):
+        """Return the status, headers and body of a page of the objects
+        of cls matching query.
+
+        Raises:
+            APIError: If the query is not valid.
+        """
+        conditions, order, limit, offset = self.parse_query(cls, query)
+        try:
+            objs = await self.storage.awhere(
+                cls, conditions, order.lstrip("-") or None,
+                offset + limit + 1, order.startswith("-"))
+        except ValueError as error:
+            raise APIError(HTTPStatus.BAD_REQUEST, str(error))
+        objs = objs[offset:]
+        more = len(objs) > limit
+        objs = objs[:limit]
+        etag = etag_of(objs)
+        if more:
+            etag = etag[:-1] + '+"'
+        if matches_etag(if_none_match, etag):
+            return HTTPStatus.NOT_MODIFIED, {"ETag": etag}, b""
+        next_page = None
+        if more:
+            params = [(k, v) for k, v in self.query_pairs(query)
+                      if k != "offset"]
+            params.append(("offset", str(offset + limit)))
+            next_page = "{}{}?{}".format(PREFIX, name, "&".join(
+                "{}={}".format(k, v) if v is not None else k
+                for k, v in params))
+        return HTTPStatus.OK, {"ETag": etag}, self.json_body({
+            "results": [obj.to_dict() for obj in objs],
+            "offset": offset,
+            "limit": limit,
+            "next": next_page})
+
+    def query_pairs(self, query):
+        """Yield each component of query as it was sent, split around its
+        first =, the value None if it has none."""
+        for part in query.split("&"):
+            if part:
+                key, sep, value = part.partition("=")
+                yield key, value if sep else None
+
+    def parse_query(self, cls, query):
+        """Return the conditions, order, limit and offset of a list query.
+
+        Values of declared str, int and float attributes are cast as the
+        where command of the console does.
+
+        Raises:
+            APIError: If a component of query is not valid.
+        """
+        conditions = []
+        order = ""
+        limit = DEFAULT_LIMIT
+        offset = 0
+        for part in query.split("&"):
+            if not part:
+                continue
+            match = CONDITION.match(unquote_plus(part))
+            if match is None:
+                raise APIError(HTTPStatus.BAD_REQUEST,
+                               "invalid condition: {}".format(part))
+            attr, op, value = match.groups()
+            op = "==" if op == "=" else op
+            try:
+                if attr == "order" and op == "==":
+                    order = value
+                elif attr == "limit" and op == "==":
+                    limit = int(value)
+                    if not 0 < limit <= MAX_LIMIT:
+                        raise ValueError(value)
+                elif attr == "offset" and op == "==":
+                    offset = int(value)
+                    if offset < 0:
+                        raise ValueError(value)
+                elif type(cls.__dict__.get(attr)) in {str, int, float}:
+                    valtype = type(cls.__dict__[attr])
+                    conditions.append((attr, op, valtype(value)))
+                else:
+                    conditions.append((attr, op, value))
+            except ValueError:
+                raise APIError(HTTPStatus.BAD_REQUEST,
+                               "invalid condition: {}".format(part))
+        return conditions, order, limit, offset
+
+    def json_body(self, value):
+        """Return the JSON encoding of value, as UTF-8 bytes."""
+        return json.dumps(value).encode()
+
+    def error_body(self, message):
+        """Return the JSON body of an error response."""
+        return self.json_body({"error": message})
+
+    def write(self, writer, status, headers, body, keep_alive):
+        """Write a response, its body last, to writer."""
+        lines = ["HTTP/1.1 {} {}".format(status.value, status.phrase)]
+        if status != HTTPStatus.NOT_MODIFIED:
+            lines.append("Content-Type: application/json")
+            headers.setdefault("Content-Length", str(len(body)))
+        headers["Access-Control-Allow-Origin"] = "*"
+        headers["Connection"] = "keep-alive" if keep_alive else "close"
+        lines.extend("{}: {}".format(k, v) for k, v in headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") +
+                     body)
+
+
+if __name__ == "__main__":
+    asyncio.run(API(storage).serve(getenv("HBNB_API_HOST", "0.0.0.0"),
+                                   int(getenv("HBNB_API_PORT", 5000))))
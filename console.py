@@ -1,16 +1,16 @@
 #!/usr/bin/python3
 """Defines the HBnB console."""
 import cmd
+import csv
+import json
+import os
 import re
+from datetime import datetime
 from shlex import split
+from uuid import uuid4
 from models import storage
 from models.base_model import BaseModel
-from models.user import User
-from models.state import State
-from models.city import City
-from models.place import Place
-from models.amenity import Amenity
-from models.review import Review
+from models.engine.file_storage import ConflictError
 
 
 def argParse(arg):
@@ -31,6 +31,112 @@ def argParse(arg):
         return retl
 
 
+def isSettable(cls, name):
+    """Return True if name can be set on the instances of cls: a name
+    cls does not have, or one of its str, int, float and list data
+    attributes, but neither a property such as State.cities nor a
+    method such as Place.near."""
+    if not hasattr(cls, name):
+        return True
+    return type(getattr(cls, name)) in {str, int, float, list}
+
+
+def castValue(cls, name, value):
+    """Return value cast to the type of the class attribute name of cls
+    if it is a declared str, int or float one, value itself otherwise.
+    Raise ValueError if it cannot be cast."""
+    declared = getattr(cls, name, None)
+    if type(declared) in {str, int, float}:
+        return type(declared)(value)
+    return value
+
+
+def setAttributes(obj, attrs):
+    """Set each attribute of the dictionary attrs on obj, cast as
+    castValue does. Raise AttributeError, before setting any, if one
+    cannot be set, and ValueError if a value cannot be cast."""
+    for k in attrs:
+        if not isSettable(obj.__class__, k):
+            raise AttributeError("can't set attribute: {}".format(k))
+    for k, v in attrs.items():
+        setattr(obj, k, castValue(obj.__class__, k, v))
+
+
+def castRecord(cls, attrs):
+    """Return the record of an instance of cls, as to_dict() would, made
+    from the dictionary attrs: declared str, int and float attributes
+    are cast as update does, and a missing id or timestamp is made up.
+    Raise ValueError or TypeError if a value or attribute is not
+    valid."""
+    if type(attrs) is not dict:
+        raise ValueError("not a dictionary: {}".format(attrs))
+    values = {}
+    for k, v in attrs.items():
+        if k in ("crea_at", "upd_at"):
+            datetime.fromisoformat(v)
+        elif k == "id" and type(v) is not str:
+            raise ValueError("invalid id: {}".format(v))
+        elif k != "__class__" and not isSettable(cls, k):
+            raise ValueError("can't set attribute: {}".format(k))
+        else:
+            v = castValue(cls, k, v)
+        values[k] = v
+    values.pop("__class__", None)
+    record = {"id": values.pop("id", None) or str(uuid4())}
+    record["crea_at"] = values.pop("crea_at", datetime.today().isoformat())
+    record["upd_at"] = values.pop("upd_at", record["crea_at"])
+    record.update(values)
+    record["__class__"] = cls.__name__
+    return record
+
+
+def csvColumns(cls):
+    """Return the CSV columns of the instances of cls: id, timestamps,
+    the declared str, int, float and list attributes, then extra."""
+    return (["id", "crea_at", "upd_at"] +
+            [k for k, v in cls.__dict__.items()
+             if type(v) in {str, int, float, list} and
+             not k.startswith("_")] +
+            ["extra"])
+
+
+def csvRow(cls, odict, columns):
+    """Return the CSV row of the to_dict() dictionary odict of an instance
+    of cls. Values of the wrong type for their column, and attributes
+    with no column, go to extra as JSON; lists are written as JSON."""
+    odict = dict(odict)
+    del odict["__class__"]
+    row = [odict.pop(k, "") for k in columns[:3]]
+    for k in columns[3:-1]:
+        value = odict.get(k)
+        if value is None or type(value) is not type(cls.__dict__[k]):
+            row.append("")
+            continue
+        del odict[k]
+        row.append(json.dumps(value) if type(value) is list else value)
+    row.append(json.dumps(odict) if odict else "")
+    return row
+
+
+def csvAttributes(cls, row):
+    """Return the dictionary of attributes of a CSV row read by
+    csv.DictReader, the reverse of csvRow(); empty cells are skipped."""
+    attrs = {}
+    for k, v in row.items():
+        if k is None or v is None or v == "":
+            continue
+        if k == "extra":
+            extra = json.loads(v)
+            if type(extra) is not dict:
+                raise ValueError("invalid extra: {}".format(v))
+            attrs.update(extra)
+        elif type(cls.__dict__.get(k)) is list:
+            attrs[k] = json.loads(v)
+        else:
+            attrs[k] = v
+    return attrs
+
+
 class HBNBCommand(cmd.Cmd):
     """Defines the HolbertonBnB command interpreter.
 
@@ -39,15 +145,20 @@ class HBNBCommand(cmd.Cmd):
     """
 
     prompt = "(hbnb) "
-    __classes = {
-        "BaseModel",
-        "User",
-        "State",
-        "City",
-        "Place",
-        "Amenity",
-        "Review"
-    }
+
+    def precmd(self, line):
+        """Bring the store up to date with other processes first."""
+        storage.refresh()
+        return line
+
+    def onecmd(self, line):
+        """Run the command of line, telling if a change it saved was given
+        up because another process saved the same instance first."""
+        try:
+            return super().onecmd(line)
+        except ConflictError:
+            print("** instance changed by another process **")
+            return False
 
     def emptyisEmpty(self):
         """Do nothing upon receiving an empty line."""
@@ -60,7 +171,15 @@ class HBNBCommand(cmd.Cmd):
             "show": self.do_showInstant,
             "destroy": self.do_destroyInstant,
             "count": self.do_countInstant,
-            "update": self.do_updateInstant
+            "update": self.do_updateInstant,
+            "related": self.do_relatedInstant,
+            "where": self.do_whereInstant,
+            "near": self.do_nearInstant,
+            "within": self.do_withinInstant,
+            "stats": self.do_statsInstant,
+            "bulk_create": self.do_bulk_createInstant,
+            "import": self.do_importInstant,
+            "export": self.do_exportInstant
         }
         match = re.search(r"\.", arg)
         if match is not None:
@@ -76,13 +195,33 @@ class HBNBCommand(cmd.Cmd):
 
     def do_quit_cmd(self, arg):
         """Quit command to exit the program."""
+        storage.sync()
         return True
 
     def do_EOF_signal(self, arg):
         """EOF signal to exit the program."""
         print("")
+        storage.sync()
         return True
 
+    def do_syncInstant(self, arg):
+        """Usage: sync
+        Write out the changes whose saving was put off, forced to disk."""
+        storage.sync()
+
+    def do_convertInstant(self, arg):
+        """Usage: convert <format>
+        Write the whole store again in a snapshot format, json or binary,
+        which the next saves keep using."""
+        argl = argParse(arg)
+        if len(argl) == 0:
+            print("** format missing **")
+            return False
+        try:
+            storage.convert(argl[0])
+        except ValueError:
+            print("** format doesn't exist **")
+
     def do_createInstant(self, arg):
         """Usage: create <class>
         Create a new class instance and print its id.
@@ -90,44 +229,159 @@ class HBNBCommand(cmd.Cmd):
         argl = argParse(arg)
         if len(argl) == 0:
             print("** class name missing **")
-        elif argl[0] not in HBNBCommand.__classes:
+        elif argl[0] not in BaseModel.classes:
             print("** class doesn't exist **")
         else:
-            print(eval(argl[0])().id)
+            print(BaseModel.classes[argl[0]]().id)
             storage.save()
 
+    def do_bulk_createInstant(self, arg):
+        """Usage: bulk_create <class> <count> or bulk_create <class> <file>
+        Create a number of class instances, or one per line of a file of
+        JSON dictionaries of attributes, print their ids and save them
+        all at once. The id, crea_at, upd_at and __class__ keys of the
+        dictionaries are ignored."""
+        argl = argParse(arg)
+        if len(argl) == 0:
+            print("** class name missing **")
+        elif argl[0] not in BaseModel.classes:
+            print("** class doesn't exist **")
+        elif len(argl) == 1:
+            print("** count or file missing **")
+        elif argl[1].isdigit():
+            with storage.batch():
+                for _ in range(int(argl[1])):
+                    print(BaseModel.classes[argl[0]]().id)
+        elif not os.path.isfile(argl[1]):
+            print("** file doesn't exist **")
+        else:
+            with open(argl[1]) as f, storage.batch():
+                for n, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        attrs = json.loads(line)
+                    except ValueError:
+                        attrs = None
+                    if type(attrs) is not dict:
+                        print("** invalid line {} **".format(n))
+                        return False
+                    for k in ("id", "crea_at", "upd_at", "__class__"):
+                        attrs.pop(k, None)
+                    obj = BaseModel.classes[argl[0]]()
+                    try:
+                        setAttributes(obj, attrs)
+                    except (AttributeError, ValueError, TypeError):
+                        storage.delete(obj)
+                        print("** invalid line {} **".format(n))
+                        return False
+                    print(obj.id)
+
+    def do_importInstant(self, arg):
+        """Usage: import <class> <file>
+        Store the class instances of a JSON Lines file, one dictionary of
+        attributes per line, or of a CSV file (.csv) as written by export,
+        print their number and save them all at once. Values are cast as
+        update does, a missing id or timestamp is made up and an instance
+        with the id of a stored one replaces it. Instances are read one at
+        a time and, in lazy or compact storage mode, never built."""
+        argl = argParse(arg)
+        if len(argl) == 0:
+            print("** class name missing **")
+        elif argl[0] not in BaseModel.classes:
+            print("** class doesn't exist **")
+        elif len(argl) == 1:
+            print("** file name missing **")
+        elif not os.path.isfile(argl[1]):
+            print("** file doesn't exist **")
+        else:
+            cls = BaseModel.classes[argl[0]]
+            count = 0
+            with open(argl[1], newline="") as f, storage.batch():
+                rows = f
+                if argl[1].endswith(".csv"):
+                    rows = csv.DictReader(f)
+                for n, row in enumerate(rows, 1):
+                    try:
+                        if type(row) is str:
+                            if not row.strip():
+                                continue
+                            attrs = json.loads(row)
+                        else:
+                            n = rows.line_num
+                            attrs = csvAttributes(cls, row)
+                        storage.insert(castRecord(cls, attrs))
+                    except (ValueError, TypeError):
+                        print("** invalid line {} **".format(n))
+                        return False
+                    count += 1
+            print(count)
+
+    def do_exportInstant(self, arg):
+        """Usage: export <class> <file>
+        Write every instance of a class to a JSON Lines file, one to_dict()
+        dictionary per line, or to a CSV file (.csv) with one column per
+        class attribute and an extra column for the others, and print
+        their number. Instances are written one at a time and, in lazy or
+        compact storage mode, never built."""
+        argl = argParse(arg)
+        if len(argl) == 0:
+            print("** class name missing **")
+        elif argl[0] not in BaseModel.classes:
+            print("** class doesn't exist **")
+        elif len(argl) == 1:
+            print("** file name missing **")
+        else:
+            cls = BaseModel.classes[argl[0]]
+            count = 0
+            try:
+                f = open(argl[1], "w", newline="")
+            except OSError:
+                print("** can't write file **")
+                return False
+            with f:
+                if argl[1].endswith(".csv"):
+                    columns = csvColumns(cls)
+                    writer = csv.writer(f)
+                    writer.writerow(columns)
+                for odict in storage.records(cls):
+                    if argl[1].endswith(".csv"):
+                        writer.writerow(csvRow(cls, odict, columns))
+                    else:
+                        f.write(json.dumps(odict) + "\n")
+                    count += 1
+            print(count)
+
     def do_showInstant(self, arg):
         """Usage: show <class> <id> or <class>.show(<id>)
         Display the string representation of a class instance of a given id.
         """
         argl = argParse(arg)
-        objdict = storage.all()
         if len(argl) == 0:
             print("** class name missing **")
-        elif argl[0] not in HBNBCommand.__classes:
+        elif argl[0] not in BaseModel.classes:
             print("** class doesn't exist **")
         elif len(argl) == 1:
             print("** instance id missing **")
-        elif "{}.{}".format(argl[0], argl[1]) not in objdict:
+        elif storage.get(argl[0], argl[1]) is None:
             print("** no instance found **")
         else:
-            print(objdict["{}.{}".format(argl[0], argl[1])])
+            print(storage.get(argl[0], argl[1]))
 
     def do_destroyInstant(self, arg):
         """Usage: destroy <class> <id> or <class>.destroy(<id>)
         Delete a class instance of a given id."""
         argl = argParse(arg)
-        objdict = storage.all()
         if len(argl) == 0:
             print("** class name missing **")
-        elif argl[0] not in HBNBCommand.__classes:
+        elif argl[0] not in BaseModel.classes:
             print("** class doesn't exist **")
         elif len(argl) == 1:
             print("** instance id missing **")
-        elif "{}.{}".format(argl[0], argl[1]) not in objdict.keys():
+        elif storage.get(argl[0], argl[1]) is None:
             print("** no instance found **")
         else:
-            del objdict["{}.{}".format(argl[0], argl[1])]
+            storage.delete(storage.get(argl[0], argl[1]))
             storage.save()
 
     def do_allInstant(self, arg):
@@ -135,26 +389,26 @@ class HBNBCommand(cmd.Cmd):
         Display string representations of all instances of a given class.
         If no class is specified, displays all instantiated objects."""
         argl = argParse(arg)
-        if len(argl) > 0 and argl[0] not in HBNBCommand.__classes:
+        if len(argl) > 0 and argl[0] not in BaseModel.classes:
             print("** class doesn't exist **")
         else:
             objl = []
-            for obj in storage.all().values():
-                if len(argl) > 0 and argl[0] == obj.__class__.__name__:
-                    objl.append(obj.__str__())
-                elif len(argl) == 0:
-                    objl.append(obj.__str__())
+            if len(argl) > 0:
+                objdict = storage.all(argl[0])
+            else:
+                objdict = storage.all()
+            for obj in objdict.values():
+                objl.append(obj.__str__())
             print(objl)
 
     def do_countInstant(self, arg):
         """Usage: count <class> or <class>.count()
         Retrieve the number of instances of a given class."""
         argl = argParse(arg)
-        count = 0
-        for obj in storage.all().values():
-            if argl[0] == obj.__class__.__name__:
-                count += 1
-        print(count)
+        if len(argl) > 0:
+            print(storage.count(argl[0]))
+        else:
+            print(storage.count())
 
     def do_updateInstant(self, arg):
         """Usage: update <class> <id> <attribute_name> <attribute_value> or
@@ -163,18 +417,17 @@ class HBNBCommand(cmd.Cmd):
         Update a class instance of a given id by adding or updating
         a given attribute key/value pair or dictionary."""
         argl = argParse(arg)
-        objdict = storage.all()
 
         if len(argl) == 0:
             print("** class name missing **")
             return False
-        if argl[0] not in HBNBCommand.__classes:
+        if argl[0] not in BaseModel.classes:
             print("** class doesn't exist **")
             return False
         if len(argl) == 1:
             print("** instance id missing **")
             return False
-        if "{}.{}".format(argl[0], argl[1]) not in objdict.keys():
+        if storage.get(argl[0], argl[1]) is None:
             print("** no instance found **")
             return False
         if len(argl) == 2:
@@ -187,23 +440,185 @@ class HBNBCommand(cmd.Cmd):
                 print("** value missing **")
                 return False
 
+        obj = storage.get(argl[0], argl[1])
         if len(argl) == 4:
-            obj = objdict["{}.{}".format(argl[0], argl[1])]
-            if argl[2] in obj.__class__.__dict__.keys():
-                valtype = type(obj.__class__.__dict__[argl[2]])
-                obj.__dict__[argl[2]] = valtype(argl[3])
-            else:
-                obj.__dict__[argl[2]] = argl[3]
+            attrs = {argl[2]: argl[3]}
         elif type(eval(argl[2])) == dict:
-            obj = objdict["{}.{}".format(argl[0], argl[1])]
-            for k, v in eval(argl[2]).items():
-                if (k in obj.__class__.__dict__.keys() and
-                        type(obj.__class__.__dict__[k]) in {str, int, float}):
-                    valtype = type(obj.__class__.__dict__[k])
-                    obj.__dict__[k] = valtype(v)
+            attrs = eval(argl[2])
+        else:
+            attrs = {}
+        try:
+            setAttributes(obj, attrs)
+        except AttributeError:
+            print("** attribute can't be set **")
+            return False
+        except ValueError:
+            print("** invalid value **")
+            return False
+        obj.save()
+
+    def do_relatedInstant(self, arg):
+        """Usage: related <class> <id> <relation> or
+       <class>.related(<id>, <relation>)
+        Display string representations of the instances related to a
+        class instance of a given id, e.g. the cities of a State."""
+        argl = argParse(arg)
+        if len(argl) == 0:
+            print("** class name missing **")
+        elif argl[0] not in BaseModel.classes:
+            print("** class doesn't exist **")
+        elif len(argl) == 1:
+            print("** instance id missing **")
+        elif storage.get(argl[0], argl[1]) is None:
+            print("** no instance found **")
+        elif len(argl) == 2:
+            print("** relation name missing **")
+        elif type(getattr(BaseModel.classes[argl[0]], argl[2],
+                          None)) is not property:
+            print("** relation doesn't exist **")
+        else:
+            obj = storage.get(argl[0], argl[1])
+            objl = []
+            for related in getattr(obj, argl[2]):
+                objl.append(related.__str__())
+            print(objl)
+
+    def do_whereInstant(self, arg):
+        """Usage: where <class> <condition> ... [order=[-]<attribute>]
+       [limit=<n>] or <class>.where(<condition>, ...)
+        Display string representations of the instances of a given class
+        matching every <attribute><operator><value> condition, where the
+        operator is one of =, ==, !=, <, <=, >, >=."""
+        argl = argParse(arg)
+        if len(argl) == 0:
+            print("** class name missing **")
+            return False
+        if argl[0] not in BaseModel.classes:
+            print("** class doesn't exist **")
+            return False
+        cls = BaseModel.classes[argl[0]]
+        conditions = []
+        order_by = None
+        reverse = False
+        limit = None
+        rest = arg.strip()[len(argl[0]):]
+        for cond in re.findall(r"""(?:"[^"]*"|'[^']*'|[^\s,"'])+""", re.sub(
+                r"\s*(==|!=|<=|>=|<|>|=)\s*", r"\1", rest)):
+            match = re.match(r"(\w+)(==|!=|<=|>=|<|>|=)(.+)$", cond)
+            if match is None:
+                print("** invalid condition: {} **".format(cond))
+                return False
+            attr, op, value = match.groups()
+            op = "==" if op == "=" else op
+            value = value.strip("\"'")
+            try:
+                if attr == "order" and op == "==":
+                    reverse = value.startswith("-")
+                    order_by = value.lstrip("-")
+                elif attr == "limit" and op == "==":
+                    limit = int(value)
+                elif type(cls.__dict__.get(attr)) in {str, int, float}:
+                    valtype = type(cls.__dict__[attr])
+                    conditions.append((attr, op, valtype(value)))
+                else:
+                    conditions.append((attr, op, value))
+            except ValueError:
+                print("** invalid condition: {} **".format(cond))
+                return False
+        sep = "["
+        for obj in storage.where(argl[0], conditions, order_by, limit,
+                                 reverse):
+            print(sep + repr(obj.__str__()), end="")
+            sep = ", "
+        print("[]" if sep == "[" else "]")
+
+    def do_nearInstant(self, arg):
+        """Usage: near <class> <latitude> <longitude> <km> [<limit>] or
+       <class>.near(<latitude>, <longitude>, <km>[, <limit>])
+        Display string representations of the instances of a given class
+        within a distance in km of a point, nearest first."""
+        argl = argParse(arg)
+        if self.__check_coordinates(argl, 3):
+            try:
+                limit = int(argl[4]) if len(argl) > 4 else None
+            except ValueError:
+                print("** invalid coordinates **")
+                return False
+            print([obj.__str__() for obj in storage.near(
+                argl[0], *[float(a) for a in argl[1:4]], limit=limit)])
+
+    def do_withinInstant(self, arg):
+        """Usage: within <class> <south> <west> <north> <east> or
+       <class>.within(<south>, <west>, <north>, <east>)
+        Display string representations of the instances of a given class
+        within a box of latitudes and longitudes."""
+        argl = argParse(arg)
+        if self.__check_coordinates(argl, 4):
+            print([obj.__str__() for obj in storage.within(
+                argl[0], *[float(a) for a in argl[1:5]])])
+
+    def do_statsInstant(self, arg):
+        """Usage: stats <class> <attribute> [<function> [<attribute>]] or
+       <class>.stats(<attribute>[, <function>[, <attribute>]])
+        Display aggregates of a numeric attribute of the instances of a
+        given class: count, sum, mean, min, max and std, or one of them,
+        for each value of a second attribute if given. The counts
+        function displays the number of instances holding each value.
+        Requires NumPy."""
+        argl = argParse(arg)
+        if len(argl) == 0:
+            print("** class name missing **")
+            return False
+        if argl[0] not in BaseModel.classes:
+            print("** class doesn't exist **")
+            return False
+        if len(argl) == 1:
+            print("** attribute name missing **")
+            return False
+        store = storage.columns(argl[0])
+        if any(a not in store.names for a in argl[1:4:2]):
+            print("** attribute doesn't exist **")
+        elif len(argl) > 2 and argl[2] not in store.functions + ("counts",):
+            print("** function doesn't exist **")
+        elif argl[2:3] != ["counts"] and store.types[argl[1]] is str:
+            print("** attribute is not numeric **")
+        else:
+            try:
+                if len(argl) == 2:
+                    print({function: store.aggregate(argl[1], function)
+                           for function in store.functions})
+                elif argl[2] == "counts":
+                    print(store.counts(argl[1]))
                 else:
-                    obj.__dict__[k] = v
-        storage.save()
+                    print(store.aggregate(argl[1], argl[2], *argl[3:4]))
+            except ImportError:
+                print("** numpy is not installed **")
+
+    def __check_coordinates(self, argl, count):
+        """Print the error in the arguments of a spatial query, if any.
+
+        Return True if there is none.
+
+        Args:
+            argl (list): The parsed arguments of the command.
+            count (int): The number of coordinates expected after the
+                class name.
+        """
+        if len(argl) == 0:
+            print("** class name missing **")
+        elif argl[0] not in BaseModel.classes:
+            print("** class doesn't exist **")
+        elif len(argl) <= count:
+            print("** coordinates missing **")
+        elif not hasattr(BaseModel.classes[argl[0]], "near"):
+            print("** class has no coordinates **")
+        else:
+            try:
+                [float(a) for a in argl[1:count + 1]]
+                return True
+            except ValueError:
+                print("** invalid coordinates **")
+        return False
 
 
 if __name__ == "__main__":
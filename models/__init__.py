@@ -1,7 +1,14 @@
 #!/usr/bin/python3
 """__init__ magic method for models directory"""
-from models.engine.file_storage import FileStorage
+from os import getenv
+from models import amenity, city, place, review, state, user
 
 
-storage = FileStorage()
+storage_t = getenv("HBNB_TYPE_STORAGE")
+if storage_t == "db":
+    from models.engine.db_storage import DBStorage
+    storage = DBStorage()
+else:
+    from models.engine.file_storage import FileStorage
+    storage = FileStorage()
 storage.reload()
@@ -6,7 +6,18 @@ from datetime import datetime
 
 
 class BaseModel:
-    """Represents the BaseModel of the HBnB project."""
+    """Represents the BaseModel of the HBnB project.
+
+    Attributes:
+        classes (dict): BaseModel and each of its subclasses, by name,
+            registered as they are defined.
+    """
+    classes = {}
+
+    def __init_subclass__(cls, **kwargs):
+        """Register a new model class under its name."""
+        super().__init_subclass__(**kwargs)
+        BaseModel.classes[cls.__name__] = cls
 
     def __init__(self, *args, **kwargs):
         """Initialize a new BaseModel.
@@ -15,15 +26,20 @@ class BaseModel:
             *args (any): Unused.
             **kwargs (dict): Key/value pairs of attributes.
         """
-        time_form = "%Y-%m-%dT%H:%M:%S.%f"
-        self.id = str(uuid4())
-        self.crea_at = datetime.today()
-        self.upd_at = datetime.today()
+        if "id" in kwargs:
+            self.__dict__["id"] = kwargs["id"]
+        else:
+            self.__dict__["id"] = str(uuid4())
+        for k in ("crea_at", "upd_at"):
+            if k not in kwargs:
+                self.__dict__[k] = datetime.today()
+            elif k == "upd_at" and kwargs[k] == kwargs.get("crea_at"):
+                self.__dict__[k] = self.crea_at
+            else:
+                self.__dict__[k] = datetime.fromisoformat(kwargs[k])
         if len(kwargs) != 0:
             for k, v in kwargs.items():
-                if k == "crea_at" or k == "upd_at":
-                    self.__dict__[k] = datetime.strptime(v, time_form)
-                else:
+                if k != "crea_at" and k != "upd_at":
                     self.__dict__[k] = v
         else:
             models.storage.new(self)
@@ -33,6 +49,11 @@ class BaseModel:
         self.upd_at = datetime.today()
         models.storage.save()
 
+    def __setattr__(self, name, value):
+        """Set an attribute and flag the instance as changed in storage."""
+        super().__setattr__(name, value)
+        models.storage.mark_dirty(self)
+
     def to_dict(self):
         """Return the dictionary of the BaseModel instance.
 
@@ -49,3 +70,6 @@ class BaseModel:
         """Return the print/str representation of the BaseModel instance."""
         cl_name = self.__class__.__name__
         return "[{}] ({}) {}".format(cl_name, self.id, self.__dict__)
+
+
+BaseModel.classes["BaseModel"] = BaseModel
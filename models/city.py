@@ -1,5 +1,6 @@
 #!/usr/bin/python3
 """Defines the City class."""
+import models
 from models.base_model import BaseModel
 
 
@@ -13,3 +14,8 @@ class City(BaseModel):
 
     stat_id = ""
     name = ""
+
+    @property
+    def places(self):
+        """Return the list of Place instances of the City."""
+        return models.storage.lookup("Place", "city_id", self.id)
@@ -0,0 +1,395 @@
+#!/usr/bin/python3
+"""Defines incremental reading and writing of records in binary.
+
+A binary file is MAGIC followed by chunks, each a tag byte, the size of
+its body as a varint and the body, and ends with an END chunk:
+
+    SCHEMA  schema id, class name, field count, then the name and kind
+            of each field
+    RECORD  schema id, packed values, JSON values
+    KEYED   key, schema id, packed values, JSON values
+    END
+
+A schema is written before the first record of its class, fields and
+kinds of values, so records hold their values only, in the order of the
+fields of their schema. The kind of a field tells how its value is kept:
+
+    u   a uuid string, packed to its 16 bytes
+    t   a timestamp string, packed to a count of microseconds
+    i   an int of 64 bits
+    f   a float
+    c   the __class__ field, whose value is the class of the schema
+    j   any other value, among the JSON array that ends the record
+
+Strings are only packed if that gives back the exact same string. The
+packed values of a record are read with one struct, its JSON values with
+one json.loads(). A record is stored under <class>.<id> unless KEYED.
+
+Like json_stream, the file is never held in memory: load_items() parses
+one chunk at a time and dump_items() writes records already encoded.
+"""
+import json
+import re
+import struct
+from datetime import datetime
+from datetime import timedelta
+from functools import lru_cache
+from operator import itemgetter
+
+MAGIC = b"HBNB\x00\x02"
+BINARY = True
+SCHEMA, RECORD, KEYED, END = b"SRKE"
+FORMATS = {"u": "16s", "t": "q", "i": "q", "f": "d", "c": "", "j": ""}
+ORIGIN = datetime(1, 1, 1)
+SECOND = timedelta(seconds=1)
+TICK = timedelta(microseconds=1)
+INT64 = 1 << 63
+SHAPES = {}
+STRUCTS = {}
+DECODER = json.JSONDecoder()
+TIMESTAMP = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}"
+                       r"(\.[0-9]{6})?")
+ENCODER = json.JSONEncoder(separators=(",", ":"))
+
+
+def pack_size(n, out):
+    """Append the unsigned varint of n to the bytearray out."""
+    while n > 0x7f:
+        out.append(n & 0x7f | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def unpack_size(data, pos):
+    """Return the unsigned varint in data at pos and the position after."""
+    n = data[pos]
+    pos += 1
+    if n < 0x80:
+        return n, pos
+    n &= 0x7f
+    shift = 7
+    while True:
+        byte = data[pos]
+        pos += 1
+        n |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return n, pos
+        shift += 7
+
+
+def pack_str(value, out):
+    """Append the size and UTF-8 bytes of the string value to out."""
+    encoded = value.encode()
+    pack_size(len(encoded), out)
+    out += encoded
+
+
+def unpack_str(data, pos):
+    """Return the string packed in data at pos and the position after."""
+    n, pos = unpack_size(data, pos)
+    return str(data[pos:pos + n], "utf-8"), pos + n
+
+
+def uuid_string(packed):
+    """Return the canonical string of the 16 bytes of a uuid."""
+    h = packed.hex()
+    return "-".join((h[:8], h[8:12], h[12:16], h[16:20], h[20:]))
+
+
+@lru_cache(maxsize=4096)
+def second_string(seconds):
+    """Return the isoformat() string of a whole count of seconds."""
+    return (ORIGIN + seconds * SECOND).isoformat()
+
+
+def time_string(micros):
+    """Return the isoformat() string of a count of microseconds."""
+    seconds, fraction = divmod(micros, 1000000)
+    if fraction:
+        return "{}.{:06d}".format(second_string(seconds), fraction)
+    return second_string(seconds)
+
+
+def packed_str(value):
+    """Return the kind and packed value of the string value.
+
+    A string that is not a canonical uuid or a naive isoformat()
+    timestamp is of kind j and returned as is. fromhex() skips
+    whitespace, so a uuid must decode to exactly 16 bytes.
+    """
+    n = len(value)
+    if n == 36 and value[8] == value[13] == value[18] == value[23] == "-":
+        if value.count("-") == 4 and value == value.lower():
+            try:
+                packed = bytes.fromhex(value.replace("-", ""))
+            except ValueError:
+                packed = b""
+            if len(packed) == 16:
+                return "u", packed
+    elif (n == 26 or n == 19) and value[10] == "T":
+        if TIMESTAMP.fullmatch(value) and not value.endswith(".000000"):
+            try:
+                return "t", (datetime.fromisoformat(value) - ORIGIN) // TICK
+            except ValueError:
+                pass
+    return "j", value
+
+
+def schema_struct(kinds):
+    """Return the struct of the packed values of fields of kinds."""
+    packer = STRUCTS.get(kinds)
+    if packer is None:
+        packer = STRUCTS[kinds] = struct.Struct(
+            "<" + "".join(FORMATS[k] for k in kinds))
+    return packer
+
+
+def encode(o):
+    """Return the encoding of the record o for dump_items().
+
+    It is a tuple of the class name, the field names, the kind of each
+    field, the packed and JSON values and the id of o; the field names
+    of records of the same shape are the same tuple.
+
+    Raises:
+        TypeError: If a value cannot be encoded to JSON.
+    """
+    kinds = []
+    packed = []
+    others = []
+    for name, value in o.items():
+        kind = type(value)
+        if name == "__class__":
+            kinds.append("c")
+            continue
+        if kind is str:
+            kind, value = packed_str(value)
+        elif kind is int and -INT64 <= value < INT64:
+            kind = "i"
+        elif kind is float:
+            kind = "f"
+        else:
+            kind = "j"
+        kinds.append(kind)
+        if kind == "j":
+            others.append(value)
+        else:
+            packed.append(value)
+    kinds = "".join(kinds)
+    values = schema_struct(kinds).pack(*packed)
+    if others:
+        values += ENCODER.encode(others).encode()
+    names = tuple(o)
+    names = SHAPES.setdefault(names, names)
+    return o.get("__class__"), names, kinds, values, o.get("id")
+
+
+def dump_items(items, f, positions=None):
+    """Write the pairs of items to the binary file f.
+
+    Args:
+        items (iterable): Pairs of a key and its record encoded by
+            encode().
+        f (file): A file opened for writing bytes.
+        positions (list): If given, the key, offset and length of the
+            chunk of each record, and the offset of its schema chunk, are
+            appended to it, for load_record().
+    """
+    f.write(MAGIC)
+    pos = len(MAGIC)
+    schemas = {}
+    offsets = {}
+    for key, (cls_name, names, kinds, values, ident) in items:
+        chunk = bytearray()
+        sid = schemas.get((cls_name, names, kinds))
+        if sid is None:
+            sid = len(schemas)
+            schemas[(cls_name, names, kinds)] = sid
+            pack_size(sid, chunk)
+            pack_str(json.dumps(cls_name), chunk)
+            pack_size(len(names), chunk)
+            for name, kind in zip(names, kinds):
+                pack_str(name, chunk)
+                chunk += kind.encode()
+            offsets[sid] = pos
+            pos += write_chunk(f, SCHEMA, chunk)
+            chunk = bytearray()
+        if (type(cls_name) is str and type(ident) is str and
+                key == "{}.{}".format(cls_name, ident)):
+            tag = RECORD
+        else:
+            tag = KEYED
+            pack_str(key, chunk)
+        pack_size(sid, chunk)
+        chunk += values
+        size = write_chunk(f, tag, chunk)
+        if positions is not None:
+            positions.append((key, pos, size, offsets[sid]))
+        pos += size
+    f.write(bytes((END, 0)))
+
+
+def write_chunk(f, tag, body):
+    """Write the chunk of tag with the bytes of body to the file f.
+
+    Returns:
+        The size of the chunk, in bytes.
+    """
+    head = bytearray((tag,))
+    pack_size(len(body), head)
+    f.write(head + body)
+    return len(head) + len(body)
+
+
+def load_items(f, size=1 << 16):
+    """Yield the key/value pairs of the records of the binary file f.
+
+    Args:
+        f (file): A file opened for reading bytes.
+        size (int): The number of bytes read at a time.
+    Raises:
+        ValueError: If the file is not binary records, or is torn.
+    """
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not a binary records file")
+    schemas = []
+    buf = b""
+    pos = 0
+    while True:
+        if len(buf) - pos < 11:
+            buf = buf[pos:] + f.read(max(size, 11))
+            pos = 0
+        if pos == len(buf):
+            raise ValueError("truncated file: no end chunk")
+        tag = buf[pos]
+        try:
+            n, start = unpack_size(buf, pos + 1)
+        except IndexError:
+            raise ValueError("truncated chunk")
+        if start + n > len(buf):
+            more = f.read(max(size, start + n - len(buf)))
+            if start + n - len(buf) > len(more):
+                raise ValueError("truncated chunk")
+            buf = buf[pos:] + more
+            start -= pos
+        pos = start + n
+        if tag == RECORD or tag == KEYED:
+            yield read_record(tag, buf, start, pos, schemas)
+        elif tag == SCHEMA:
+            try:
+                schemas.append(read_schema(buf[start:pos], len(schemas)))
+            except IndexError:
+                raise ValueError("invalid chunk")
+        elif tag == END:
+            return
+        else:
+            raise ValueError("unknown chunk tag {}".format(tag))
+
+
+def load_record(data, offset, length, context, plans):
+    """Return the record of the chunk in data at offset.
+
+    Args:
+        data (bytes or mmap): The whole file.
+        offset (int): The position of the record chunk in data.
+        length (int): The size of the record chunk, in bytes.
+        context (int): The position of the schema chunk of the record.
+        plans (dict): How to read the schemas of data already read, by
+            schema id, filled as needed.
+    Raises:
+        ValueError: If there is no valid record chunk there.
+    """
+    try:
+        tag = data[offset]
+        n, start = unpack_size(data, offset + 1)
+        if tag not in (RECORD, KEYED) or start + n != offset + length:
+            raise ValueError("not a record chunk")
+        if data[context] != SCHEMA:
+            raise ValueError("not a schema chunk")
+        n, i = unpack_size(data, context + 1)
+        sid = unpack_size(data, i)[0]
+        if sid not in plans:
+            plans[sid] = read_schema(data[i:i + n], sid)
+        return read_record(tag, data, start, offset + length, plans)[1]
+    except IndexError:
+        raise ValueError("invalid chunk")
+
+
+def read_record(tag, buf, start, end, schemas):
+    """Return the key and record of the chunk of tag in buf[start:end].
+
+    Args:
+        tag (int): RECORD or KEYED.
+        buf (bytes or mmap): The bytes holding the chunk body.
+        start (int): The position of the chunk body.
+        end (int): The position after the chunk body.
+        schemas (list or dict): How to read each schema, by schema id.
+    Raises:
+        ValueError: If the chunk is invalid.
+    """
+    try:
+        key = None
+        if tag == KEYED:
+            key, start = unpack_str(buf, start)
+        sid, start = unpack_size(buf, start)
+        cls_name, names, packer, uuids, times, order = schemas[sid]
+        values = list(packer.unpack_from(buf, start))
+    except (IndexError, KeyError, struct.error):
+        raise ValueError("invalid chunk")
+    for j in uuids:
+        values[j] = uuid_string(values[j])
+    for j in times:
+        values[j] = time_string(values[j])
+    start += packer.size
+    if start < end:
+        values += DECODER.raw_decode(str(buf[start:end], "utf-8"))[0]
+    values.append(cls_name)
+    try:
+        o = dict(zip(names, order(values)))
+    except IndexError:
+        raise ValueError("invalid chunk")
+    if key is None:
+        key = "{}.{}".format(cls_name, o["id"])
+    return key, o
+
+
+def read_schema(body, sid):
+    """Return how to read the records of the schema chunk body.
+
+    That is the class name, the field names, the struct of the packed
+    values, the positions of uuids and of timestamps among them, and a
+    function putting the packed values, JSON values and class name of a
+    record back in the order of the fields.
+
+    Raises:
+        ValueError: If the schema is not the one expected as sid.
+    """
+    found, i = unpack_size(body, 0)
+    if found != sid:
+        raise ValueError("schema {} out of order".format(found))
+    cls_name, i = unpack_str(body, i)
+    count, i = unpack_size(body, i)
+    names = []
+    kinds = ""
+    for _ in range(count):
+        name, i = unpack_str(body, i)
+        kind = chr(body[i])
+        if kind not in FORMATS:
+            raise ValueError("unknown field kind {}".format(kind))
+        names.append(name)
+        kinds += kind
+        i += 1
+    packed = [j for j, kind in enumerate(kinds) if FORMATS[kind]]
+    others = [j for j, kind in enumerate(kinds) if kind == "j"]
+    where = {j: n for n, j in enumerate(packed + others)}
+    last = len(packed) + len(others)
+    positions = [where.get(j, last) for j in range(len(kinds))]
+    if len(positions) == 1:
+        def order(values):
+            return (values[positions[0]],)
+    else:
+        order = itemgetter(*positions)
+    return (json.loads(cls_name), names, schema_struct(kinds),
+            [n for n, j in enumerate(packed) if kinds[j] == "u"],
+            [n for n, j in enumerate(packed) if kinds[j] == "t"],
+            order)
@@ -0,0 +1,204 @@
+#!/usr/bin/python3
+"""Defines the ColumnStore class.
+
+NumPy is an optional dependency: the columns are kept current without
+it, in array.array buffers, and only the aggregates need it.
+"""
+from array import array
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ColumnStore:
+    """Represent the attributes of a class as columns, one row per key.
+
+    Numeric attributes are float64 columns, NaN standing for the values
+    that are not numbers. String attributes are dictionary-encoded as
+    int64 codes into a list of labels, -1 standing for the values that
+    are not strings. Rows are kept dense: the row of a discarded key is
+    filled with the last row.
+
+    Attributes:
+        functions (tuple): The names of the aggregate functions.
+        names (tuple): The attribute of each column.
+        types (dict): The type of each attribute, int, float or str.
+        columns (dict): The array.array of each attribute.
+        labels (dict): The distinct strings of each string attribute,
+            in order of appearance.
+        codes (dict): The code of each string, by string, of each string
+            attribute.
+        keys (list): The key of each row.
+        rows (dict): The row of each key.
+    """
+    functions = ("count", "sum", "mean", "min", "max", "std")
+
+    def __init__(self, columns):
+        """Initialize a new, empty ColumnStore.
+
+        Args:
+            columns (dict): The default value of each attribute, by name;
+                its type tells numeric from string attributes.
+        """
+        self.names = tuple(columns)
+        self.types = {name: type(v) for name, v in columns.items()}
+        self.columns = {}
+        self.labels = {}
+        self.codes = {}
+        for name in self.names:
+            if self.types[name] is str:
+                self.columns[name] = array("q")
+                self.labels[name] = []
+                self.codes[name] = {}
+            else:
+                self.columns[name] = array("d")
+        self.keys = []
+        self.rows = {}
+
+    def add(self, key, value):
+        """Write the row of key, value holding one item per column."""
+        row = self.rows.get(key)
+        if row is None:
+            self.rows[key] = len(self.keys)
+            self.keys.append(key)
+            for name, item in zip(self.names, value):
+                self.columns[name].append(self.__encode(name, item))
+        else:
+            for name, item in zip(self.names, value):
+                self.columns[name][row] = self.__encode(name, item)
+
+    def discard(self, key):
+        """Remove the row of key if it is there."""
+        row = self.rows.pop(key, None)
+        if row is None:
+            return
+        last = self.keys.pop()
+        if last != key:
+            self.keys[row] = last
+            self.rows[last] = row
+        for column in self.columns.values():
+            item = column.pop()
+            if last != key:
+                column[row] = item
+
+    def column(self, name):
+        """Return a copy of the column of name as a NumPy array.
+
+        String attributes are returned as their codes into labels.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+            ValueError: If name is not a column.
+        """
+        self.__require(name)
+        return numpy.array(self.columns[name])
+
+    def aggregate(self, name, function="mean", by=None):
+        """Return an aggregate of the numbers of a numeric attribute.
+
+        Values that are not numbers are left out. Without by, a single
+        number is returned, None if there is none to aggregate but for
+        count. With by, a dictionary of the aggregate for each value of
+        that attribute is returned.
+
+        Args:
+            name (str): The numeric attribute to aggregate.
+            function (str): One of count, sum, mean, min, max and std.
+            by (str): The attribute to group by, if any.
+        Raises:
+            ImportError: If NumPy is not installed.
+            ValueError: If an attribute is not a column, name is not
+                numeric or function is unknown.
+        """
+        self.__require(name)
+        if self.types[name] is str:
+            raise ValueError("{} is not numeric".format(name))
+        if function not in self.functions:
+            raise ValueError("unknown function: {}".format(function))
+        values = numpy.array(self.columns[name])
+        if by is None:
+            values = values[~numpy.isnan(values)]
+            if function == "count":
+                return len(values)
+            if len(values) == 0:
+                return None
+            return getattr(numpy, function)(values).item()
+        groups, labels = self.__groups(by)
+        keep = ~numpy.isnan(values) & (groups >= 0)
+        values, groups = values[keep], groups[keep]
+        counts = numpy.bincount(groups, minlength=len(labels))
+        if function == "count":
+            result = counts
+        elif function in ("sum", "mean", "std"):
+            result = numpy.bincount(groups, values, len(labels))
+            if function != "sum":
+                result = result / numpy.maximum(counts, 1)
+            if function == "std":
+                deviations = (values - result[groups]) ** 2
+                result = numpy.sqrt(numpy.bincount(
+                    groups, deviations, len(labels)) /
+                    numpy.maximum(counts, 1))
+        else:
+            start = numpy.inf if function == "min" else -numpy.inf
+            result = numpy.full(len(labels), start)
+            getattr(numpy, function + "imum").at(result, groups, values)
+        return {label: item for label, item, count in zip(
+            labels, result.tolist(), counts.tolist()) if count}
+
+    def counts(self, name):
+        """Return the number of rows holding each value of an attribute.
+
+        Values that are neither numbers nor strings are left out.
+
+        Args:
+            name (str): The attribute to count the values of.
+        Raises:
+            ImportError: If NumPy is not installed.
+            ValueError: If name is not a column.
+        """
+        self.__require(name)
+        groups, labels = self.__groups(name)
+        counts = numpy.bincount(groups[groups >= 0], minlength=len(labels))
+        return {label: count for label, count in zip(
+            labels, counts.tolist()) if count}
+
+    def __require(self, name):
+        """Raise an error if NumPy is missing or name is not a column."""
+        if numpy is None:
+            raise ImportError("numpy is required for column aggregates")
+        if name not in self.columns:
+            raise ValueError("{} is not a column".format(name))
+
+    def __groups(self, name):
+        """Return the group of each row by name and the value of each.
+
+        Rows whose value is neither a number nor a string are in group -1.
+        """
+        self.__require(name)
+        if self.types[name] is str:
+            return numpy.array(self.columns[name]), self.labels[name]
+        values = numpy.array(self.columns[name])
+        known = ~numpy.isnan(values)
+        labels, inverse = numpy.unique(values[known], return_inverse=True)
+        groups = numpy.full(len(values), -1, dtype=numpy.int64)
+        groups[known] = inverse.ravel()
+        labels = labels.tolist()
+        if self.types[name] is int:
+            labels = [int(v) if v.is_integer() else v for v in labels]
+        return groups, labels
+
+    def __encode(self, name, item):
+        """Return the column entry of item for the attribute name."""
+        if self.types[name] is not str:
+            if isinstance(item, (int, float)):
+                return float(item)
+            return float("nan")
+        if type(item) is not str:
+            return -1
+        code = self.codes[name].get(item)
+        if code is None:
+            code = len(self.labels[name])
+            self.codes[name][item] = code
+            self.labels[name].append(item)
+        return code
@@ -0,0 +1,155 @@
+#!/usr/bin/python3
+"""Defines the DBStorage class."""
+import json
+import sqlite3
+import threading
+from os import getenv
+from models.base_model import BaseModel
+from models.engine.file_storage import FileStorage
+
+
+class DBStorage(FileStorage):
+    """Represent a SQLite storage engine.
+
+    Objects are kept in memory exactly as by FileStorage, only saving and
+    reloading differ: each registered model class has its own table, with
+    one column per class attribute, and save() upserts or deletes the
+    changed rows only.
+
+    Attributes:
+        __db_path (str): The name of the SQLite database file
+            (HBNB_DB_PATH).
+        __connection (sqlite3.Connection): The open database connection.
+        __tables (set): The names of the classes whose table exists in
+            the open database.
+        __write_lock (threading.Lock): Held by save(), the connection
+            being shared by every thread.
+    """
+    __db_path = getenv("HBNB_DB_PATH", "hbnb.db")
+    __connection = None
+    __tables = set()
+    __write_lock = threading.Lock()
+
+    def save(self):
+        """Write the rows of the objects changed since the last save.
+
+        Changed objects are upserted and deleted ones removed, all in a
+        single transaction. Nothing is done inside a batch().
+        """
+        if self.batching():
+            return
+        with DBStorage.__write_lock:
+            db = self.__connect()
+            with db:
+                for key in self.changes():
+                    cls_name, obj_id = key.split(".", 1)
+                    obj = self.get(cls_name, obj_id)
+                    if obj is None:
+                        db.execute('DELETE FROM "{}" WHERE id = ?'.format(
+                            cls_name), (obj_id,))
+                    else:
+                        self.__upsert(db, obj_id, obj)
+
+    def convert(self, fmt):
+        """Refuse to convert: rows are kept in SQLite, not in a snapshot.
+
+        Raises:
+            ValueError: Always, as for an unknown format.
+        """
+        raise ValueError("the database has no snapshot format")
+
+    def refresh(self):
+        """Do nothing: SQLite keeps writers apart, and rows saved by
+        other processes are read by reload() only."""
+
+    def reload(self):
+        """Load the rows of every table to __objects."""
+        db = self.__connect()
+        for cls in BaseModel.classes.values():
+            columns = self.__columns(cls)
+            query = 'SELECT id, crea_at, upd_at, {}extra FROM "{}"'.format(
+                "".join('"{}", '.format(c) for c in columns), cls.__name__)
+            for row in db.execute(query):
+                kwargs = {"id": row[0], "crea_at": row[1], "upd_at": row[2]}
+                for col, value in zip(columns, row[3:-1]):
+                    if value is None:
+                        continue
+                    if type(columns[col]) is list:
+                        value = json.loads(value)
+                    kwargs[col] = value
+                kwargs.update(json.loads(row[-1]))
+                self.new(cls(**kwargs))
+        self.changes()
+
+    def __connect(self):
+        """Return the database connection, opened on first use.
+
+        The database is switched to WAL mode when opened, and the tables
+        of the classes registered since are created.
+        """
+        if DBStorage.__connection is None:
+            db = sqlite3.connect(DBStorage.__db_path,
+                                 check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            DBStorage.__connection = db
+            DBStorage.__tables = set()
+        db = DBStorage.__connection
+        if not DBStorage.__tables.issuperset(BaseModel.classes):
+            with db:
+                for name, cls in list(BaseModel.classes.items()):
+                    if name in DBStorage.__tables:
+                        continue
+                    columns = self.__columns(cls)
+                    db.execute(
+                        'CREATE TABLE IF NOT EXISTS "{}" ('
+                        'id TEXT PRIMARY KEY, crea_at TEXT, upd_at TEXT, '
+                        '{}extra TEXT)'.format(name, "".join(
+                            '"{}" {}, '.format(c, self.__sqltype(v))
+                            for c, v in columns.items())))
+                    DBStorage.__tables.add(name)
+        return db
+
+    def __upsert(self, db, obj_id, obj):
+        """Insert the row of obj, or update it if obj_id is already there.
+
+        Attributes whose value does not match the type of the class
+        attribute, and those the class does not declare, go to extra.
+        """
+        columns = self.__columns(obj.__class__)
+        odict = obj.to_dict()
+        del odict["__class__"]
+        del odict["id"]
+        values = [obj_id, odict.pop("crea_at"), odict.pop("upd_at")]
+        for col, default in columns.items():
+            value = odict.get(col)
+            if value is None or type(value) is not type(default):
+                values.append(None)
+                continue
+            del odict[col]
+            if type(default) is list:
+                value = json.dumps(value)
+            values.append(value)
+        values.append(json.dumps(odict))
+        names = ["id", "crea_at", "upd_at"] + list(columns) + ["extra"]
+        db.execute(
+            'INSERT INTO "{}" ({}) VALUES ({}) ON CONFLICT(id) DO UPDATE '
+            'SET {}'.format(
+                obj.__class__.__name__,
+                ", ".join('"{}"'.format(n) for n in names),
+                ", ".join("?" * len(names)),
+                ", ".join('"{0}" = excluded."{0}"'.format(n)
+                          for n in names[1:])),
+            values)
+
+    @staticmethod
+    def __columns(cls):
+        """Return the class attributes of cls, by name, in order."""
+        return {k: v for k, v in cls.__dict__.items()
+                if type(v) in {str, int, float, list} and
+                not k.startswith("_")}
+
+    @staticmethod
+    def __sqltype(default):
+        """Return the SQLite column type for the class attribute default."""
+        return {int: "INTEGER", float: "REAL"}.get(type(default), "TEXT")
@@ -0,0 +1,124 @@
+#!/usr/bin/python3
+"""Defines the FileLock class.
+
+fcntl is only available on POSIX systems: elsewhere holding the lock
+does nothing, and only the generations it keeps are shared.
+"""
+import struct
+import threading
+from contextlib import contextmanager
+from os import O_CREAT
+from os import O_RDWR
+from os import close
+from os import lseek
+from os import open as os_open
+from os import read
+from os import write
+from os import SEEK_SET
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+COUNTERS = struct.Struct("<qq")
+
+
+class FileLock:
+    """Represent an advisory lock file shared by the processes of a store.
+
+    The file holds two generations, bumped by writers holding the lock
+    exclusively: the one of the store, by every write, and the one of
+    the snapshot, each time it is replaced.
+
+    The lock is taken on a descriptor of its own by each thread, so the
+    threads of a process exclude each other like processes do.
+
+    Attributes:
+        name (str): The name of the lock file.
+        local (threading.local): The open descriptor and the modes held,
+            innermost last, of the current thread.
+    """
+
+    def __init__(self, name):
+        """Initialize a new FileLock.
+
+        Args:
+            name (str): The name of the lock file, created on first use.
+        """
+        self.name = name
+        self.local = threading.local()
+
+    @contextmanager
+    def hold(self, exclusive=True):
+        """Return a context holding the lock, shared or exclusive.
+
+        Holds nest: an exclusive hold inside a shared one upgrades the
+        lock until it ends. The upgrade is not atomic, another process
+        may write in between.
+
+        Args:
+            exclusive (bool): If False, only hold the lock shared.
+        """
+        modes = getattr(self.local, "modes", None)
+        if not modes:
+            modes = self.local.modes = []
+            self.local.fd = os_open(self.name, O_RDWR | O_CREAT, 0o644)
+        outer = modes[-1] if modes else None
+        mode = exclusive or outer is True
+        try:
+            if mode != outer:
+                self.__flock(mode)
+            modes.append(mode)
+        except BaseException:
+            if not modes:
+                self.__release()
+            raise
+        try:
+            yield self
+        finally:
+            modes.pop()
+            if not modes:
+                self.__release()
+            elif modes[-1] != mode:
+                self.__flock(modes[-1])
+
+    def held(self):
+        """Return True if the current thread holds the lock."""
+        return bool(getattr(self.local, "modes", None))
+
+    def read(self):
+        """Return the generations of the store and of the snapshot.
+
+        The lock must be held.
+        """
+        fd = self.local.fd
+        lseek(fd, 0, SEEK_SET)
+        data = read(fd, COUNTERS.size)
+        if len(data) < COUNTERS.size:
+            return 0, 0
+        return COUNTERS.unpack(data)
+
+    def bump(self, snapshot=False):
+        """Count a write, returning the generations before and after.
+
+        The lock must be held exclusively.
+
+        Args:
+            snapshot (bool): If True, the snapshot was replaced too.
+        """
+        before = self.read()
+        after = (before[0] + 1, before[1] + (1 if snapshot else 0))
+        lseek(self.local.fd, 0, SEEK_SET)
+        write(self.local.fd, COUNTERS.pack(*after))
+        return before, after
+
+    def __flock(self, exclusive):
+        """Lock the descriptor of the thread, exclusive or shared."""
+        if fcntl is not None:
+            fcntl.flock(self.local.fd,
+                        fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+    def __release(self):
+        """Close the descriptor of the thread, releasing its lock."""
+        close(self.local.fd)
+        self.local.fd = None
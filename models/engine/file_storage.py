@@ -1,13 +1,57 @@
 #!/usr/bin/python3
 """Defines the FileStorage class."""
+import asyncio
+import atexit
+import heapq
 import json
+import operator
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from contextlib import nullcontext
+from os import close
+from os import fsync
+from os import getenv
+from os import link
+from os import open as os_open
+from os import path
+from os import remove
+from os import replace
+from os import O_RDONLY
+from shutil import copyfile
+from itertools import chain
+from itertools import islice
 from models.base_model import BaseModel
-from models.user import User
-from models.state import State
-from models.city import City
-from models.place import Place
-from models.amenity import Amenity
-from models.review import Review
+from models.engine import binary_stream
+from models.engine import json_stream
+from models.engine.columns import ColumnStore
+from models.engine.file_lock import FileLock
+from models.engine.index import GridIndex
+from models.engine.index import HashIndex
+from models.engine.index import SortedIndex
+from models.engine.offset_index import OffsetIndex
+from models.engine.record import Record
+from models.engine.rw_lock import ReadWriteLock
+
+
+class ConflictError(Exception):
+    """Represent changes given up because another process saved first.
+
+    Attributes:
+        keys (list): The keys whose change was given up; they now hold
+            what the other process saved.
+    """
+
+    def __init__(self, keys):
+        """Initialize a new ConflictError.
+
+        Args:
+            keys (list): The keys whose change was given up.
+        """
+        super().__init__("changed by another process: {}".format(
+            ", ".join(keys)))
+        self.keys = keys
 
 
 class FileStorage:
@@ -16,34 +60,1801 @@ class FileStorage:
     Attributes:
         __file_path (str): The name of the file to save objects to.
         __objects (dict): A dictionary of instantiated objects.
+        __journal_path (str): The name of the append-only mutation log.
+        __journaling (bool): If True, save() appends one record per
+            changed key to __journal_path instead of rewriting
+            __file_path (set HBNB_FS_JOURNAL=1 to enable).
+        __pending (set): Keys put or deleted since the last save.
+        __cache (dict): The object and the last JSON encoding of its
+            to_dict(), by id() of the object, dropped whenever the object
+            changes or stops being stored.
+        __lazy (bool): If True, reload() only keeps the records read and
+            an object is built the first time it is asked for
+            (set HBNB_FS_LAZY=1 to enable).
+        __raw (dict): The records not built into objects yet, by key.
+        __rejected (dict): The records read from disk that could not be
+            stored, a bad timestamp or an unknown class in them, by key.
+            They are written back as they were by every snapshot.
+        __compact (bool): If True, reload() keeps records lazily, as
+            compact Record instances instead of dicts, whose encoding is
+            not cached either (set HBNB_FS_COMPACT=1 to enable).
+        __buckets (dict): The keys of each class, built or lazy, by class
+            name; each bucket is a dict used as an ordered set, kept
+            current by every change to what is stored.
+        __indexes (dict): The secondary indexes of each class name, by
+            attribute and index class, built on first use and then kept
+            current.
+        __operators (dict): The comparison functions of where(), by
+            operator.
+        __sorted (dict): The numeric attributes of each class name that
+            where() keeps sorted indexes of, each built on the first
+            range query or ordering on it.
+        __spatial (dict): The (latitude, longitude) attributes of each
+            class name that near() and within() keep a grid index of.
+        __compact_bytes (int): The journal size, in bytes, below which
+            it is never compacted (HBNB_FS_COMPACT_BYTES).
+        __compact_ratio (float): The journal to snapshot size ratio
+            above which it is compacted (HBNB_FS_COMPACT_RATIO).
+        __compactor (threading.Thread): The running compaction, if any.
+        __compact_lock (threading.Lock): Guards the start of a compaction.
+        __compact_stats (dict): Totals and last run figures of compact().
+        __batches (threading.local): Its depth is the number of batch()
+            blocks the current thread is running.
+        __durability (str): When save() writes: "none" at once, "fsync"
+            at once and forced to disk, "group" from a background thread
+            every __flush_interval or __flush_count changes, "exit" only
+            on sync() and at exit (HBNB_FS_DURABILITY).
+        __flush_interval (float): The seconds between two group writes
+            (HBNB_FS_FLUSH_MS, in milliseconds).
+        __flush_count (int): The number of pending keys that wakes the
+            flusher early (HBNB_FS_FLUSH_COUNT).
+        __flusher (threading.Thread): The running group flusher, if any;
+            set it to None and set __wake to stop it.
+        __wake (threading.Event): Set to wake the flusher up early.
+        __dirty (bool): True if save() was called since the last write.
+        __lock (ReadWriteLock): Held exclusive by changes to what is
+            stored, so the flusher never sees a change half done, and
+            shared by reads in threaded mode.
+        __threaded (bool): If True, reads hold __lock shared, so threads
+            can read while others change objects (set HBNB_FS_THREADED=1
+            to enable).
+        __unlocked (nullcontext): What reads hold outside threaded mode.
+        __write_lock (threading.RLock): Held while the files are written,
+            so saves are written one at a time and in order. A save only
+            holds __lock to copy what it writes.
+        __build_lock (threading.RLock): Held by reads building what is
+            kept lazily: buckets, indexes, and the objects of lazy and
+            mapped records.
+        __view (dict): The copy of __objects returned by all(), dropped
+            whenever __objects changes.
+        __viewed (dict): The __objects dict __view was copied from.
+        __exit_hook (bool): True once sync() is registered to run at exit.
+        __backups (int): The number of previous snapshots kept, the
+            newest as __file_path.bak.1 (HBNB_FS_BACKUPS).
+        __formats (dict): The serializer module of each snapshot format,
+            providing encode(), dump_items(), load_items() and BINARY,
+            and MAGIC for a binary one.
+        __format (str): The format snapshots are written in, json or
+            binary (HBNB_FS_FORMAT); any of them is read back.
+        __index_path (str): The name of the offset index of __file_path.
+        __mapped (bool): If True, every snapshot is written with its
+            offset index and reload() only maps both, records being read
+            from the snapshot as they are asked for (set HBNB_FS_MAPPED=1
+            to enable).
+        __map (OffsetIndex): The mapped snapshot, if any.
+        __deleted (set): The keys of the mapped snapshot deleted since.
+        __merged (set): The class names whose mapped keys were added to
+            __buckets.
+        __shared (bool): If True, several processes may use the files
+            at once: writes hold __file_lock and first merge what others
+            wrote, objects changed on both sides raising ConflictError
+            (set HBNB_FS_SHARED=1 to enable).
+        __file_lock (FileLock): The lock file of the store, which counts
+            the writes.
+        __generations (tuple): The generations of __file_lock the store
+            is up to date with.
+        __journal_seen (int): The size of __journal_path read so far.
+        __versions (dict): The upd_at of each key as last read from or
+            written to disk, "" if it has none, in shared mode.
+        __conflicts (dict): The records saved by another process of the
+            keys also changed here, None if deleted, by key.
+        __touched (set): The keys changed here, in shared mode, by an
+            attribute assignment or the insert() of another record, since
+            last written; their upd_at may not have changed.
+        __removed (dict): The objects deleted here, in shared mode, since
+            last written, by key.
+        __saver (asyncio.Task): The task running the writes asked for by
+            asave(), if any.
+        __next_save (asyncio.Future): Awaited by the asave() calls made
+            since the running write began, all served by the next one.
+        __chunk (int): The number of objects aiter() fetches at once.
     """
     __file_path = "file.json"
     __objects = {}
+    __journal_path = "file.json.log"
+    __journaling = getenv("HBNB_FS_JOURNAL") == "1"
+    __pending = set()
+    __cache = {}
+    __lazy = getenv("HBNB_FS_LAZY") == "1"
+    __raw = {}
+    __rejected = {}
+    __compact = getenv("HBNB_FS_COMPACT") == "1"
+    __buckets = {}
+    __indexes = {}
+    __operators = {
+        "==": operator.eq,
+        "!=": operator.ne,
+        "<": operator.lt,
+        "<=": operator.le,
+        ">": operator.gt,
+        ">=": operator.ge
+    }
+    __sorted = {
+        "Place": ("priceByNight", "maxGuest", "roomNumber",
+                  "bathroomsNumber", "lati", "long")
+    }
+    __spatial = {"Place": ("lati", "long")}
+    __compact_bytes = int(getenv("HBNB_FS_COMPACT_BYTES", 1 << 20))
+    __compact_ratio = float(getenv("HBNB_FS_COMPACT_RATIO", 1.0))
+    __compactor = None
+    __compact_lock = threading.Lock()
+    __batches = threading.local()
+    __durability = getenv("HBNB_FS_DURABILITY", "none")
+    __flush_interval = int(getenv("HBNB_FS_FLUSH_MS", 100)) / 1000
+    __flush_count = int(getenv("HBNB_FS_FLUSH_COUNT", 1000))
+    __flusher = None
+    __wake = threading.Event()
+    __dirty = False
+    __lock = ReadWriteLock()
+    __threaded = getenv("HBNB_FS_THREADED") == "1"
+    __unlocked = nullcontext()
+    __write_lock = threading.RLock()
+    __build_lock = threading.RLock()
+    __view = None
+    __viewed = None
+    __exit_hook = False
+    __backups = int(getenv("HBNB_FS_BACKUPS", 0))
+    __formats = {"json": json_stream, "binary": binary_stream}
+    __format = getenv("HBNB_FS_FORMAT", "json")
+    __index_path = "file.json.idx"
+    __mapped = getenv("HBNB_FS_MAPPED") == "1"
+    __map = None
+    __deleted = set()
+    __merged = set()
+    __shared = getenv("HBNB_FS_SHARED") == "1"
+    __file_lock = FileLock("file.json.lock")
+    __generations = None
+    __journal_seen = 0
+    __versions = {}
+    __conflicts = {}
+    __touched = set()
+    __removed = {}
+    __saver = None
+    __next_save = None
+    __chunk = 256
+    __compact_stats = {
+        "runs": 0,
+        "records_folded": 0,
+        "bytes_reclaimed": 0,
+        "duration": 0.0,
+        "last_records_folded": 0,
+        "last_bytes_reclaimed": 0,
+        "last_duration": 0.0
+    }
+
+    def all(self, cls=None):
+        """Return a copy of __objects, or the objects of class cls.
+
+        Lazy and mapped records are built first. The copy is shared by
+        the callers until __objects changes, so it must not be changed;
+        use new() and delete() instead. With cls, only the keys of that
+        class are visited and a new dictionary is returned.
+
+        Args:
+            cls (type or str): The class, or class name, to return.
+        """
+        with self.__reading():
+            if cls is None:
+                for key in list(self.__mapped_keys()):
+                    if not self.__in_memory(key):
+                        self.__fault(key)
+                for key in list(FileStorage.__raw):
+                    self.__materialize(key)
+                view = FileStorage.__view
+                if (view is None or
+                        FileStorage.__viewed is not FileStorage.__objects):
+                    view = dict(FileStorage.__objects)
+                    FileStorage.__viewed = FileStorage.__objects
+                    FileStorage.__view = view
+                return view
+            if type(cls) is not str:
+                cls = cls.__name__
+            objs = {}
+            for key in list(self.__class_keys(cls)):
+                objs[key] = self.__fetch(key)
+            return objs
+
+    def records(self, cls=None):
+        """Yield the to_dict() dictionary of every object, or of class cls.
+
+        Lazy records are not built, nor mapped records loaded, so a
+        whole class can be streamed out without holding all of its
+        objects.
+
+        Args:
+            cls (type or str): The class, or class name, to yield.
+        """
+        for key in self.__keys_of(cls):
+            with self.__reading():
+                obj = FileStorage.__objects.get(key)
+                o = FileStorage.__raw.get(key)
+                if obj is not None:
+                    o = obj.to_dict()
+                elif o is not None:
+                    o = o.to_dict() if type(o) is Record else dict(o)
+                elif self.__stored(key):
+                    o = FileStorage.__map.get(key)
+            if o is not None:
+                yield o
+
+    def count(self, cls=None):
+        """Return the number of objects stored, or of class cls.
+
+        Args:
+            cls (type or str): The class, or class name, to count.
+        """
+        with self.__reading():
+            if cls is None:
+                return (len(FileStorage.__objects) +
+                        len(FileStorage.__raw) +
+                        sum(1 for key in self.__mapped_keys()
+                            if not self.__in_memory(key)))
+            if type(cls) is not str:
+                cls = cls.__name__
+            return len(self.__class_keys(cls))
+
+    def get(self, cls, obj_id):
+        """Return the object of class cls with id obj_id, or None.
+
+        Args:
+            cls (type or str): The class, or class name, of the object.
+            obj_id (str): The id of the object.
+        """
+        if type(cls) is not str:
+            cls = cls.__name__
+        key = "{}.{}".format(cls, obj_id)
+        with self.__reading():
+            if not self.__stored(key):
+                return None
+            return self.__fetch(key)
+
+    def lookup(self, cls, attr, value):
+        """Return the objects of class cls whose attribute attr is value.
+
+        The first lookup of an attribute builds an index of it, kept
+        current by new(), delete() and attribute assignments.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            attr (str): The name of the attribute.
+            value (any): The value to look for.
+        """
+        if type(cls) is not str:
+            cls = cls.__name__
+        with self.__reading():
+            index = self.__index(cls, attr, HashIndex)
+            return [self.__fetch(key) for key in index.lookup(value)]
+
+    def where(self, cls, conditions=(), order_by=None, limit=None,
+              reverse=False):
+        """Iterate over the objects of class cls matching all conditions.
+
+        Candidates come from an existing index on one of the conditions,
+        from a sorted index when a condition bounds or order_by names an
+        attribute of __sorted, or else from a single pass over the class.
+        Conditions are checked on the stored values, so lazy records that
+        do not match are never built, and objects are yielded as they are
+        found unless they must be sorted first.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            conditions (iterable): (attribute, operator, value) triples,
+                the operator being one of ==, !=, <, <=, >, >=.
+            order_by (str): The attribute to sort the objects by, if any.
+            limit (int): The maximum number of objects, if any.
+            reverse (bool): If True, sort in descending order.
+        Raises:
+            ValueError: If an operator is unknown.
+        """
+        if type(cls) is not str:
+            cls = cls.__name__
+        checks = []
+        for attr, op, value in conditions:
+            if op not in FileStorage.__operators:
+                raise ValueError("unknown operator: {}".format(op))
+            checks.append((attr, FileStorage.__operators[op], value))
+        return self.__where(cls, conditions, checks, order_by, limit,
+                            reverse)
+
+    def explain(self, cls, conditions=(), order_by=None):
+        """Return how where() would find the candidates of conditions.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            conditions (iterable): (attribute, operator, value) triples.
+            order_by (str): The attribute to sort the objects by, if any.
+        """
+        if type(cls) is not str:
+            cls = cls.__name__
+        with self.__reading():
+            return self.__plan(cls, list(conditions), order_by, False)[0]
 
-    def all(self):
-        """Return the dictionary __objects."""
-        return FileStorage.__objects
+    def near(self, cls, lat, lon, km, limit=None):
+        """Return the objects of class cls within km of a point.
+
+        The objects are sorted nearest first. The first spatial query of
+        a class builds a grid index of its coordinates, kept current by
+        new(), delete() and attribute assignments.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            lat (float): The latitude of the point.
+            lon (float): The longitude of the point.
+            km (float): The distance, in kilometres.
+            limit (int): The maximum number of objects, if any.
+        Raises:
+            ValueError: If cls has no coordinates.
+        """
+        with self.__reading():
+            keys = self.__grid(cls).radius(lat, lon, km)
+            return [self.__fetch(key) for key in keys[:limit]]
+
+    def within(self, cls, south, west, north, east):
+        """Return the objects of class cls within a box of coordinates.
+
+        A box whose west edge is greater than its east edge crosses the
+        antimeridian.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            south (float): The southern latitude.
+            west (float): The western longitude.
+            north (float): The northern latitude.
+            east (float): The eastern longitude.
+        Raises:
+            ValueError: If cls has no coordinates.
+        """
+        with self.__reading():
+            keys = list(self.__grid(cls).bbox(south, west, north, east))
+            return [self.__fetch(key) for key in keys]
+
+    def columns(self, cls):
+        """Return the column store of the objects of class cls.
+
+        Its columns are the str, int and float class attributes of cls.
+        The first call builds it from the stored keys, then new(),
+        delete() and attribute assignments keep it current.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+        """
+        if type(cls) is str:
+            cls = BaseModel.classes[cls]
+        defaults = {k: v for k, v in cls.__dict__.items()
+                    if type(v) in {str, int, float} and
+                    not k.startswith("_")}
+        with self.__reading():
+            return self.__index(cls.__name__, tuple(defaults),
+                                ColumnStore, defaults)
+
+    def rejected(self):
+        """Return a copy of the records reload() could not store, by key.
+
+        Each one is kept out of the store but written back as it was, so
+        it can be fixed by hand; storing a new object under its key drops
+        it.
+        """
+        with self.__reading():
+            return {key: dict(o) for key, o in FileStorage.__rejected.items()}
 
     def new(self, obj):
         """Set in __objects obj with key <obj_class_name>.id"""
         ocname = obj.__class__.__name__
-        FileStorage.__objects["{}.{}".format(ocname, obj.id)] = obj
+        key = "{}.{}".format(ocname, obj.id)
+        with FileStorage.__lock.hold():
+            self.__forget(key)
+            FileStorage.__raw.pop(key, None)
+            FileStorage.__rejected.pop(key, None)
+            FileStorage.__deleted.discard(key)
+            FileStorage.__objects[key] = obj
+            FileStorage.__view = None
+            self.__bucket(ocname)[key] = None
+            self.__reindex(key)
+            FileStorage.__pending.add(key)
+            FileStorage.__cache.pop(id(obj), None)
+
+    def insert(self, o):
+        """Store the record o, as returned by to_dict(), to be saved.
+
+        The record is stored as reload() does: kept as is in lazy and
+        compact mode, so inserting many records builds no objects.
+
+        Args:
+            o (dict): The record, with its __class__ and id.
+        """
+        key = "{}.{}".format(o["__class__"], o["id"])
+        with FileStorage.__lock.hold():
+            if FileStorage.__shared and self.__differs(key, o):
+                FileStorage.__touched.add(key)
+            self.__load(key, dict(o))
+            FileStorage.__pending.add(key)
+
+    def delete(self, obj):
+        """Remove obj from __objects if it is stored there."""
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        with FileStorage.__lock.hold():
+            if FileStorage.__objects.get(key) is obj:
+                del FileStorage.__objects[key]
+                FileStorage.__view = None
+                if FileStorage.__shared:
+                    FileStorage.__removed.setdefault(key, obj)
+                if FileStorage.__map is not None:
+                    FileStorage.__deleted.add(key)
+                self.__bucket(obj.__class__.__name__).pop(key, None)
+                self.__reindex(key)
+                FileStorage.__pending.add(key)
+                FileStorage.__cache.pop(id(obj), None)
+
+    def clear(self):
+        """Forget every object and record stored, in memory only.
+
+        The files are left as they are: reload() reads them back, while
+        the next save() writes the store empty.
+        """
+        with FileStorage.__lock.hold():
+            self.__unmap()
+            FileStorage.__objects = {}
+            FileStorage.__raw = {}
+            FileStorage.__rejected = {}
+            FileStorage.__pending = set()
+            FileStorage.__cache = {}
+            FileStorage.__view = None
+            FileStorage.__versions = {}
+            FileStorage.__conflicts = {}
+            FileStorage.__touched = set()
+            FileStorage.__removed = {}
+            self.__rebuild()
+
+    def mark_dirty(self, obj):
+        """Flag obj as changed so its next save re-serializes it.
+
+        Called by BaseModel on every attribute assignment; in-place
+        changes to mutable attributes are not seen.
+        """
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        if FileStorage.__objects.get(key) is not obj:
+            FileStorage.__cache.pop(id(obj), None)
+            return
+        with FileStorage.__lock.hold():
+            FileStorage.__cache.pop(id(obj), None)
+            if FileStorage.__objects.get(key) is obj:
+                FileStorage.__pending.add(key)
+                if FileStorage.__shared:
+                    FileStorage.__touched.add(key)
+                self.__reindex(key)
+
+    @contextmanager
+    def batch(self):
+        """Return a context in which save() is put off to its end.
+
+        Objects created, updated and deleted in the block are saved
+        together, once, when the outermost batch ends, even if it ends
+        with an exception. Only the saves of the thread running the
+        block are put off; other threads keep saving.
+        """
+        depth = getattr(FileStorage.__batches, "depth", 0)
+        FileStorage.__batches.depth = depth + 1
+        try:
+            yield self
+        finally:
+            FileStorage.__batches.depth = depth
+            if depth == 0 and FileStorage.__pending:
+                self.save()
+
+    def batching(self):
+        """Return True inside a batch() of the current thread, where
+        save() does nothing."""
+        return getattr(FileStorage.__batches, "depth", 0) > 0
 
     def save(self):
-        """Serialize __objects to the JSON file __file_path."""
-        odict = FileStorage.__objects
-        objdict = {obj: odict[obj].to_dict() for obj in odict.keys()}
-        with open(FileStorage.__file_path, "w") as f:
-            json.dump(objdict, f)
+        """Serialize __objects to the JSON file __file_path.
+
+        Records are written one at a time as they are encoded. Only
+        objects changed since their last save are encoded again, the
+        others reuse their cached JSON. In journal mode only the keys
+        changed since the last save are appended to __journal_path, which
+        is compacted in the background once it outgrows the thresholds.
+        Nothing is done inside a batch(). In group and exit durability
+        the write is only put off, see sync().
+
+        Raises:
+            ConflictError: In shared mode, if another process saved some
+                of the objects changed here first.
+        """
+        if self.batching():
+            return
+        if FileStorage.__durability not in ("group", "exit"):
+            self.__write(FileStorage.__durability == "fsync")
+            return
+        FileStorage.__dirty = True
+        if not FileStorage.__exit_hook:
+            atexit.register(self.sync)
+            FileStorage.__exit_hook = True
+        if FileStorage.__durability == "group":
+            flusher = FileStorage.__flusher
+            if flusher is None or not flusher.is_alive():
+                flusher = threading.Thread(target=self.__flush_loop,
+                                           daemon=True)
+                FileStorage.__flusher = flusher
+                FileStorage.__wake.clear()
+                flusher.start()
+            if len(FileStorage.__pending) >= FileStorage.__flush_count:
+                FileStorage.__wake.set()
+
+    def sync(self):
+        """Write what save() has put off, if anything, forced to disk.
+
+        In group and exit durability, save() only flags the store dirty;
+        sync() is run by the console on quit and at interpreter exit.
+        """
+        if FileStorage.__dirty:
+            self.__write(True)
+
+    def convert(self, fmt):
+        """Write the snapshot again in the format fmt, kept for next saves.
+
+        The whole store is written out, the journal folded in if any.
+
+        Args:
+            fmt (str): The name of the format, json or binary.
+        Raises:
+            ValueError: If the format is unknown.
+            ConflictError: As save() does.
+        """
+        if fmt not in FileStorage.__formats:
+            raise ValueError("unknown format: {}".format(fmt))
+        compactor = FileStorage.__compactor
+        if compactor is not None:
+            compactor.join()
+        with FileStorage.__write_lock, self.__locked(True), \
+                FileStorage.__lock.hold():
+            conflicts = self.__resolve()
+            FileStorage.__format = fmt
+            FileStorage.__cache.clear()
+            FileStorage.__dirty = False
+            written = self.changes()
+            if FileStorage.__shared:
+                self.__written(written)
+            self.__write_snapshot(self.__entries(), True)
+        if conflicts:
+            raise ConflictError(conflicts)
+
+    def refresh(self):
+        """Bring the store up to date with what other processes saved.
+
+        Only the records they changed are read again, from the end of
+        the journal if they only appended to it. Nothing is done unless
+        in shared mode. Objects also changed here are kept until saved.
+        """
+        if not FileStorage.__shared:
+            return
+        with FileStorage.__write_lock, self.__locked(False), \
+                FileStorage.__lock.hold():
+            self.__catch_up()
 
     def reload(self):
-        """Deserialize the JSON file __file_path to __objects, if it exists."""
-        try:
-            with open(FileStorage.__file_path) as f:
-                objdict = json.load(f)
-                for o in objdict.values():
-                    cls_name = o["__class__"]
-                    del o["__class__"]
-                    self.new(eval(cls_name)(**o))
+        """Deserialize the snapshot __file_path to __objects, if it exists.
+
+        Each record is stored as soon as it is parsed from the file.
+        The journal being compacted, then the live journal, are replayed
+        on top of the snapshot. In lazy mode records are only indexed by
+        key, objects are built by get() and all().
+
+        A torn snapshot is moved aside to __file_path.torn and the newest
+        whole backup is restored in its place; without one, the records
+        before the tear are kept, and written by the next save. A record
+        that cannot be stored is set aside, see rejected().
+
+        In mapped mode the snapshot and its offset index are only mapped.
+        If the index is missing or stale, the snapshot is loaded instead
+        and written again with a fresh index.
+
+        In group and exit durability, what save() has put off is written
+        first, as sync() does, so that it is read back rather than lost.
+        """
+        self.sync()
+        with FileStorage.__write_lock, self.__locked(False), \
+                FileStorage.__lock.hold():
+            if FileStorage.__shared:
+                FileStorage.__generations = FileStorage.__file_lock.read()
+            FileStorage.__versions = {}
+            FileStorage.__conflicts = {}
+            FileStorage.__touched = set()
+            FileStorage.__removed = {}
+            FileStorage.__journal_seen = 0
+            FileStorage.__rejected = {}
+            if FileStorage.__map is not None:
+                self.__rebuild()
+            self.__unmap()
+            salvaged = ()
+            if not (FileStorage.__mapped and self.__map_snapshot()):
+                salvaged = self.__load_snapshot()
+            for log in (FileStorage.__journal_path + ".1",
+                        FileStorage.__journal_path):
+                for end, record in self.__read_journal(log):
+                    if record[0] == "put":
+                        self.__load_checked(record[1], record[2])
+                    else:
+                        self.__unload(record[1])
+                        FileStorage.__versions.pop(record[1], None)
+                    if log == FileStorage.__journal_path:
+                        FileStorage.__journal_seen = end
+            FileStorage.__pending.clear()
+            FileStorage.__pending.update(salvaged)
+            if (FileStorage.__mapped and FileStorage.__map is None and
+                    path.exists(FileStorage.__file_path)):
+                with self.__locked(True):
+                    self.__catch_up()
+                    self.__write_snapshot(self.__entries(), False)
+
+    def changes(self):
+        """Return and forget the keys put or deleted since the last save."""
+        with FileStorage.__lock.hold():
+            pending = FileStorage.__pending
+            FileStorage.__pending = set()
+            return pending
+
+    def compact(self, background=False):
+        """Fold the journal into a fresh snapshot of __file_path.
+
+        The journal is renamed aside so saves can keep appending while the
+        snapshot on disk and the renamed journal are merged, record by
+        record, into a temporary file that then replaces __file_path.
+
+        Args:
+            background (bool): If True, fold in a daemon thread.
+        Returns:
+            The started thread if background is True, otherwise None.
+        """
+        with FileStorage.__compact_lock:
+            if FileStorage.__compactor is not None:
+                return None
+            folding = FileStorage.__journal_path + ".1"
+            with FileStorage.__write_lock, self.__locked(True):
+                if not path.exists(folding):
+                    if not path.exists(FileStorage.__journal_path):
+                        return None
+                    replace(FileStorage.__journal_path, folding)
+                    if self.__bump(True):
+                        FileStorage.__journal_seen = 0
+            if not background:
+                self.__fold(folding)
+                return None
+            compactor = threading.Thread(
+                target=self.__fold, args=(folding,), daemon=True)
+            FileStorage.__compactor = compactor
+            compactor.start()
+            return compactor
+
+    def compaction_stats(self):
+        """Return a copy of the compaction statistics.
+
+        Keys are runs, records_folded, bytes_reclaimed and duration (in
+        seconds) summed over all runs, and the same figures of the last
+        run prefixed with last_.
+        """
+        return dict(FileStorage.__compact_stats)
+
+    async def aget(self, cls, obj_id):
+        """Return the object of class cls with id obj_id, or None, as
+        get() does, without blocking the event loop.
+
+        An object in memory is returned at once; a lazy or mapped record
+        is built, or read, in the default executor.
+
+        Args:
+            cls (type or str): The class, or class name, of the object.
+            obj_id (str): The id of the object.
+        """
+        loop = self.__asynchronous()
+        name = cls if type(cls) is str else cls.__name__
+        obj = FileStorage.__objects.get("{}.{}".format(name, obj_id))
+        if obj is not None:
+            return obj
+        return await loop.run_in_executor(None, self.get, cls, obj_id)
+
+    async def asave(self):
+        """Save as save() does, in the default executor.
+
+        Calls made while a write runs are coalesced: they all wait for
+        the one next write, which covers their changes.
+
+        Raises:
+            ConflictError: As save() does, to every caller of the write.
+        """
+        loop = self.__asynchronous()
+        if self.batching():
+            return
+        waiting = FileStorage.__next_save
+        if waiting is None or waiting.get_loop() is not loop:
+            waiting = loop.create_future()
+            FileStorage.__next_save = waiting
+        saver = FileStorage.__saver
+        if saver is None or saver.done() or saver.get_loop() is not loop:
+            FileStorage.__saver = loop.create_task(self.__save_loop())
+        await asyncio.shield(waiting)
+
+    async def aiter(self, cls=None):
+        """Iterate asynchronously over the objects of class cls, or all.
+
+        The keys are listed, then the objects fetched __chunk at a time,
+        in the default executor, so lazy and mapped records are built
+        and read there.
+
+        Args:
+            cls (type or str): The class, or class name, to iterate.
+        """
+        loop = self.__asynchronous()
+        keys = await loop.run_in_executor(None, self.__keys_of, cls)
+        size = FileStorage.__chunk
+        for start in range(0, len(keys), size):
+            objs = await loop.run_in_executor(
+                None, self.__fetch_all, keys[start:start + size])
+            for obj in objs:
+                yield obj
+
+    async def awhere(self, cls, conditions=(), order_by=None, limit=None,
+                     reverse=False):
+        """Return the list of the objects where() finds, found in the
+        default executor.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            conditions (iterable): (attribute, operator, value) triples.
+            order_by (str): The attribute to sort the objects by, if any.
+            limit (int): The maximum number of objects, if any.
+            reverse (bool): If True, sort in descending order.
+        Raises:
+            ValueError: If an operator is unknown.
+        """
+        loop = self.__asynchronous()
+        return await loop.run_in_executor(None, lambda: list(self.where(
+            cls, conditions, order_by, limit, reverse)))
+
+    def __write(self, durable):
+        """Write the store, or append the journal, as save() does.
+
+        __lock is only held while what is written is copied: the records
+        are encoded and written while other threads keep reading and
+        changing objects, whose changes are left for the next save. In
+        shared mode, what other processes saved is merged first.
+
+        Args:
+            durable (bool): If True, fsync the file before returning.
+        Raises:
+            ConflictError: If another process saved some of the objects
+                changed here first.
+        """
+        with FileStorage.__write_lock, self.__locked(True):
+            with FileStorage.__lock.hold():
+                FileStorage.__dirty = False
+                conflicts = self.__resolve()
+                written = self.changes()
+                for key in written:
+                    obj = FileStorage.__objects.get(key)
+                    FileStorage.__cache.pop(id(obj), None)
+                if FileStorage.__shared:
+                    self.__written(written)
+                if FileStorage.__journaling:
+                    entries = [(key, FileStorage.__objects.get(
+                        key, FileStorage.__raw.get(key))) for key in written]
+                else:
+                    entries = self.__entries()
+            try:
+                if FileStorage.__journaling:
+                    self.__append_journal(entries, durable)
+                else:
+                    self.__write_snapshot(entries, durable)
+            except BaseException:
+                with FileStorage.__lock.hold():
+                    FileStorage.__pending.update(written)
+                raise
+        if FileStorage.__journaling and self.__should_compact():
+            self.compact(background=True)
+        if conflicts:
+            raise ConflictError(conflicts)
+
+    def __write_snapshot(self, entries, durable):
+        """Write the records of entries to a new snapshot and drop the
+        journal.
+
+        The new snapshot is mapped in place of the previous one, whose
+        records deleted since entries were copied stay deleted.
+
+        Args:
+            entries (list): Pairs of a key and its object or lazy record,
+                or None to copy the record of the mapped snapshot, as
+                returned by __entries().
+            durable (bool): If True, fsync the directory too.
+        """
+        serializer = FileStorage.__formats[FileStorage.__format]
+        self.__dump(((key, serializer.encode(FileStorage.__map.get(key))
+                      if obj is None else self.__encode(obj))
+                     for key, obj in entries), durable)
+        for log in (FileStorage.__journal_path,
+                    FileStorage.__journal_path + ".1"):
+            try:
+                remove(log)
+            except FileNotFoundError:
+                pass
+        FileStorage.__journal_seen = 0
+        if FileStorage.__mapped:
+            with FileStorage.__lock.hold():
+                self.__map_snapshot()
+                FileStorage.__deleted = {
+                    key for key in FileStorage.__pending
+                    if not self.__in_memory(key)}
+                FileStorage.__deleted.update(FileStorage.__rejected)
+
+    def __entries(self):
+        """Return what __write_snapshot() writes of the store as it is.
+
+        The objects, lazy and rejected records are copied by reference,
+        the records of the mapped snapshot that were not loaded by key
+        only. __lock must be held.
+        """
+        entries = list(chain(FileStorage.__raw.items(),
+                             FileStorage.__objects.items(),
+                             FileStorage.__rejected.items()))
+        entries.extend((key, None) for key in self.__mapped_keys()
+                       if not self.__in_memory(key))
+        return entries
+
+    def __dump(self, items, durable=False):
+        """Write the encoded records of items to a new snapshot.
+
+        The records are encoded in __format. In mapped mode, the offset
+        index of the new snapshot is written too. The temporary files
+        are removed if anything fails before the snapshot is installed.
+
+        Args:
+            items (iterable): Pairs of a key and its encoded record.
+            durable (bool): If True, fsync the directory too.
+        """
+        serializer = FileStorage.__formats[FileStorage.__format]
+        tmp = FileStorage.__file_path + ".tmp"
+        positions = [] if FileStorage.__mapped else None
+        try:
+            with open(tmp, "wb" if serializer.BINARY else "w") as f:
+                serializer.dump_items(items, f, positions)
+                f.flush()
+                fsync(f.fileno())
+            if positions is not None:
+                OffsetIndex.write(FileStorage.__index_path + ".tmp", tmp,
+                                  positions)
+            self.__install(tmp, durable)
+        except BaseException:
+            for name in (tmp, FileStorage.__index_path + ".tmp"):
+                try:
+                    remove(name)
+                except FileNotFoundError:
+                    pass
+            raise
+        if positions is not None:
+            replace(FileStorage.__index_path + ".tmp",
+                    FileStorage.__index_path)
+        self.__bump(True)
+
+    def __install(self, tmp, durable=False):
+        """Replace __file_path by the fsynced file tmp, atomically.
+
+        The snapshot being replaced becomes the first of the __backups
+        rolling backups, if any are kept.
+
+        Args:
+            tmp (str): The name of the new snapshot file.
+            durable (bool): If True, also fsync the directory, so the
+                rename itself survives a crash.
+        """
+        name = FileStorage.__file_path
+        if FileStorage.__backups > 0 and path.exists(name):
+            for n in range(FileStorage.__backups - 1, 0, -1):
+                older = "{}.bak.{}".format(name, n)
+                if path.exists(older):
+                    replace(older, "{}.bak.{}".format(name, n + 1))
+            backup = name + ".bak.1"
+            try:
+                remove(backup)
+            except FileNotFoundError:
+                pass
+            try:
+                link(name, backup)
+            except OSError:
+                copyfile(name, backup)
+        replace(tmp, name)
+        if durable:
+            fd = os_open(path.dirname(path.abspath(name)), O_RDONLY)
+            try:
+                fsync(fd)
+            finally:
+                close(fd)
+
+    def __load_snapshot(self):
+        """Load __file_path, recovering from a torn one as reload() does.
+
+        Returns:
+            The keys salvaged from a torn snapshot without a backup, which
+            is left as __file_path.torn only: the next save writes them.
+        """
+        name = FileStorage.__file_path
+        try:
+            if self.__load_file(name):
+                return ()
+        except FileNotFoundError:
+            return ()
+        replace(name, name + ".torn")
+        n = 1
+        while path.exists("{}.bak.{}".format(name, n)):
+            backup = "{}.bak.{}".format(name, n)
+            if self.__load_file(backup):
+                copyfile(backup, name + ".tmp")
+                replace(name + ".tmp", name)
+                return ()
+            n += 1
+        loaded = []
+        self.__load_file(name + ".torn", loaded)
+        return loaded
+
+    def __load_file(self, name, salvaged=None):
+        """Load the snapshot file name, returning True if it is whole.
+
+        Only a record the serializer cannot decode tears the file; one
+        that decodes but cannot be stored is set aside by
+        __load_checked().
+
+        Args:
+            name (str): The name of the snapshot file.
+            salvaged (list): If given, the records read before a tear are
+                kept and their keys added to it, otherwise they are
+                unloaded again.
+        """
+        serializer = self.__serializer_of(name)
+        loaded = []
+        with open(name, "rb" if serializer.BINARY else "r") as f:
+            items = serializer.load_items(f)
+            while True:
+                try:
+                    key, o = next(items)
+                except StopIteration:
+                    return True
+                except ValueError:
+                    break
+                if self.__load_checked(key, o):
+                    loaded.append(key)
+        if salvaged is None:
+            for key in loaded:
+                self.__unload(key)
+        else:
+            salvaged.extend(loaded)
+        return False
+
+    def __serializer_of(self, name):
+        """Return the serializer of the format of the snapshot file name.
+
+        Raises:
+            FileNotFoundError: If there is no such file.
+        """
+        with open(name, "rb") as f:
+            head = f.read(16)
+        for serializer in FileStorage.__formats.values():
+            if serializer.BINARY and head.startswith(serializer.MAGIC):
+                return serializer
+        return json_stream
+
+    def __flush_loop(self):
+        """Write the store every __flush_interval, or when woken up.
+
+        The loop ends once it is no longer the __flusher.
+        A conflict is not reported: the objects simply hold what the
+        other process saved.
+        """
+        current = threading.current_thread()
+        while FileStorage.__flusher is current:
+            FileStorage.__wake.wait(FileStorage.__flush_interval)
+            FileStorage.__wake.clear()
+            if FileStorage.__flusher is current:
+                try:
+                    self.sync()
+                except ConflictError:
+                    pass
+
+    def __append_journal(self, entries, durable=False):
+        """Append a put or del record for every entry.
+
+        A torn last record, left by an interrupted append, is ended by a
+        newline first, so the records appended after it can be read.
+
+        Args:
+            entries (list): Pairs of a pending key and its object or lazy
+                record, None if it was deleted.
+            durable (bool): If True, fsync the journal once appended.
+        """
+        lines = []
+        for key, obj in entries:
+            if obj is not None:
+                lines.append('["put", {}, {}]'.format(
+                    json.dumps(key), self.__encode(obj, json_stream)))
+            else:
+                lines.append(json.dumps(["del", key]))
+        if lines:
+            with open(FileStorage.__journal_path, "a+b") as f:
+                size = f.seek(0, 2)
+                if size:
+                    f.seek(size - 1)
+                    if f.read(1) != b"\n":
+                        lines.insert(0, "")
+                f.write(("\n".join(lines) + "\n").encode())
+                if durable:
+                    f.flush()
+                    fsync(f.fileno())
+                if self.__bump(False):
+                    FileStorage.__journal_seen = f.tell()
+
+    def __bucket(self, cls_name):
+        """Return the keys of class cls_name, as a dict of None values.
+
+        Keys of the mapped snapshot that were not loaded are only there
+        once the bucket was asked for by __class_keys().
+        """
+        return FileStorage.__buckets.setdefault(cls_name, {})
+
+    def __rebuild(self):
+        """Build __buckets again from the objects and lazy records, and
+        drop the indexes, before another snapshot is mapped."""
+        with FileStorage.__build_lock:
+            buckets = {}
+            for key in chain(FileStorage.__objects, FileStorage.__raw):
+                buckets.setdefault(key.split(".", 1)[0], {})[key] = None
+            FileStorage.__buckets = buckets
+            FileStorage.__indexes = {}
+            FileStorage.__merged = set()
+
+    def __class_keys(self, cls_name):
+        """Return every key of class cls_name, mapped ones included."""
+        bucket = self.__bucket(cls_name)
+        if (FileStorage.__map is not None and
+                cls_name not in FileStorage.__merged):
+            with FileStorage.__build_lock:
+                if cls_name not in FileStorage.__merged:
+                    for key in self.__mapped_keys(cls_name):
+                        bucket[key] = None
+                    FileStorage.__merged.add(cls_name)
+        return bucket
+
+    def __plan(self, cls_name, conditions, order_by, reverse):
+        """Return a description and the candidate keys for conditions.
+
+        The third item is True if the keys are already sorted by
+        order_by, and the keys are then walked from a live index.
+        Of several bounded sorted attributes, the one with the fewest
+        keys in range is used.
+        """
+        indexes = FileStorage.__indexes.get(cls_name, {})
+        for attr, op, value in conditions:
+            if op == "==" and (attr, HashIndex) in indexes:
+                return ("index {}.{}".format(cls_name, attr),
+                        indexes[(attr, HashIndex)].lookup(value), False)
+        sortable = FileStorage.__sorted.get(cls_name, ())
+        bounds = {}
+        for attr, op, value in conditions:
+            if (attr not in sortable or op == "!=" or
+                    not SortedIndex.is_number(value)):
+                continue
+            low, high, low_inc, high_inc = bounds.get(
+                attr, (None, None, True, True))
+            if op in ("==", ">", ">=") and (
+                    low is None or value > low or
+                    (value == low and op == ">")):
+                low, low_inc = value, op != ">"
+            if op in ("==", "<", "<=") and (
+                    high is None or value < high or
+                    (value == high and op == "<")):
+                high, high_inc = value, op != "<"
+            bounds[attr] = (low, high, low_inc, high_inc)
+        best = None
+        for attr in bounds:
+            index = self.__index(cls_name, attr, SortedIndex)
+            start, stop = index.span(*bounds[attr])
+            if best is None or stop - start < best[0]:
+                best = (stop - start, attr, index)
+        if best is not None:
+            attr, index = best[1:]
+            return ("range {}.{}".format(cls_name, attr),
+                    index.range(*bounds[attr], reverse=reverse),
+                    attr == order_by)
+        if order_by in sortable:
+            index = self.__index(cls_name, order_by, SortedIndex)
+            return ("ordered {}.{}".format(cls_name, order_by),
+                    index.ordered(reverse), True)
+        return ("scan {}".format(cls_name),
+                list(self.__class_keys(cls_name)), False)
+
+    def __where(self, cls_name, conditions, checks, order_by, limit,
+                reverse):
+        """Yield the objects found by where().
+
+        In threaded mode, the keys are found holding __lock shared, which
+        is then only held again for each object yielded, so the caller
+        may change objects in between; a plain scan checks each key then.
+        """
+        if limit is not None and limit <= 0:
+            return
+        with self.__reading():
+            plan, keys, ordered = self.__plan(cls_name, list(conditions),
+                                              order_by, reverse)
+            streamed = plan.startswith("scan") and order_by is None
+            if not streamed:
+                keys = (key for key in keys if self.__matches(key, checks))
+                if not plan.startswith("scan"):
+                    keys = list(islice(keys, limit if ordered else None))
+            if order_by is not None and not ordered:
+                def sort_key(key):
+                    value = self.__attr(key, order_by)
+                    if isinstance(value, (int, float)):
+                        return (0, value, "")
+                    return (1, 0, str(value))
+                if limit is None:
+                    keys = sorted(keys, key=sort_key, reverse=reverse)
+                elif reverse:
+                    keys = heapq.nlargest(limit, keys, key=sort_key)
+                else:
+                    keys = heapq.nsmallest(limit, keys, key=sort_key)
+        count = 0
+        for key in keys:
+            with self.__reading():
+                if not self.__matches(key, checks if streamed else ()):
+                    continue
+                obj = self.__fetch(key)
+            yield obj
+            count += 1
+            if count == limit:
+                return
+
+    def __matches(self, key, checks):
+        """Return True if the values under key pass all checks."""
+        if not self.__stored(key):
+            return False
+        for attr, compare, value in checks:
+            try:
+                if not compare(self.__attr(key, attr), value):
+                    return False
+            except TypeError:
+                return False
+        return True
+
+    def __grid(self, cls):
+        """Return the grid index of the coordinates of class cls."""
+        if type(cls) is not str:
+            cls = cls.__name__
+        if cls not in FileStorage.__spatial:
+            raise ValueError("{} has no coordinates".format(cls))
+        return self.__index(cls, FileStorage.__spatial[cls], GridIndex)
+
+    def __index(self, cls_name, attr, kind, *args):
+        """Return the index of kind on attribute attr of class cls_name.
+
+        The index is built from the stored keys, as kind(*args), if it
+        does not exist yet, or at once by kind.build() if kind has one.
+        attr may also be a tuple of attribute names, indexed together.
+        """
+        keys = self.__class_keys(cls_name)
+        indexes = FileStorage.__indexes.setdefault(cls_name, {})
+        index = indexes.get((attr, kind))
+        if index is None:
+            with FileStorage.__build_lock:
+                index = indexes.get((attr, kind))
+                if index is None:
+                    pairs = ((key, self.__value(key, attr)) for key in keys)
+                    if hasattr(kind, "build"):
+                        index = kind.build(pairs, *args)
+                    else:
+                        index = kind(*args)
+                        for key, value in pairs:
+                            index.add(key, value)
+                    indexes[(attr, kind)] = index
+        return index
+
+    def __reindex(self, key):
+        """Bring the indexes of the class of key up to date for key."""
+        cls_name = key.split(".", 1)[0]
+        self.__bucket(cls_name)
+        indexes = FileStorage.__indexes.get(cls_name)
+        if not indexes:
+            return
+        stored = self.__stored(key)
+        for attr, kind in indexes:
+            if stored:
+                indexes[(attr, kind)].add(key, self.__value(key, attr))
+            else:
+                indexes[(attr, kind)].discard(key)
+
+    def __value(self, key, attr):
+        """Return the value of attr under key, a tuple for a tuple attr."""
+        if type(attr) is tuple:
+            return tuple(self.__attr(key, a) for a in attr)
+        return self.__attr(key, attr)
+
+    def __attr(self, key, attr):
+        """Return attribute attr of the object or lazy record under key.
+
+        None is returned if it has no such attribute.
+        """
+        obj = FileStorage.__objects.get(key)
+        if obj is None:
+            if not self.__in_memory(key):
+                self.__fault(key)
+            o = FileStorage.__raw.get(key)
+            if o is None:
+                obj = FileStorage.__objects.get(key)
+            elif attr in o:
+                return o[attr]
+            else:
+                obj = BaseModel.classes[o["__class__"]]
+        return getattr(obj, attr, None)
+
+    def __stored(self, key):
+        """Return True if key is stored, as an object, a lazy record or a
+        record of the mapped snapshot."""
+        if key in FileStorage.__objects or key in FileStorage.__raw:
+            return True
+        return (FileStorage.__map is not None and
+                key not in FileStorage.__deleted and key in FileStorage.__map)
+
+    def __in_memory(self, key):
+        """Return True if key is stored as an object or a lazy record."""
+        return key in FileStorage.__objects or key in FileStorage.__raw
+
+    def __fetch(self, key):
+        """Return the object stored under key, building it if lazy or
+        reading it if mapped."""
+        obj = FileStorage.__objects.get(key)
+        if obj is None:
+            if not self.__in_memory(key):
+                self.__fault(key)
+            obj = FileStorage.__objects.get(key)
+            if obj is None:
+                obj = self.__materialize(key)
+        return obj
+
+    def __fault(self, key):
+        """Load the record of key from the mapped snapshot, as reload()
+        would have.
+
+        Its key and indexed values are there already, only the object or
+        lazy record is added, under __build_lock: reads fault too.
+        """
+        with FileStorage.__build_lock:
+            if self.__in_memory(key):
+                return
+            o = FileStorage.__map.get(key)
+            if FileStorage.__shared:
+                FileStorage.__versions[key] = o.get("upd_at", "")
+            if FileStorage.__compact:
+                FileStorage.__raw[key] = Record(o)
+            elif FileStorage.__lazy:
+                FileStorage.__raw[key] = o
+            else:
+                cls = BaseModel.classes[o.pop("__class__")]
+                FileStorage.__objects[key] = cls(**o)
+
+    def __mapped_keys(self, cls_name=None):
+        """Yield the keys of the mapped snapshot not deleted since, or
+        those of class cls_name."""
+        if FileStorage.__map is None:
+            return
+        for key in FileStorage.__map.keys(cls_name):
+            if key not in FileStorage.__deleted:
+                yield key
+
+    def __map_snapshot(self):
+        """Map __file_path and its offset index, returning True if done.
+
+        False is returned if the snapshot does not exist, or its index is
+        missing or stale.
+        """
+        self.__unmap()
+        try:
+            FileStorage.__map = OffsetIndex(
+                FileStorage.__index_path, FileStorage.__file_path,
+                self.__serializer_of(FileStorage.__file_path))
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def __unmap(self):
+        """Close the mapped snapshot, if any.
+
+        The keys of the classes already merged into __buckets are kept,
+        the snapshot mapped next holding the same ones.
+        """
+        if FileStorage.__map is not None:
+            FileStorage.__map.close()
+            FileStorage.__map = None
+        FileStorage.__deleted = set()
+
+    def __asynchronous(self):
+        """Return the running event loop, turning threaded mode on.
+
+        The async methods run storage methods in executor threads, so
+        reads must then hold __lock.
+        """
+        FileStorage.__threaded = True
+        return asyncio.get_running_loop()
+
+    async def __save_loop(self):
+        """Write once for every batch of asave() calls, until none is
+        left waiting."""
+        loop = asyncio.get_running_loop()
+        while FileStorage.__next_save is not None:
+            waiting = FileStorage.__next_save
+            FileStorage.__next_save = None
+            try:
+                await loop.run_in_executor(None, self.save)
+            except Exception as error:
+                waiting.set_exception(error)
+            else:
+                waiting.set_result(None)
+
+    def __keys_of(self, cls):
+        """Return the list of the keys stored, or of class cls."""
+        with self.__reading():
+            if cls is None:
+                return list(dict.fromkeys(chain(
+                    FileStorage.__objects, FileStorage.__raw,
+                    self.__mapped_keys())))
+            if type(cls) is not str:
+                cls = cls.__name__
+            return list(self.__class_keys(cls))
+
+    def __fetch_all(self, keys):
+        """Return the objects of keys still stored, built or read."""
+        with self.__reading():
+            return [self.__fetch(key) for key in keys if self.__stored(key)]
+
+    def __reading(self):
+        """Return a context holding __lock shared in threaded mode."""
+        if FileStorage.__threaded:
+            return FileStorage.__lock.hold(False)
+        return FileStorage.__unlocked
+
+    def __locked(self, exclusive):
+        """Return a context holding __file_lock in shared mode.
+
+        Args:
+            exclusive (bool): If False, only hold the lock shared.
+        """
+        if not FileStorage.__shared:
+            return nullcontext()
+        return FileStorage.__file_lock.hold(exclusive)
+
+    def __bump(self, snapshot):
+        """Count a write in __file_lock, in shared mode.
+
+        Returns:
+            True if the store was up to date before the write, and so is
+            still.
+        """
+        if not FileStorage.__shared:
+            return True
+        before, after = FileStorage.__file_lock.bump(snapshot)
+        if before != FileStorage.__generations:
+            return False
+        FileStorage.__generations = after
+        return True
+
+    def __resolve(self):
+        """Merge what other processes saved, before writing.
+
+        The changes made here to the keys they saved first are given up.
+
+        Returns:
+            The keys whose change was given up.
+        """
+        self.__catch_up()
+        conflicts = FileStorage.__conflicts
+        FileStorage.__conflicts = {}
+        for key, o in conflicts.items():
+            self.__adopt(key, o)
+        return list(conflicts)
+
+    def __catch_up(self):
+        """Merge the writes of other processes since the last one seen.
+
+        If only the journal grew, just its new records are read. If the
+        snapshot was replaced, it is read again, or mapped again, but
+        only the records whose version changed are loaded. Nothing is
+        done unless in shared mode.
+        """
+        if not FileStorage.__shared:
+            return
+        generations = FileStorage.__file_lock.read()
+        if generations == FileStorage.__generations:
+            return
+        if (FileStorage.__generations is None or
+                generations[1] != FileStorage.__generations[1]):
+            self.__merge_snapshot()
+        else:
+            for end, record in self.__read_journal(
+                    FileStorage.__journal_path, FileStorage.__journal_seen):
+                self.__merge(record[1],
+                             record[2] if record[0] == "put" else None)
+                FileStorage.__journal_seen = end
+        FileStorage.__generations = generations
+
+    def __merge_snapshot(self):
+        """Merge the snapshot and journals another process replaced."""
+        changes = {}
+        FileStorage.__journal_seen = 0
+        for log in (FileStorage.__journal_path + ".1",
+                    FileStorage.__journal_path):
+            for end, record in self.__read_journal(log):
+                changes[record[1]] = record[2] if record[0] == "put" else None
+                if log == FileStorage.__journal_path:
+                    FileStorage.__journal_seen = end
+        deleted = FileStorage.__deleted
+        if FileStorage.__mapped and self.__map_snapshot():
+            FileStorage.__deleted = deleted
+            self.__rebuild()
+            for key in list(chain(FileStorage.__versions, changes)):
+                if key in changes:
+                    self.__merge(key, changes[key])
+                else:
+                    self.__merge(key, FileStorage.__map.get(key))
+            return
+        seen = set()
+        try:
+            reader = self.__serializer_of(FileStorage.__file_path)
+            with open(FileStorage.__file_path,
+                      "rb" if reader.BINARY else "r") as f:
+                for key, o in reader.load_items(f):
+                    seen.add(key)
+                    if key not in changes:
+                        self.__merge(key, o)
+        except FileNotFoundError:
+            pass
+        for key, o in changes.items():
+            seen.add(key)
+            self.__merge(key, o)
+        for key in list(FileStorage.__versions):
+            if key not in seen:
+                self.__merge(key, None)
+
+    def __merge(self, key, o):
+        """Bring key to the record o another process saved, None if it
+        deleted it, unless that is the version already held.
+
+        A key also changed here becomes a conflict instead.
+        """
+        version = None if o is None else o.get("upd_at", "")
+        if version == self.__version(key):
+            return
+        if key in FileStorage.__pending:
+            FileStorage.__conflicts[key] = o
+        else:
+            self.__adopt(key, o)
+
+    def __version(self, key):
+        """Return the version of key as last read or written, None if it
+        was not on disk."""
+        if key in FileStorage.__versions:
+            return FileStorage.__versions[key]
+        if (FileStorage.__map is not None and not self.__in_memory(key) and
+                key not in FileStorage.__deleted):
+            o = FileStorage.__map.get(key)
+            if o is not None:
+                return o.get("upd_at", "")
+        return None
+
+    def __adopt(self, key, o):
+        """Store the record o another process saved under key, or delete
+        key if o is None."""
+        if o is None:
+            self.__unload(key)
+            FileStorage.__versions.pop(key, None)
+        else:
+            self.__load_stored(key, dict(o))
+        FileStorage.__pending.discard(key)
+        FileStorage.__touched.discard(key)
+        FileStorage.__removed.pop(key, None)
+
+    def __written(self, keys):
+        """Remember the versions of keys about to be written, in shared
+        mode.
+
+        A key of __touched still at the version on disk, changed by an
+        attribute assignment or the insert() of a record keeping its
+        upd_at, is given a new upd_at first: other processes would
+        otherwise see the version they hold, keep their copy and write
+        it back over the change.
+        """
+        for key in keys:
+            obj = FileStorage.__objects.get(key, FileStorage.__raw.get(key))
+            if obj is None:
+                FileStorage.__versions.pop(key, None)
+                continue
+            version = self.__upd_at(obj)
+            if (key in FileStorage.__touched and
+                    version == self.__version(key)):
+                obj = self.__stamp(key, obj)
+                version = self.__upd_at(obj)
+            FileStorage.__versions[key] = version
+        FileStorage.__touched.difference_update(keys)
+        for key in keys:
+            FileStorage.__removed.pop(key, None)
+
+    def __differs(self, key, o):
+        """Return True if the record o differs from the one stored under
+        key, or deleted from it since last written; False if there is
+        none."""
+        held = FileStorage.__objects.get(key, FileStorage.__raw.get(key))
+        if held is None:
+            held = FileStorage.__removed.get(key)
+        if (held is None and FileStorage.__map is not None and
+                key not in FileStorage.__deleted):
+            held = FileStorage.__map.get(key)
+        if held is None:
+            return False
+        return (held if type(held) is dict else held.to_dict()) != o
+
+    def __upd_at(self, obj):
+        """Return the upd_at of an object or lazy record, as a string."""
+        if type(obj) is dict:
+            return obj.get("upd_at", "")
+        if type(obj) is Record:
+            return obj.to_dict().get("upd_at", "")
+        return obj.upd_at.isoformat()
+
+    def __stamp(self, key, obj):
+        """Set the upd_at of the object or lazy record obj stored under
+        key to now, without marking it changed again.
+
+        Returns:
+            The object or lazy record now stored under key.
+        """
+        now = datetime.today()
+        FileStorage.__cache.pop(id(obj), None)
+        if type(obj) is dict:
+            obj["upd_at"] = now.isoformat()
+        elif type(obj) is Record:
+            o = obj.to_dict()
+            o["upd_at"] = now.isoformat()
+            obj = FileStorage.__raw[key] = Record(o)
+        else:
+            obj.__dict__["upd_at"] = now
+        self.__reindex(key)
+        return obj
+
+    def __load_stored(self, key, o):
+        """Store the record o read from disk under key, as __load() does,
+        remembering its version in shared mode."""
+        if FileStorage.__shared:
+            FileStorage.__versions[key] = o.get("upd_at", "")
+        self.__load(key, o)
+
+    def __load_checked(self, key, o):
+        """Store the record o read from disk under key, as
+        __load_stored() does, returning True if it could be.
+
+        A record with a bad timestamp or an unknown class is set aside in
+        __rejected instead, in place of what key held.
+        """
+        record = dict(o)
+        try:
+            self.__load_stored(key, o)
+        except (KeyError, TypeError, ValueError):
+            self.__unload(key)
+            FileStorage.__rejected[key] = record
+            return False
+        return True
+
+    def __load(self, key, o):
+        """Store the record o read from disk under key.
+
+        The record is kept as is in lazy mode, as a Record in compact
+        mode, built into an object otherwise.
+        """
+        self.__forget(key)
+        FileStorage.__rejected.pop(key, None)
+        if FileStorage.__compact:
+            o = Record(o)
+        if FileStorage.__lazy or FileStorage.__compact:
+            FileStorage.__objects.pop(key, None)
+            FileStorage.__view = None
+            FileStorage.__deleted.discard(key)
+            FileStorage.__raw[key] = o
+            self.__bucket(key.split(".", 1)[0])[key] = None
+            self.__reindex(key)
+        else:
+            cls_name = o["__class__"]
+            del o["__class__"]
+            self.new(BaseModel.classes[cls_name](**o))
+
+    def __unload(self, key):
+        """Remove whatever is stored under key, object or lazy record."""
+        self.__forget(key)
+        FileStorage.__objects.pop(key, None)
+        FileStorage.__view = None
+        FileStorage.__raw.pop(key, None)
+        FileStorage.__rejected.pop(key, None)
+        if FileStorage.__map is not None:
+            FileStorage.__deleted.add(key)
+        self.__bucket(key.split(".", 1)[0]).pop(key, None)
+        self.__reindex(key)
+
+    def __forget(self, key):
+        """Drop the cached encodings of the object and lazy record stored
+        under key, which are about to be replaced or removed."""
+        for obj in (FileStorage.__objects.get(key),
+                    FileStorage.__raw.get(key)):
+            if obj is not None:
+                FileStorage.__cache.pop(id(obj), None)
+
+    def __materialize(self, key):
+        """Build the object of the lazy record key into __objects.
+
+        The record is left as it was, a save may be encoding it.
+        """
+        with FileStorage.__build_lock:
+            o = FileStorage.__raw.get(key)
+            if o is None:
+                return FileStorage.__objects.get(key)
+            entry = FileStorage.__cache.pop(id(o), None)
+            o = o.to_dict() if type(o) is Record else dict(o)
+            obj = BaseModel.classes[o.pop("__class__")](**o)
+            FileStorage.__cache.pop(id(obj), None)
+            if entry is not None and entry[0] is FileStorage.__raw[key]:
+                FileStorage.__cache[id(obj)] = (obj, entry[1])
+            FileStorage.__objects[key] = obj
+            del FileStorage.__raw[key]
+            return obj
+
+    def __encode(self, obj, serializer=None):
+        """Return the encoding of obj.to_dict(), from the cache.
+
+        obj may also be a lazy record, encoded as is, or a Record,
+        encoded again from its data on every save: caching it would take
+        more memory than the Record itself.
+
+        Args:
+            obj (BaseModel, dict or Record): The object to encode.
+            serializer (module): The serializer to encode with, by default
+                the one of __format, whose encodings only are cached.
+        """
+        current = FileStorage.__formats[FileStorage.__format]
+        if serializer is None:
+            serializer = current
+        if type(obj) is Record:
+            return serializer.encode(obj.to_dict())
+        cached = serializer is current
+        entry = FileStorage.__cache.get(id(obj)) if cached else None
+        if entry is not None and entry[0] is obj:
+            return entry[1]
+        if type(obj) is dict:
+            fragment = serializer.encode(obj)
+        else:
+            fragment = serializer.encode(obj.to_dict())
+        if cached:
+            FileStorage.__cache[id(obj)] = (obj, fragment)
+        return fragment
+
+    def __read_journal(self, log, start=0):
+        """Yield the records of the journal file log, in order.
+
+        Each record comes with the position in bytes after its line. A
+        torn last record, left by an interrupted append, is ignored, and
+        so is a torn record that later appends were written after.
+
+        Args:
+            log (str): The name of the journal file.
+            start (int): The position to read from.
+        """
+        try:
+            with open(log, "rb") as f:
+                f.seek(start)
+                end = start
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        if not line.endswith(b"\n"):
+                            return
+                        end += len(line)
+                        continue
+                    end += len(line)
+                    yield end, record
         except FileNotFoundError:
             return
+
+    def __should_compact(self):
+        """Return True if the journal has outgrown the thresholds."""
+        try:
+            log_size = path.getsize(FileStorage.__journal_path)
+        except OSError:
+            return False
+        try:
+            snap_size = path.getsize(FileStorage.__file_path)
+        except OSError:
+            snap_size = 0
+        return (log_size >= FileStorage.__compact_bytes and
+                log_size >= snap_size * FileStorage.__compact_ratio)
+
+    def __folded_items(self, changes, serializer):
+        """Yield the encoded snapshot records with the changes applied.
+
+        The records are encoded by serializer, whatever the format of
+        the snapshot on disk.
+        """
+        try:
+            reader = self.__serializer_of(FileStorage.__file_path)
+            with open(FileStorage.__file_path,
+                      "rb" if reader.BINARY else "r") as f:
+                for key, o in reader.load_items(f):
+                    if key in changes:
+                        o = changes.pop(key)
+                        if o is None:
+                            continue
+                    yield key, serializer.encode(o)
+        except FileNotFoundError:
+            pass
+        for key, o in changes.items():
+            if o is not None:
+                yield key, serializer.encode(o)
+
+    def __fold(self, folding):
+        """Merge the journal folding into the snapshot on disk.
+
+        Only raw records are handled, __objects is never read. Just the
+        last state of each key of the journal is held in memory, the
+        snapshot is streamed record by record. In shared mode the lock
+        file is held throughout, and nothing is done if another process
+        folded the journal first.
+        """
+        start = time.perf_counter()
+        try:
+            with self.__locked(True):
+                if not path.exists(folding):
+                    return
+                before = path.getsize(folding)
+                if path.exists(FileStorage.__file_path):
+                    before += path.getsize(FileStorage.__file_path)
+                changes = {}
+                folded = 0
+                for end, record in self.__read_journal(folding):
+                    changes[record[1]] = (record[2] if record[0] == "put"
+                                          else None)
+                    folded += 1
+                serializer = FileStorage.__formats[FileStorage.__format]
+                self.__dump(self.__folded_items(changes, serializer))
+                remove(folding)
+                after = path.getsize(FileStorage.__file_path)
+            duration = time.perf_counter() - start
+            stats = FileStorage.__compact_stats
+            stats["runs"] += 1
+            stats["records_folded"] += folded
+            stats["bytes_reclaimed"] += before - after
+            stats["duration"] += duration
+            stats["last_records_folded"] = folded
+            stats["last_bytes_reclaimed"] = before - after
+            stats["last_duration"] = duration
+        finally:
+            FileStorage.__compactor = None
@@ -0,0 +1,342 @@
+#!/usr/bin/python3
+"""Defines the secondary indexes kept by the storage engines."""
+import math
+from bisect import bisect_left
+from bisect import bisect_right
+
+
+class HashIndex:
+    """Represent an equality index of one attribute over stored keys.
+
+    Attributes:
+        keys (dict): The keys holding each value, each as a dict of None
+            values used as an ordered set.
+        values (dict): The indexed value of each key.
+    """
+
+    def __init__(self):
+        """Initialize a new, empty HashIndex."""
+        self.keys = {}
+        self.values = {}
+
+    def add(self, key, value):
+        """Index key under value, replacing its previous value.
+
+        Unhashable values are remembered but cannot be looked up.
+        """
+        if key in self.values:
+            if self.values[key] == value:
+                return
+            self.discard(key)
+        self.values[key] = value
+        try:
+            self.keys.setdefault(value, {})[key] = None
+        except TypeError:
+            pass
+
+    def discard(self, key):
+        """Remove key from the index if it is there."""
+        if key not in self.values:
+            return
+        value = self.values.pop(key)
+        try:
+            bucket = self.keys[value]
+        except (KeyError, TypeError):
+            return
+        del bucket[key]
+        if not bucket:
+            del self.keys[value]
+
+    def lookup(self, value):
+        """Return the list of keys indexed under value."""
+        try:
+            return list(self.keys.get(value, ()))
+        except TypeError:
+            return []
+
+
+class SortedIndex:
+    """Represent an ordered index of one numeric attribute over keys.
+
+    Numbers are kept sorted, so range lookups and walks in order cost a
+    binary search plus the keys visited. Keys whose value is not a
+    number are kept apart and come after the numbers. Keys of equal
+    values stay in the order they were added, by ascending sequence
+    numbers, so a key is found again by binary search alone.
+
+    Attributes:
+        numbers (list): The numeric values, in ascending order.
+        order (list): The key of each value of numbers.
+        seqs (list): The sequence number of each value of numbers.
+        others (dict): The keys whose value is not a number, as a dict
+            of None values used as an ordered set.
+        values (dict): The indexed value of each key.
+        seq_of (dict): The sequence number of each key of numbers.
+        added (int): The number of values added so far.
+    """
+
+    def __init__(self):
+        """Initialize a new, empty SortedIndex."""
+        self.numbers = []
+        self.order = []
+        self.seqs = []
+        self.others = {}
+        self.values = {}
+        self.seq_of = {}
+        self.added = 0
+
+    @classmethod
+    def build(cls, pairs):
+        """Return a new SortedIndex of the (key, value) pairs.
+
+        The numbers are sorted once, so building costs O(n log n) where
+        adding the keys one at a time costs O(n^2); the index is the
+        same as if each key had been added in turn.
+
+        Args:
+            pairs (iterable): The (key, value) pairs, a later value of
+                a key replacing an earlier one.
+        """
+        index = cls()
+        index.values = dict(pairs)
+        entries = []
+        for key, value in index.values.items():
+            if cls.is_number(value):
+                index.added += 1
+                index.seq_of[key] = index.added
+                entries.append((value, index.added, key))
+            else:
+                index.others[key] = None
+        entries.sort()
+        index.numbers = [value for value, seq, key in entries]
+        index.seqs = [seq for value, seq, key in entries]
+        index.order = [key for value, seq, key in entries]
+        return index
+
+    @staticmethod
+    def is_number(value):
+        """Return True if value is an int or float other than NaN."""
+        return isinstance(value, (int, float)) and value == value
+
+    def add(self, key, value):
+        """Index key under value, replacing its previous value.
+
+        Each add costs a list insertion; use build() to index many keys
+        at once.
+        """
+        if key in self.values:
+            if self.values[key] == value:
+                return
+            self.discard(key)
+        self.values[key] = value
+        if self.is_number(value):
+            i = bisect_right(self.numbers, value)
+            self.added += 1
+            self.numbers.insert(i, value)
+            self.order.insert(i, key)
+            self.seqs.insert(i, self.added)
+            self.seq_of[key] = self.added
+        else:
+            self.others[key] = None
+
+    def discard(self, key):
+        """Remove key from the index if it is there."""
+        if key not in self.values:
+            return
+        value = self.values.pop(key)
+        if self.is_number(value):
+            i = bisect_left(self.seqs, self.seq_of.pop(key),
+                            bisect_left(self.numbers, value),
+                            bisect_right(self.numbers, value))
+            del self.numbers[i]
+            del self.order[i]
+            del self.seqs[i]
+        else:
+            del self.others[key]
+
+    def lookup(self, value):
+        """Return the list of keys indexed under value."""
+        if not self.is_number(value):
+            return [key for key in self.others
+                    if self.values[key] == value]
+        return list(self.range(value, value))
+
+    def span(self, low=None, high=None, low_inclusive=True,
+             high_inclusive=True):
+        """Return the positions in numbers of the values within bounds.
+
+        The values are numbers[start:stop] for the (start, stop) pair
+        returned; see range() for the arguments.
+        """
+        start, stop = 0, len(self.numbers)
+        if low is not None:
+            bisect = bisect_left if low_inclusive else bisect_right
+            start = bisect(self.numbers, low)
+        if high is not None:
+            bisect = bisect_right if high_inclusive else bisect_left
+            stop = bisect(self.numbers, high)
+        return start, max(start, stop)
+
+    def range(self, low=None, high=None, low_inclusive=True,
+              high_inclusive=True, reverse=False):
+        """Yield the keys whose value is within low and high, in order.
+
+        Args:
+            low (int or float): The lower bound, None for no bound.
+            high (int or float): The upper bound, None for no bound.
+            low_inclusive (bool): If False, low itself is excluded.
+            high_inclusive (bool): If False, high itself is excluded.
+            reverse (bool): If True, yield in descending order.
+        """
+        start, stop = self.span(low, high, low_inclusive, high_inclusive)
+        if reverse:
+            for i in range(stop - 1, start - 1, -1):
+                yield self.order[i]
+        else:
+            for i in range(start, stop):
+                yield self.order[i]
+
+    def ordered(self, reverse=False):
+        """Yield every key, numbers first then the others by str().
+
+        Args:
+            reverse (bool): If True, yield in the exact opposite order.
+        """
+        others = sorted(self.others, key=lambda k: str(self.values[k]),
+                        reverse=reverse)
+        if reverse:
+            yield from others
+        yield from self.range(reverse=reverse)
+        if not reverse:
+            yield from others
+
+
+class GridIndex:
+    """Represent a uniform grid index of latitude/longitude points.
+
+    The globe is cut into square cells of a fixed number of degrees, and
+    a box or radius query only visits the keys of the cells it overlaps.
+    Values that are not a (latitude, longitude) pair of numbers within
+    range are remembered but never found.
+
+    Attributes:
+        earth_radius (float): The mean radius of the Earth, in km.
+        cell (float): The side of a cell, in degrees.
+        cells (dict): The keys of each cell, by (row, column), each as a
+            dict of None values used as an ordered set.
+        values (dict): The indexed value of each key.
+    """
+    earth_radius = 6371.0088
+
+    def __init__(self, cell=0.1):
+        """Initialize a new, empty GridIndex.
+
+        Args:
+            cell (float): The side of a cell, in degrees.
+        """
+        self.cell = cell
+        self.cells = {}
+        self.values = {}
+
+    @staticmethod
+    def is_point(value):
+        """Return True if value is a valid (latitude, longitude) pair."""
+        try:
+            lat, lon = value
+        except (TypeError, ValueError):
+            return False
+        return (SortedIndex.is_number(lat) and SortedIndex.is_number(lon)
+                and -90 <= lat <= 90 and -180 <= lon <= 180)
+
+    @classmethod
+    def distance(cls, lat1, lon1, lat2, lon2):
+        """Return the great-circle distance between two points, in km."""
+        lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+        h = (math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) *
+             math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+        return 2 * cls.earth_radius * math.asin(min(1.0, math.sqrt(h)))
+
+    def add(self, key, value):
+        """Index key under the point value, replacing its previous one."""
+        if key in self.values:
+            if self.values[key] == value:
+                return
+            self.discard(key)
+        self.values[key] = value
+        if self.is_point(value):
+            self.cells.setdefault(self.__cell(*value), {})[key] = None
+
+    def discard(self, key):
+        """Remove key from the index if it is there."""
+        if key not in self.values:
+            return
+        value = self.values.pop(key)
+        if not self.is_point(value):
+            return
+        cell = self.__cell(*value)
+        bucket = self.cells[cell]
+        del bucket[key]
+        if not bucket:
+            del self.cells[cell]
+
+    def bbox(self, south, west, north, east):
+        """Yield the keys whose point lies within a box, edges included.
+
+        A box whose west edge is greater than its east edge crosses the
+        antimeridian.
+
+        Args:
+            south (float): The southern latitude.
+            west (float): The western longitude.
+            north (float): The northern latitude.
+            east (float): The eastern longitude.
+        """
+        spans = [(west, east)] if west <= east else [(west, 180.0),
+                                                     (-180.0, east)]
+        top, bottom = self.__cell(north, 0)[0], self.__cell(south, 0)[0]
+        for west, east in spans:
+            left, right = self.__cell(0, west)[1], self.__cell(0, east)[1]
+            if (top - bottom + 1) * (right - left + 1) > len(self.cells):
+                cells = [c for c in self.cells
+                         if bottom <= c[0] <= top and left <= c[1] <= right]
+            else:
+                cells = [(row, col) for row in range(bottom, top + 1)
+                         for col in range(left, right + 1)]
+            for cell in cells:
+                for key in list(self.cells.get(cell, ())):
+                    lat, lon = self.values[key]
+                    if south <= lat <= north and west <= lon <= east:
+                        yield key
+
+    def radius(self, lat, lon, km):
+        """Return the keys within km of a point, nearest first.
+
+        Args:
+            lat (float): The latitude of the point.
+            lon (float): The longitude of the point.
+            km (float): The distance, in km.
+        """
+        angle = km / self.earth_radius
+        south = max(-90.0, lat - math.degrees(angle))
+        north = min(90.0, lat + math.degrees(angle))
+        west, east = -180.0, 180.0
+        if south > -90 and north < 90:
+            ratio = math.sin(angle) / math.cos(math.radians(lat))
+            if ratio < 1:
+                spread = math.degrees(math.asin(ratio))
+                west, east = lon - spread, lon + spread
+                if west < -180:
+                    west += 360
+                if east > 180:
+                    east -= 360
+        found = []
+        for key in self.bbox(south, west, north, east):
+            dist = self.distance(lat, lon, *self.values[key])
+            if dist <= km:
+                found.append((dist, key))
+        found.sort(key=lambda item: item[0])
+        return [key for dist, key in found]
+
+    def __cell(self, lat, lon):
+        """Return the (row, column) of the cell holding a point."""
+        return (math.floor(lat / self.cell), math.floor(lon / self.cell))
@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+"""Defines incremental reading and writing of a JSON object of records.
+
+The whole document is never held in memory: load_items() parses one
+key/value pair at a time from a file and dump_items() writes pairs whose
+values are already encoded.
+"""
+import json
+import re
+
+BINARY = False
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def encode(o):
+    """Return the encoding of the record o for dump_items(), its JSON."""
+    return json.dumps(o)
+
+
+def load_items(f, size=1 << 16):
+    """Yield the key/value pairs of the JSON object in the file f.
+
+    Args:
+        f (file): A file opened for reading text.
+        size (int): The number of characters read at a time.
+    Raises:
+        json.JSONDecodeError: If the file is not a JSON object.
+    """
+    decoder = json.JSONDecoder()
+    buf = f.read(size)
+    pos = 0
+    eof = False
+    expect = "{"
+    key = None
+    while True:
+        pos = WHITESPACE.match(buf, pos).end()
+        if pos == len(buf) and not eof:
+            buf, pos = f.read(size), 0
+            eof = buf == ""
+            continue
+        char = buf[pos:pos + 1]
+        if expect == "{" or expect == ":":
+            if char != expect:
+                raise json.JSONDecodeError(
+                    "Expecting '{}' delimiter".format(expect), buf, pos)
+            pos += 1
+            expect = "key or }" if expect == "{" else "value"
+        elif expect == ", or }" or (expect == "key or }" and char == "}"):
+            if char == "}":
+                return
+            if char != ",":
+                raise json.JSONDecodeError(
+                    "Expecting ',' delimiter", buf, pos)
+            pos += 1
+            expect = "key"
+        else:
+            if expect != "value" and char != '"':
+                raise json.JSONDecodeError(
+                    "Expecting property name enclosed in double quotes",
+                    buf, pos)
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                end = len(buf)
+            if end == len(buf) and not eof:
+                more = f.read(size)
+                eof = more == ""
+                buf, pos = buf[pos:] + more, 0
+                continue
+            pos = end
+            if expect == "value":
+                yield key, value
+                expect = ", or }"
+            else:
+                key = value
+                expect = ":"
+
+
+def load_record(data, offset, length, context, plans):
+    """Return the record encoded in data at offset, as dump_items() gave.
+
+    Args:
+        data (bytes or mmap): The whole file.
+        offset (int): The position of the record in data.
+        length (int): The size of the record, in bytes.
+        context (int): Unused, JSON records stand alone.
+        plans (dict): Unused.
+    Raises:
+        json.JSONDecodeError: If there is no JSON value there.
+    """
+    return json.loads(data[offset:offset + length])
+
+
+def dump_items(items, f, positions=None):
+    """Write the pairs of items to the file f as one JSON object.
+
+    Args:
+        items (iterable): Pairs of a key and its value already encoded
+            to JSON.
+        f (file): A file opened for writing text.
+        positions (list): If given, the key, offset, length and context
+            of each record are appended to it, for load_record(); the
+            encodings being ASCII, offsets in characters are in bytes.
+    """
+    f.write("{")
+    sep = ""
+    pos = 1
+    for key, fragment in items:
+        head = "{}{}: ".format(sep, json.dumps(key))
+        f.write(head + fragment)
+        if positions is not None:
+            positions.append((key, pos + len(head), len(fragment), 0))
+        pos += len(head) + len(fragment)
+        sep = ", "
+    f.write("}")
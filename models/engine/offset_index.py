@@ -0,0 +1,200 @@
+#!/usr/bin/python3
+"""Defines the OffsetIndex class.
+
+An offset index file tells where each record of a snapshot file lies, so
+one record is read from the memory-mapped snapshot without parsing the
+rest. It is laid out as:
+
+    MAGIC
+    HEADER  inode, size and modification time of the snapshot indexed,
+            slot count, position and size of the class table
+    slots   the CRC-32 of a key and the position of its entry, 0 if
+            empty, in an open addressing hash table of linear probing
+    entries the offset, length and context of a record in the snapshot,
+            then its key, grouped by class
+    table   a JSON object of the first and end entry positions and the
+            entry count of each class name
+
+The snapshot itself is unchanged; the index only matches the snapshot
+whose inode, size and modification time it was written for.
+"""
+import json
+import mmap
+import struct
+import zlib
+from os import fstat
+from os import fsync
+
+MAGIC = b"HBNBIDX\x01"
+HEADER = struct.Struct("<qqqqqq")
+SLOT = struct.Struct("<IQ")
+ENTRY = struct.Struct("<QQQH")
+
+
+class OffsetIndex:
+    """Represent the offset index of a snapshot file, both mapped.
+
+    Attributes:
+        serializer (module): The serializer of the snapshot format,
+            whose load_record() decodes one record.
+        data (mmap.mmap): The mapped snapshot.
+        table (mmap.mmap): The mapped index.
+        slots (int): The number of slots, a power of two.
+        classes (dict): The first and end entry positions and the entry
+            count of each class name.
+        plans (dict): What serializer keeps to decode records of data.
+    """
+
+    def __init__(self, name, snapshot, serializer):
+        """Map the index file name of the snapshot file snapshot.
+
+        Args:
+            name (str): The name of the index file.
+            snapshot (str): The name of the snapshot file.
+            serializer (module): The serializer of the snapshot format.
+        Raises:
+            FileNotFoundError: If either file is missing.
+            ValueError: If the index is invalid or not the one of the
+                snapshot as it is now.
+        """
+        self.serializer = serializer
+        self.data = None
+        self.table = None
+        self.plans = {}
+        with open(name, "rb") as f:
+            if fstat(f.fileno()).st_size < len(MAGIC) + HEADER.size:
+                raise ValueError("not an offset index")
+            self.table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if self.table[:len(MAGIC)] != MAGIC:
+                raise ValueError("not an offset index")
+            (inode, size, mtime, self.slots, start,
+             length) = HEADER.unpack_from(self.table, len(MAGIC))
+            if start + length != len(self.table):
+                raise ValueError("truncated offset index")
+            self.classes = json.loads(self.table[start:start + length])
+            with open(snapshot, "rb") as f:
+                stat = fstat(f.fileno())
+                if (stat.st_ino, stat.st_size,
+                        stat.st_mtime_ns) != (inode, size, mtime):
+                    raise ValueError("stale offset index")
+                self.data = mmap.mmap(f.fileno(), 0,
+                                      access=mmap.ACCESS_READ)
+        except Exception:
+            self.close()
+            raise
+
+    def __len__(self):
+        """Return the number of records indexed."""
+        return sum(count for first, end, count in self.classes.values())
+
+    def __contains__(self, key):
+        """Return True if the record of key is indexed."""
+        return self.find(key) is not None
+
+    def find(self, key):
+        """Return the offset, length and context of the record of key.
+
+        None is returned if key is not indexed.
+        """
+        raw = key.encode()
+        crc = zlib.crc32(raw)
+        mask = self.slots - 1
+        base = len(MAGIC) + HEADER.size
+        i = crc & mask
+        while True:
+            found, pos = SLOT.unpack_from(self.table, base + i * SLOT.size)
+            if pos == 0:
+                return None
+            if found == crc:
+                offset, length, context, size = ENTRY.unpack_from(
+                    self.table, pos)
+                start = pos + ENTRY.size
+                if self.table[start:start + size] == raw:
+                    return offset, length, context
+            i = (i + 1) & mask
+
+    def get(self, key):
+        """Return the record of key read from the snapshot, or None.
+
+        Raises:
+            ValueError: If the snapshot does not hold a record there.
+        """
+        entry = self.find(key)
+        if entry is None:
+            return None
+        return self.serializer.load_record(self.data, *entry, self.plans)
+
+    def keys(self, cls_name=None):
+        """Yield the keys indexed, or the keys of class cls_name.
+
+        Args:
+            cls_name (str): The class name of the keys to yield.
+        """
+        if cls_name is None:
+            spans = self.classes.values()
+        else:
+            spans = [self.classes.get(cls_name, (0, 0, 0))]
+        table = self.table
+        for pos, end, count in spans:
+            while pos < end:
+                size = ENTRY.unpack_from(table, pos)[3]
+                pos += ENTRY.size
+                yield str(table[pos:pos + size], "utf-8")
+                pos += size
+
+    def close(self):
+        """Unmap both files."""
+        for mapped in (self.data, self.table):
+            if mapped is not None:
+                mapped.close()
+        self.data = self.table = None
+
+    @staticmethod
+    def write(name, snapshot, positions):
+        """Write the index file name of the records of snapshot.
+
+        Args:
+            name (str): The name of the index file.
+            snapshot (str): The name of the snapshot file, written and
+                closed already, whose inode is kept if it is renamed.
+            positions (list): The key, offset, length and context of each
+                record, as appended by dump_items().
+        """
+        slots = 1
+        while slots < 2 * len(positions):
+            slots <<= 1
+        mask = slots - 1
+        groups = {}
+        for item in positions:
+            groups.setdefault(item[0].split(".", 1)[0], []).append(item)
+        table = bytearray(slots * SLOT.size)
+        entries = bytearray()
+        classes = {}
+        base = len(MAGIC) + HEADER.size
+        start = base + len(table)
+        for cls_name, items in groups.items():
+            first = start + len(entries)
+            for key, offset, length, context in items:
+                raw = key.encode()
+                crc = zlib.crc32(raw)
+                i = crc & mask
+                while SLOT.unpack_from(table, i * SLOT.size)[1]:
+                    i = (i + 1) & mask
+                SLOT.pack_into(table, i * SLOT.size, crc,
+                               start + len(entries))
+                entries += ENTRY.pack(offset, length, context, len(raw))
+                entries += raw
+            classes[cls_name] = (first, start + len(entries), len(items))
+        footer = json.dumps(classes).encode()
+        with open(snapshot, "rb") as f:
+            stat = fstat(f.fileno())
+        with open(name, "wb") as f:
+            f.write(MAGIC)
+            f.write(HEADER.pack(stat.st_ino, stat.st_size, stat.st_mtime_ns,
+                                slots, start + len(entries), len(footer)))
+            f.write(table)
+            f.write(entries)
+            f.write(footer)
+            f.flush()
+            fsync(f.fileno())
@@ -0,0 +1,145 @@
+#!/usr/bin/python3
+"""Defines the ReadWriteLock and Hold classes."""
+import threading
+
+
+class ReadWriteLock:
+    """Represent a lock held shared by readers or exclusive by a writer.
+
+    Holds nest within a thread as the holds of a FileLock do: a shared
+    hold inside any other costs no waiting, and an exclusive hold inside
+    a shared one upgrades the lock until it ends. The upgrade is not
+    atomic, another writer may run in between. Waiting writers go before
+    new readers, so a steady flow of readers cannot starve them.
+
+    Attributes:
+        mutex (threading.Lock): Guards the counts below.
+        cond (threading.Condition): Waited on, with mutex, by the threads
+            that cannot hold the lock yet.
+        sleeping (int): The number of threads waiting on cond.
+        readers (int): The number of threads holding the lock shared.
+        writing (bool): True while a thread holds the lock exclusive.
+        waiting (int): The number of threads waiting to hold it
+            exclusive.
+        local (threading.local): The modes held, innermost last, of the
+            current thread.
+    """
+
+    def __init__(self):
+        """Initialize a new ReadWriteLock, not held."""
+        self.mutex = threading.Lock()
+        self.cond = threading.Condition(self.mutex)
+        self.sleeping = 0
+        self.readers = 0
+        self.writing = False
+        self.waiting = 0
+        self.local = threading.local()
+        self.__holds = (Hold(self, False), Hold(self, True))
+
+    def hold(self, exclusive=True):
+        """Return a context holding the lock, shared or exclusive.
+
+        Args:
+            exclusive (bool): If False, only hold the lock shared.
+        """
+        return self.__holds[exclusive is not False]
+
+    def held(self, exclusive=False):
+        """Return True if the current thread holds the lock.
+
+        Args:
+            exclusive (bool): If True, only an exclusive hold counts.
+        """
+        modes = getattr(self.local, "modes", None)
+        if not modes:
+            return False
+        return modes[-1] or not exclusive
+
+    def acquire(self, exclusive):
+        """Wait until the lock is held, shared or exclusive."""
+        with self.mutex:
+            if exclusive:
+                self.waiting += 1
+                try:
+                    while self.writing or self.readers:
+                        self.sleep()
+                finally:
+                    self.waiting -= 1
+                self.writing = True
+            else:
+                while self.writing or self.waiting:
+                    self.sleep()
+                self.readers += 1
+
+    def release(self, exclusive):
+        """Release a hold taken by acquire(), shared or exclusive."""
+        with self.mutex:
+            if exclusive:
+                self.writing = False
+            else:
+                self.readers -= 1
+            if self.sleeping:
+                self.cond.notify_all()
+
+    def sleep(self):
+        """Wait on cond until woken up by a release; mutex must be held."""
+        self.sleeping += 1
+        try:
+            self.cond.wait()
+        finally:
+            self.sleeping -= 1
+
+
+class Hold:
+    """Represent a hold of a ReadWriteLock, as a reusable context.
+
+    One Hold of each mode serves every thread: the modes held are kept
+    by the lock per thread.
+
+    Attributes:
+        lock (ReadWriteLock): The lock held.
+        exclusive (bool): If False, the lock is only held shared.
+    """
+
+    def __init__(self, lock, exclusive):
+        """Initialize a new Hold.
+
+        Args:
+            lock (ReadWriteLock): The lock to hold.
+            exclusive (bool): If False, only hold the lock shared.
+        """
+        self.lock = lock
+        self.exclusive = exclusive
+
+    def __enter__(self):
+        """Hold the lock, waiting for it unless already held enough."""
+        lock = self.lock
+        try:
+            modes = lock.local.modes
+        except AttributeError:
+            modes = lock.local.modes = []
+        outer = modes[-1] if modes else None
+        mode = self.exclusive or outer is True
+        if mode != outer:
+            if outer is not None:
+                lock.release(outer)
+            try:
+                lock.acquire(mode)
+            except BaseException:
+                if outer is not None:
+                    lock.acquire(outer)
+                raise
+        modes.append(mode)
+        return lock
+
+    def __exit__(self, *exc):
+        """Release the lock, or go back to the mode held outside."""
+        lock = self.lock
+        modes = lock.local.modes
+        mode = modes.pop()
+        outer = modes[-1] if modes else None
+        if mode != outer:
+            lock.release(mode)
+            if outer is not None:
+                lock.acquire(outer)
+        return False
@@ -1,5 +1,6 @@
 #!/usr/bin/python3
 """Defines the Place class."""
+import models
 from models.base_model import BaseModel
 
 
@@ -31,3 +32,32 @@ class Place(BaseModel):
     lati = 0.0
     priceByNight= 0
     long = 0.0
+
+    @property
+    def reviews(self):
+        """Return the list of Review instances of the Place."""
+        return models.storage.lookup("Review", "idPlace", self.id)
+
+    @classmethod
+    def near(cls, lati, long, km, limit=None):
+        """Return the places within km kilometres of a point, nearest first.
+
+        Args:
+            lati (float): The latitude of the point.
+            long (float): The longitude of the point.
+            km (float): The distance, in kilometres.
+            limit (int): The maximum number of places, if any.
+        """
+        return models.storage.near(cls, lati, long, km, limit)
+
+    @classmethod
+    def within(cls, south, west, north, east):
+        """Return the places within a box of latitudes and longitudes.
+
+        Args:
+            south (float): The southern latitude.
+            west (float): The western longitude.
+            north (float): The northern latitude.
+            east (float): The eastern longitude.
+        """
+        return models.storage.within(cls, south, west, north, east)
@@ -1,5 +1,6 @@
 #!/usr/bin/python3
 """Defines the State class."""
+import models
 from models.base_model import BaseModel
 
 
@@ -11,3 +12,8 @@ class State(BaseModel):
     """
 
     name = ""
+
+    @property
+    def cities(self):
+        """Return the list of City instances of the State."""
+        return models.storage.lookup("City", "stat_id", self.id)
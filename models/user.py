@@ -1,5 +1,6 @@
 #!/usr/bin/python3
 """Defines the User class."""
+import models
 from models.base_model import BaseModel
 
 
@@ -17,3 +18,13 @@ class User(BaseModel):
     usrPassword = ""
     firstName = ""
     lastName = ""
+
+    @property
+    def places(self):
+        """Return the list of Place instances owned by the User."""
+        return models.storage.lookup("Place", "idUser", self.id)
+
+    @property
+    def reviews(self):
+        """Return the list of Review instances written by the User."""
+        return models.storage.lookup("Review", "idUser", self.id)
@@ -0,0 +1,296 @@
+#!/usr/bin/python3
+"""Defines unittests for api/v1/app.py.
+
+Unittest classes:
+    TestAPI_helpers
+    TestAPI_objects
+    TestAPI_lists
+    TestAPI_http
+"""
+import os
+import json
+import socket
+import asyncio
+import models
+import threading
+import unittest
+from datetime import timedelta
+from http.client import HTTPConnection
+from io import StringIO
+from unittest.mock import patch
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.state import State
+from models.user import User
+from api.v1.app import API
+from api.v1.app import etag_of
+from api.v1.app import matches_etag
+from api.v1.app import route_name
+
+
+class TestAPI_helpers(unittest.TestCase):
+    """Unittests for testing the helper functions of the API."""
+
+    def test_route_name(self):
+        self.assertEqual("places", route_name("Place"))
+        self.assertEqual("cities", route_name("City"))
+        self.assertEqual("amenities", route_name("Amenity"))
+        self.assertEqual("base_models", route_name("BaseModel"))
+
+    def test_etag_changes_with_upd_at(self):
+        us = User()
+        etag = etag_of([us])
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertEqual(etag, etag_of([us]))
+        us.upd_at = us.upd_at + timedelta(seconds=1)
+        self.assertNotEqual(etag, etag_of([us]))
+
+    def test_matches_etag(self):
+        self.assertTrue(matches_etag('W/"a"', 'W/"a"'))
+        self.assertTrue(matches_etag('"b", "a"', 'W/"a"'))
+        self.assertTrue(matches_etag("*", 'W/"a"'))
+        self.assertFalse(matches_etag('W/"b"', 'W/"a"'))
+        self.assertFalse(matches_etag(None, 'W/"a"'))
+
+
+class APITestCase(unittest.TestCase):
+    """Serve the API of models.storage from another thread."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.loop = asyncio.new_event_loop()
+        cls.server = cls.loop.run_until_complete(asyncio.start_server(
+            API(models.storage).connection, "127.0.0.1", 0))
+        cls.port = cls.server.sockets[0].getsockname()[1]
+        cls.thread = threading.Thread(target=cls.loop.run_forever,
+                                      daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.thread.join(5)
+        cls.server.close()
+        cls.loop.run_until_complete(cls.server.wait_closed())
+        cls.loop.close()
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        models.storage.clear()
+        self.conn = HTTPConnection("127.0.0.1", self.port, timeout=5)
+
+    def tearDown(self):
+        self.conn.close()
+        FileStorage._FileStorage__threaded = False
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def get(self, path, headers={}, method="GET"):
+        self.conn.request(method, path, headers=headers)
+        response = self.conn.getresponse()
+        body = response.read()
+        return response, json.loads(body) if body else None
+
+
+class TestAPI_objects(APITestCase):
+    """Unittests for testing getting one object from the API."""
+
+    def test_get(self):
+        st = State()
+        st.name = "California"
+        response, body = self.get("/api/v1/states/" + st.id)
+        self.assertEqual(200, response.status)
+        self.assertEqual(st.to_dict(), body)
+        self.assertEqual("application/json",
+                         response.getheader("Content-Type"))
+        self.assertEqual(etag_of([st]), response.getheader("ETag"))
+
+    def test_not_found(self):
+        for path in ("/api/v1/states/1", "/api/v1/nothing",
+                     "/api/v1/states/1/cities", "/index.html"):
+            response, body = self.get(path)
+            self.assertEqual(404, response.status)
+            self.assertEqual({"error": "Not Found"}, body)
+
+    def test_not_modified(self):
+        us = User()
+        response, body = self.get("/api/v1/users/" + us.id)
+        etag = response.getheader("ETag")
+        response, body = self.get("/api/v1/users/" + us.id,
+                                  {"If-None-Match": etag})
+        self.assertEqual(304, response.status)
+        self.assertIsNone(body)
+        us.save()
+        response, body = self.get("/api/v1/users/" + us.id,
+                                  {"If-None-Match": etag})
+        self.assertEqual(200, response.status)
+        self.assertNotEqual(etag, response.getheader("ETag"))
+
+    def test_status_and_stats(self):
+        User()
+        Place()
+        Place()
+        self.assertEqual({"status": "OK"}, self.get("/api/v1/status")[1])
+        stats = self.get("/api/v1/stats")[1]
+        self.assertEqual(1, stats["users"])
+        self.assertEqual(2, stats["places"])
+        self.assertEqual(0, stats["cities"])
+
+
+class TestAPI_lists(APITestCase):
+    """Unittests for testing listing objects from the API."""
+
+    def setUp(self):
+        super().setUp()
+        self.places = []
+        for price, guests in ((50, 2), (150, 6), (80, 4), (90, 8)):
+            pl = Place()
+            pl.priceByNight = price
+            pl.maxGuest = guests
+            self.places.append(pl)
+        State()
+
+    def ids(self, body):
+        return [obj["id"] for obj in body["results"]]
+
+    def test_list(self):
+        response, body = self.get("/api/v1/places")
+        self.assertEqual(200, response.status)
+        self.assertEqual([pl.id for pl in self.places], self.ids(body))
+        self.assertEqual(0, body["offset"])
+        self.assertEqual(25, body["limit"])
+        self.assertIsNone(body["next"])
+
+    def test_filter(self):
+        pl = self.places
+        response, body = self.get(
+            "/api/v1/places?priceByNight%3C100&maxGuest>=4")
+        self.assertEqual([pl[2].id, pl[3].id], self.ids(body))
+        response, body = self.get("/api/v1/places?maxGuest=4")
+        self.assertEqual([pl[2].id], self.ids(body))
+
+    def test_order(self):
+        pl = self.places
+        response, body = self.get("/api/v1/places?order=priceByNight")
+        self.assertEqual([pl[0].id, pl[2].id, pl[3].id, pl[1].id],
+                         self.ids(body))
+        response, body = self.get("/api/v1/places?order=-maxGuest")
+        self.assertEqual([pl[3].id, pl[1].id, pl[2].id, pl[0].id],
+                         self.ids(body))
+
+    def test_pages(self):
+        pl = self.places
+        response, body = self.get("/api/v1/places?order=priceByNight"
+                                  "&limit=3")
+        self.assertEqual([pl[0].id, pl[2].id, pl[3].id], self.ids(body))
+        self.assertEqual("/api/v1/places?order=priceByNight&limit=3"
+                         "&offset=3", body["next"])
+        response, body = self.get(body["next"])
+        self.assertEqual([pl[1].id], self.ids(body))
+        self.assertEqual(3, body["offset"])
+        self.assertIsNone(body["next"])
+
+    def test_not_modified(self):
+        response, body = self.get("/api/v1/places?limit=2")
+        etag = response.getheader("ETag")
+        response, body = self.get("/api/v1/places?limit=2",
+                                  {"If-None-Match": etag})
+        self.assertEqual(304, response.status)
+        self.places[1].save()
+        response, body = self.get("/api/v1/places?limit=2",
+                                  {"If-None-Match": etag})
+        self.assertEqual(200, response.status)
+
+    def test_more_changes_etag(self):
+        etag = self.get("/api/v1/places?limit=4")[0].getheader("ETag")
+        Place()
+        self.assertNotEqual(
+            etag, self.get("/api/v1/places?limit=4")[0].getheader("ETag"))
+
+    def test_bad_query(self):
+        for query in ("maxGuest=many", "limit=0", "limit=101",
+                      "offset=-1", "maxGuest", "maxGuest~3"):
+            response, body = self.get("/api/v1/places?" + query)
+            self.assertEqual(400, response.status, query)
+            self.assertIn("invalid condition", body["error"])
+
+
+class TestAPI_http(APITestCase):
+    """Unittests for testing the HTTP handling of the API."""
+
+    def raw(self, data):
+        with socket.create_connection(("127.0.0.1", self.port), 5) as sock:
+            sock.sendall(data)
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    return b"".join(chunks)
+                chunks.append(chunk)
+
+    def test_keep_alive(self):
+        us = User()
+        for i in range(5):
+            response, body = self.get("/api/v1/users/" + us.id)
+            self.assertEqual(200, response.status)
+            self.assertEqual("keep-alive", response.getheader("Connection"))
+        sock = self.conn.sock
+        self.get("/api/v1/users")
+        self.assertIs(sock, self.conn.sock)
+
+    def test_pipelined(self):
+        request = b"GET /api/v1/status HTTP/1.1\r\nHost: x\r\n\r\n"
+        data = self.raw(request * 3 + b"GET /api/v1/status HTTP/1.1\r\n"
+                        b"Connection: close\r\n\r\n")
+        self.assertEqual(4, data.count(b"HTTP/1.1 200 OK"))
+        self.assertTrue(data.endswith(b'{"status": "OK"}'))
+
+    def test_http_1_0_closes(self):
+        data = self.raw(b"GET /api/v1/status HTTP/1.0\r\n\r\n")
+        self.assertTrue(data.startswith(b"HTTP/1.1 200 OK"))
+        self.assertIn(b"Connection: close", data)
+
+    def test_head(self):
+        response, body = self.get("/api/v1/status", method="HEAD")
+        self.assertEqual(200, response.status)
+        self.assertIsNone(body)
+        self.assertEqual("16", response.getheader("Content-Length"))
+
+    def test_method_not_allowed(self):
+        self.conn.request("POST", "/api/v1/users", body=b'{"a": 1}')
+        response = self.conn.getresponse()
+        self.assertEqual(405, response.status)
+        self.assertEqual("GET, HEAD", response.getheader("Allow"))
+        response.read()
+        self.assertEqual(200, self.get("/api/v1/status")[0].status)
+
+    def test_bad_request(self):
+        data = self.raw(b"NONSENSE\r\n\r\n")
+        self.assertTrue(data.startswith(b"HTTP/1.1 400 Bad Request"))
+        self.assertIn(b"Connection: close", data)
+
+    def test_internal_error(self):
+        with patch.object(API, "route", side_effect=OSError("disk")), \
+                patch("sys.stderr", new=StringIO()) as stderr:
+            response, body = self.get("/api/v1/users")
+        self.assertEqual(500, response.status)
+        self.assertEqual({"error": "Internal Server Error"}, body)
+        self.assertEqual("close", response.getheader("Connection"))
+        self.assertIn("OSError: disk", stderr.getvalue())
+        self.conn.close()
+        self.assertEqual(200, self.get("/api/v1/status")[0].status)
+
+
+if __name__ == "__main__":
+    unittest.main()
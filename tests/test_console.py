@@ -10,11 +10,28 @@ Unittest classes:
     TestHBNBCommand_all
     TestHBNBCommand_destroy
     TestHBNBCommand_update
+    TestHBNBCommand_class_index
+    TestHBNBCommand_related
+    TestHBNBCommand_where
+    TestHBNBCommand_spatial
+    TestHBNBCommand_stats
+    TestHBNBCommand_classes
+    TestHBNBCommand_bulk_create
+    TestHBNBCommand_import_export
+    TestHBNBCommand_sync
+    TestHBNBCommand_convert
+    TestHBNBCommand_shared
 """
+import csv
+import json
 import os
 import sys
+import models
 import unittest
 from models import storage
+from models.base_model import BaseModel
+from models.engine import columns
+from models.engine.file_storage import ConflictError
 from models.engine.file_storage import FileStorage
 from console import HBNBCommand
 from io import StringIO
@@ -116,6 +133,17 @@ class TestHBNBCommand_exit(unittest.TestCase):
         with patch("sys.stdout", new=StringIO()) as output:
             self.assertTrue(HBNBCommand().onecmd("EOF"))
 
+    def test_quit_syncs(self):
+        with patch.object(storage, "sync") as sync:
+            self.assertTrue(HBNBCommand().onecmd("quit_cmd"))
+        sync.assert_called_once_with()
+
+    def test_EOF_syncs(self):
+        with patch("sys.stdout", new=StringIO()):
+            with patch.object(storage, "sync") as sync:
+                self.assertTrue(HBNBCommand().onecmd("EOF_signal"))
+        sync.assert_called_once_with()
+
 
 class TestHBNBCommand_create(unittest.TestCase):
     """Unittests for testing create from the HBNB command interpreter."""
@@ -130,10 +158,11 @@ class TestHBNBCommand_create(unittest.TestCase):
 
     @classmethod
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -212,10 +241,11 @@ class TestHBNBCommand_show(unittest.TestCase):
 
     @classmethod
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -465,10 +495,11 @@ class TestHBNBCommand_destroy(unittest.TestCase):
 
     @classmethod
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -719,10 +750,11 @@ class TestHBNBCommand_all(unittest.TestCase):
 
     @classmethod
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -865,10 +897,11 @@ class TestHBNBCommand_update(unittest.TestCase):
 
     @classmethod
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -1510,14 +1543,15 @@ class TestHBNBCommand_count(unittest.TestCase):
             os.rename("file.json", "tmp")
         except IOError:
             pass
-        FileStorage._FileStorage__objects = {}
+        storage.clear()
 
     @classmethod
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -1566,5 +1600,796 @@ class TestHBNBCommand_count(unittest.TestCase):
             self.assertEqual("1", output.getvalue().strip())
 
 
+class TestHBNBCommand_class_index(unittest.TestCase):
+    """Unittests for testing class-scoped commands on the storage index."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        storage.clear()
+
+    def tearDown(self):
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        storage.clear()
+
+    def test_countInstant_uses_class_index(self):
+        for cmd in ("createInstant User", "createInstant User",
+                    "createInstant Review"):
+            with patch("sys.stdout", new=StringIO()):
+                HBNBCommand().onecmd(cmd)
+        with patch("sys.stdout", new=StringIO()) as output:
+            with patch.object(FileStorage, "all") as all_objects:
+                self.assertFalse(HBNBCommand().onecmd("countInstant User"))
+            all_objects.assert_not_called()
+            self.assertEqual("2", output.getvalue().strip())
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("countInstant"))
+            self.assertEqual("3", output.getvalue().strip())
+
+    def test_allInstant_with_class(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("createInstant User")
+            testID = output.getvalue().strip()
+        with patch("sys.stdout", new=StringIO()):
+            HBNBCommand().onecmd("createInstant Place")
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("allInstant User"))
+            self.assertIn("[User] ({})".format(testID), output.getvalue())
+            self.assertNotIn("[Place]", output.getvalue())
+
+
+class TestHBNBCommand_related(unittest.TestCase):
+    """Unittests for testing related from the HBNB command interpreter."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        storage.clear()
+
+    def tearDown(self):
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        storage.clear()
+
+    def create(self, cls):
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("createInstant {}".format(cls))
+        return output.getvalue().strip()
+
+    def test_related_errors(self):
+        stID = self.create("State")
+        for command, correct in (
+                ("relatedInstant", "** class name missing **"),
+                ("relatedInstant MyModel", "** class doesn't exist **"),
+                ("relatedInstant State", "** instance id missing **"),
+                ("relatedInstant State 1", "** no instance found **"),
+                ("relatedInstant State " + stID,
+                 "** relation name missing **"),
+                ("relatedInstant State {} name".format(stID),
+                 "** relation doesn't exist **")):
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd(command))
+                self.assertEqual(correct, output.getvalue().strip())
+
+    def test_related_cities(self):
+        stID = self.create("State")
+        cyID = self.create("City")
+        self.create("City")
+        with patch("sys.stdout", new=StringIO()):
+            HBNBCommand().onecmd(
+                "updateInstant City {} stat_id {}".format(cyID, stID))
+        with patch("sys.stdout", new=StringIO()) as output:
+            command = "relatedInstant State {} cities".format(stID)
+            self.assertFalse(HBNBCommand().onecmd(command))
+            result = output.getvalue()
+        self.assertIn("[City] ({})".format(cyID), result)
+        self.assertEqual(1, result.count("[City]"))
+
+    def test_relation_cannot_be_updated(self):
+        stID = self.create("State")
+        for command in ("updateInstant State {} cities x",
+                        "updateInstant State {} "
+                        "{{'name': 'a', 'cities': 'x'}}"):
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd(command.format(stID)))
+                self.assertEqual("** attribute can't be set **",
+                                 output.getvalue().strip())
+        state = storage.all()["State." + stID]
+        self.assertEqual([], state.cities)
+        self.assertNotIn("name", state.__dict__)
+
+
+class TestHBNBCommand_where(unittest.TestCase):
+    """Unittests for testing where from the HBNB command interpreter."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        storage.clear()
+        self.ids = []
+        for price, guests in ((50, 2), (150, 6), (80, 4), (90, 8)):
+            with patch("sys.stdout", new=StringIO()) as output:
+                HBNBCommand().onecmd("createInstant Place")
+            plID = output.getvalue().strip()
+            with patch("sys.stdout", new=StringIO()):
+                HBNBCommand().onecmd("updateInstant Place {} priceByNight "
+                                     "{}".format(plID, price))
+                HBNBCommand().onecmd("updateInstant Place {} maxGuest "
+                                     "{}".format(plID, guests))
+            self.ids.append(plID)
+
+    def tearDown(self):
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        storage.clear()
+
+    def where(self, command):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(command))
+        return output.getvalue().strip()
+
+    def dot_where(self, command):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().actionDefault(command))
+        return output.getvalue().strip()
+
+    def found(self, result):
+        return [i for i in self.ids if "[Place] ({})".format(i) in result]
+
+    def test_where_errors(self):
+        for command, correct in (
+                ("whereInstant", "** class name missing **"),
+                ("whereInstant MyModel", "** class doesn't exist **"),
+                ("whereInstant Place maxGuest",
+                 "** invalid condition: maxGuest **"),
+                ("whereInstant Place maxGuest>many",
+                 "** invalid condition: maxGuest>many **"),
+                ("whereInstant Place limit=some",
+                 "** invalid condition: limit=some **")):
+            self.assertEqual(correct, self.where(command))
+
+    def test_where_no_match(self):
+        self.assertEqual("[]", self.where("whereInstant Place maxGuest>8"))
+
+    def test_where_space_notation(self):
+        result = self.where("whereInstant Place priceByNight<100 "
+                            "maxGuest >= 4")
+        self.assertEqual(self.ids[2:], self.found(result))
+        self.assertTrue(result.startswith("[") and result.endswith("]"))
+
+    def test_where_dot_notation(self):
+        result = self.dot_where(
+            "Place.where(priceByNight<100, maxGuest>=4)")
+        self.assertEqual(self.ids[2:], self.found(result))
+
+    def test_where_order_and_limit(self):
+        result = self.dot_where("Place.where(priceByNight<100, "
+                                "order=-priceByNight, limit=1)")
+        self.assertEqual([self.ids[3]], self.found(result))
+        result = self.where("whereInstant Place order=priceByNight")
+        positions = [result.index(i) for i in self.ids]
+        self.assertEqual([0, 2, 3, 1], sorted(
+            range(4), key=lambda n: positions[n]))
+
+    def test_where_follows_update(self):
+        self.where("whereInstant Place priceByNight<100")
+        with patch("sys.stdout", new=StringIO()):
+            HBNBCommand().onecmd("updateInstant Place {} priceByNight "
+                                 "20".format(self.ids[1]))
+        result = self.where("whereInstant Place priceByNight<60")
+        self.assertEqual([self.ids[0], self.ids[1]], self.found(result))
+
+
+class TestHBNBCommand_spatial(unittest.TestCase):
+    """Unittests for testing near and within from the HBNB command
+    interpreter."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        storage.clear()
+        self.ids = []
+        for lati, long in ((37.7749, -122.4194), (37.8044, -122.2712),
+                           (34.0522, -118.2437)):
+            with patch("sys.stdout", new=StringIO()) as output:
+                HBNBCommand().onecmd("createInstant Place")
+            plID = output.getvalue().strip()
+            with patch("sys.stdout", new=StringIO()):
+                HBNBCommand().onecmd("updateInstant Place {} lati "
+                                     "{}".format(plID, lati))
+                HBNBCommand().onecmd("updateInstant Place {} long "
+                                     "{}".format(plID, long))
+            self.ids.append(plID)
+
+    def tearDown(self):
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        storage.clear()
+
+    def run_command(self, command):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(command))
+        return output.getvalue().strip()
+
+    def found(self, result):
+        return sorted((result.index(i), i) for i in self.ids if i in result)
+
+    def test_spatial_errors(self):
+        for command, correct in (
+                ("nearInstant", "** class name missing **"),
+                ("withinInstant MyModel", "** class doesn't exist **"),
+                ("nearInstant Place 37.7 -122.4",
+                 "** coordinates missing **"),
+                ("withinInstant Place 37 -123 38",
+                 "** coordinates missing **"),
+                ("nearInstant User 37.7 -122.4 5",
+                 "** class has no coordinates **"),
+                ("nearInstant Place 37.7 west 5",
+                 "** invalid coordinates **"),
+                ("nearInstant Place 37.7 -122.4 5 some",
+                 "** invalid coordinates **")):
+            self.assertEqual(correct, self.run_command(command))
+
+    def test_near(self):
+        result = self.run_command("nearInstant Place 37.80 -122.27 20")
+        self.assertEqual([self.ids[1], self.ids[0]],
+                         [i for n, i in self.found(result)])
+        result = self.run_command("nearInstant Place 37.80 -122.27 20 1")
+        self.assertEqual([self.ids[1]], [i for n, i in self.found(result)])
+
+    def test_query_cannot_be_updated(self):
+        for name in ("near", "within", "save"):
+            self.assertEqual("** attribute can't be set **", self.run_command(
+                "updateInstant Place {} {} 3".format(self.ids[0], name)))
+        self.assertNotIn("near", storage.all()["Place." + self.ids[0]]
+                         .__dict__)
+        storage.save()
+        self.assertFalse(os.path.exists("file.json.tmp"))
+
+    def test_near_dot_notation(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().actionDefault("Place.near(34.05, -118.24, 5)")
+        result = output.getvalue()
+        self.assertEqual([self.ids[2]], [i for n, i in self.found(result)])
+
+    def test_within(self):
+        result = self.run_command("withinInstant Place 37 -123 38 -122")
+        self.assertEqual(self.ids[:2], [i for n, i in self.found(result)])
+        self.assertEqual("[]", self.run_command(
+            "withinInstant Place 0 0 1 1"))
+
+
+class TestHBNBCommand_stats(unittest.TestCase):
+    """Unittests for testing stats from the HBNB command interpreter."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        storage.clear()
+        for city, price in (("c1", 100), ("c2", 50), ("c1", 300)):
+            with patch("sys.stdout", new=StringIO()) as output:
+                HBNBCommand().onecmd("createInstant Place")
+            plID = output.getvalue().strip()
+            with patch("sys.stdout", new=StringIO()):
+                HBNBCommand().onecmd("updateInstant Place {} city_id "
+                                     "{}".format(plID, city))
+                HBNBCommand().onecmd("updateInstant Place {} priceByNight "
+                                     "{}".format(plID, price))
+
+    def tearDown(self):
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        storage.clear()
+
+    def run_command(self, command):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(command))
+        return output.getvalue().strip()
+
+    def test_stats_errors(self):
+        for command, correct in (
+                ("statsInstant", "** class name missing **"),
+                ("statsInstant MyModel", "** class doesn't exist **"),
+                ("statsInstant Place", "** attribute name missing **"),
+                ("statsInstant Place color",
+                 "** attribute doesn't exist **"),
+                ("statsInstant Place priceByNight mean color",
+                 "** attribute doesn't exist **"),
+                ("statsInstant Place priceByNight median",
+                 "** function doesn't exist **"),
+                ("statsInstant Place city_id",
+                 "** attribute is not numeric **")):
+            self.assertEqual(correct, self.run_command(command))
+
+    @unittest.skipIf(columns.numpy is None, "numpy is not installed")
+    def test_stats(self):
+        result = self.run_command("statsInstant Place priceByNight")
+        self.assertTrue(result.startswith(
+            "{'count': 3, 'sum': 450.0, 'mean': 150.0, 'min': 50.0, "
+            "'max': 300.0, 'std': 108.01"))
+        self.assertEqual("150.0", self.run_command(
+            "statsInstant Place priceByNight mean"))
+
+    @unittest.skipIf(columns.numpy is None, "numpy is not installed")
+    def test_stats_by(self):
+        self.assertEqual("{'c1': 200.0, 'c2': 50.0}", self.run_command(
+            "statsInstant Place priceByNight mean city_id"))
+        self.assertEqual("{'c1': 2, 'c2': 1}", self.run_command(
+            "statsInstant Place city_id counts"))
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().actionDefault(
+                "Place.stats(priceByNight, max, city_id)")
+        self.assertEqual("{'c1': 300.0, 'c2': 50.0}",
+                         output.getvalue().strip())
+
+    @unittest.skipIf(columns.numpy is not None, "numpy is installed")
+    def test_stats_without_numpy(self):
+        self.assertEqual("** numpy is not installed **", self.run_command(
+            "statsInstant Place priceByNight"))
+
+
+class TestHBNBCommand_classes(unittest.TestCase):
+    """Unittests for testing new model classes in the HBNB command
+    interpreter."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        storage.clear()
+
+        class Widget(BaseModel):
+            color = ""
+        self.Widget = Widget
+
+    def tearDown(self):
+        BaseModel.classes.pop("Widget", None)
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        storage.clear()
+
+    def test_create_new_class(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("createInstant Widget"))
+            wgID = output.getvalue().strip()
+        self.assertIn("Widget." + wgID, storage.all())
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("showInstant Widget " + wgID)
+            self.assertIn("[Widget] ({})".format(wgID), output.getvalue())
+
+    def test_update_new_class(self):
+        wg = self.Widget()
+        with patch("sys.stdout", new=StringIO()):
+            HBNBCommand().onecmd("updateInstant Widget {} color "
+                                 "red".format(wg.id))
+        self.assertEqual("red", wg.color)
+
+    def test_reload_new_class(self):
+        wg = self.Widget()
+        storage.save()
+        storage.clear()
+        storage.reload()
+        self.assertEqual(self.Widget,
+                         type(storage.get("Widget", wg.id)))
+
+
+class TestHBNBCommand_bulk_create(unittest.TestCase):
+    """Unittests for testing bulk_create from the HBNB command
+    interpreter."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        storage.clear()
+
+    def tearDown(self):
+        for name in ("file.json", "file.json.idx", "places.jsonl"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        storage.clear()
+
+    def run_command(self, command):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(command))
+        return output.getvalue().split()
+
+    def test_bulk_create_errors(self):
+        with open("places.jsonl", "w") as f:
+            f.write('{"name": "Loft"}\n[1, 2]\n')
+        for command, correct in (
+                ("bulk_createInstant", "** class name missing **"),
+                ("bulk_createInstant MyModel", "** class doesn't exist **"),
+                ("bulk_createInstant User", "** count or file missing **"),
+                ("bulk_createInstant User users.jsonl",
+                 "** file doesn't exist **"),
+                ("bulk_createInstant Place places.jsonl",
+                 "** invalid line 2 **")):
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd(command))
+                self.assertEqual(correct,
+                                 output.getvalue().strip().split("\n")[-1])
+
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
+    def test_bulk_create_count(self):
+        with patch("models.engine.json_stream.dump_items") as dump:
+            ids = self.run_command("bulk_createInstant User 5")
+        self.assertEqual(1, dump.call_count)
+        self.assertEqual(5, len(set(ids)))
+        for usID in ids:
+            self.assertIn("User." + usID, storage.all())
+
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
+    def test_bulk_create_file(self):
+        with open("places.jsonl", "w") as f:
+            f.write('{"name": "Loft", "maxGuest": "4", "color": "red"}\n'
+                    '\n{"id": "1", "priceByNight": 90}\n')
+        ids = self.run_command("bulk_createInstant Place places.jsonl")
+        self.assertEqual(2, len(ids))
+        loft, other = (storage.get("Place", i) for i in ids)
+        self.assertEqual("Loft", loft.name)
+        self.assertEqual(4, loft.maxGuest)
+        self.assertEqual("red", loft.color)
+        self.assertEqual(90, other.priceByNight)
+        self.assertNotEqual("1", other.id)
+        with open("file.json", "r") as f:
+            self.assertIn("Place." + other.id, f.read())
+
+    def test_bulk_create_invalid_value(self):
+        with open("places.jsonl", "w") as f:
+            f.write('{"name": "Loft"}\n{"maxGuest": "many"}\n')
+        output = self.run_command("bulk_createInstant Place places.jsonl")
+        self.assertEqual(1, storage.count("Place"))
+        self.assertIn("Place." + output[0], storage.all())
+
+    def test_bulk_create_invalid_type(self):
+        for value in ("null", "[4]"):
+            storage.clear()
+            with open("places.jsonl", "w") as f:
+                f.write('{"name": "Loft"}\n{"priceByNight": %s}\n' % value)
+            output = self.run_command("bulk_createInstant Place places.jsonl")
+            self.assertEqual("** invalid line 2 **", " ".join(output[1:]))
+            self.assertEqual(1, storage.count("Place"))
+
+    def test_bulk_create_method(self):
+        with open("places.jsonl", "w") as f:
+            f.write('{"name": "Loft"}\n{"near": 3}\n')
+        output = self.run_command("bulk_createInstant Place places.jsonl")
+        self.assertEqual("** invalid line 2 **", " ".join(output[1:]))
+        self.assertEqual(1, storage.count("Place"))
+
+    def test_bulk_create_relation(self):
+        with open("places.jsonl", "w") as f:
+            f.write('{"name": "Loft"}\n{"reviews": []}\n')
+        output = self.run_command("bulk_createInstant Place places.jsonl")
+        self.assertEqual("** invalid line 2 **", " ".join(output[1:]))
+        self.assertEqual(1, storage.count("Place"))
+
+
+class TestHBNBCommand_import_export(unittest.TestCase):
+    """Unittests for testing import and export from the HBNB command
+    interpreter."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        storage.clear()
+
+    def tearDown(self):
+        for name in ("file.json", "file.json.idx",
+                     "places.jsonl", "places.csv"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        storage.clear()
+
+    def run_command(self, command):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(command))
+        return output.getvalue().strip()
+
+    def place(self):
+        pl = BaseModel.classes["Place"]()
+        pl.name = "Loft"
+        pl.maxGuest = 4
+        pl.lati = 37.5
+        pl.Amenity_ids = ["a", "b"]
+        pl.color = "red"
+        return pl
+
+    def test_import_export_errors(self):
+        with open("places.jsonl", "w") as f:
+            f.write('{"name": "Loft"}\n\n{"maxGuest": "many"}\n')
+        for command, correct in (
+                ("importInstant", "** class name missing **"),
+                ("importInstant MyModel", "** class doesn't exist **"),
+                ("importInstant User", "** file name missing **"),
+                ("importInstant User users.jsonl",
+                 "** file doesn't exist **"),
+                ("importInstant Place places.jsonl",
+                 "** invalid line 3 **"),
+                ("exportInstant", "** class name missing **"),
+                ("exportInstant MyModel", "** class doesn't exist **"),
+                ("exportInstant User", "** file name missing **")):
+            self.assertEqual(correct, self.run_command(command))
+
+    def test_import_casts_values(self):
+        with open("places.jsonl", "w") as f:
+            f.write('{"id": "1", "name": "Loft", "maxGuest": "4", '
+                    '"crea_at": "2020-01-02T03:04:05", "__class__": "User"}'
+                    '\n{"priceByNight": 90.0, "color": "red"}\n')
+        self.assertEqual("2", self.run_command(
+            "importInstant Place places.jsonl"))
+        loft = storage.get("Place", "1")
+        self.assertEqual(4, loft.maxGuest)
+        self.assertEqual(loft.crea_at, loft.upd_at)
+        self.assertEqual(2020, loft.crea_at.year)
+        other = [pl for pl in storage.all("Place").values() if pl.id != "1"]
+        self.assertEqual(90, other[0].priceByNight)
+        self.assertEqual("red", other[0].color)
+        self.assertEqual(0, storage.count("User"))
+
+    def test_import_invalid_timestamp(self):
+        with open("places.jsonl", "w") as f:
+            f.write('{"name": "Loft", "upd_at": "yesterday"}\n')
+        self.assertEqual("** invalid line 1 **", self.run_command(
+            "importInstant Place places.jsonl"))
+        self.assertEqual(0, storage.count("Place"))
+
+    def test_export_jsonl(self):
+        pl = self.place()
+        self.assertEqual("1", self.run_command(
+            "exportInstant Place places.jsonl"))
+        with open("places.jsonl", "r") as f:
+            self.assertEqual(pl.to_dict(), json.loads(f.read()))
+
+    def test_export_unwritable(self):
+        self.place()
+        for name in ("missing/places.jsonl", "."):
+            self.assertEqual("** can't write file **", self.run_command(
+                "exportInstant Place " + name))
+
+    def test_export_csv(self):
+        pl = self.place()
+        pl.roomNumber = "two"
+        self.assertEqual("1", self.run_command(
+            "exportInstant Place places.csv"))
+        with open("places.csv", "r", newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(1, len(rows))
+        self.assertEqual(pl.id, rows[0]["id"])
+        self.assertEqual("4", rows[0]["maxGuest"])
+        self.assertEqual("", rows[0]["roomNumber"])
+        self.assertEqual(["a", "b"], json.loads(rows[0]["Amenity_ids"]))
+        self.assertEqual({"color": "red", "roomNumber": "two"},
+                         json.loads(rows[0]["extra"]))
+
+    def test_round_trip(self):
+        pl = self.place()
+        for name in ("places.jsonl", "places.csv"):
+            self.run_command("exportInstant Place " + name)
+            storage.delete(pl)
+            self.assertEqual("1", self.run_command(
+                "importInstant Place " + name))
+            self.assertEqual(pl.to_dict(),
+                             storage.get("Place", pl.id).to_dict())
+            pl = storage.get("Place", pl.id)
+
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
+    def test_import_saves_once(self):
+        with open("places.jsonl", "w") as f:
+            for i in range(5):
+                f.write('{{"name": "Place {}"}}\n'.format(i))
+        with patch("models.engine.json_stream.dump_items") as dump:
+            self.assertEqual("5", self.run_command(
+                "importInstant Place places.jsonl"))
+        self.assertEqual(1, dump.call_count)
+        self.assertEqual(5, storage.count("Place"))
+
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
+    def test_import_export_compact(self):
+        pl = self.place()
+        self.run_command("exportInstant Place places.jsonl")
+        storage.delete(pl)
+        FileStorage._FileStorage__compact = True
+        try:
+            self.run_command("importInstant Place places.jsonl")
+            self.assertNotIn("Place." + pl.id,
+                             FileStorage._FileStorage__objects)
+            self.run_command("exportInstant Place places.csv")
+            self.assertNotIn("Place." + pl.id,
+                             FileStorage._FileStorage__objects)
+        finally:
+            FileStorage._FileStorage__compact = False
+        with open("places.csv", "r") as f:
+            self.assertIn(pl.id, f.read())
+        self.assertEqual(pl.to_dict(),
+                         storage.get("Place", pl.id).to_dict())
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestHBNBCommand_sync(unittest.TestCase):
+    """Unittests for testing sync from the HBNB command interpreter."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        storage.clear()
+        FileStorage._FileStorage__durability = "exit"
+
+    def tearDown(self):
+        FileStorage._FileStorage__durability = "none"
+        FileStorage._FileStorage__dirty = False
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        storage.clear()
+
+    def test_sync_writes_put_off_saves(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("createInstant User"))
+            usID = output.getvalue().strip()
+        self.assertFalse(os.path.exists("file.json"))
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("syncInstant"))
+            self.assertEqual("", output.getvalue())
+        with open("file.json", "r") as f:
+            self.assertIn("User." + usID, f.read())
+
+
+class TestHBNBCommand_convert(unittest.TestCase):
+    """Unittests for testing convert from the HBNB command interpreter."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        storage.clear()
+
+    def tearDown(self):
+        FileStorage._FileStorage__format = "json"
+        FileStorage._FileStorage__cache.clear()
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        storage.clear()
+
+    def test_convert_format_missing(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("convertInstant"))
+            self.assertEqual("** format missing **",
+                             output.getvalue().strip())
+
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
+    def test_convert_format_doesnt_exist(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("convertInstant xml"))
+            self.assertEqual("** format doesn't exist **",
+                             output.getvalue().strip())
+
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
+    def test_convert_binary(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("createInstant User"))
+            usID = output.getvalue().strip()
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("convertInstant binary"))
+            self.assertEqual("", output.getvalue())
+        with open("file.json", "rb") as f:
+            self.assertTrue(f.read().startswith(b"HBNB"))
+        storage.clear()
+        storage.reload()
+        self.assertIn("User." + usID, storage.all())
+
+    @unittest.skipIf(models.storage_t != "db", "not testing db storage")
+    def test_convert_db_storage(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("convertInstant binary"))
+            self.assertEqual("** format doesn't exist **",
+                             output.getvalue().strip())
+
+
+class TestHBNBCommand_shared(unittest.TestCase):
+    """Unittests for testing the HBNB command interpreter sharing a store."""
+
+    def test_precmd_refreshes(self):
+        with patch.object(storage, "refresh") as refresh:
+            self.assertEqual("countInstant User",
+                             HBNBCommand().precmd("countInstant User"))
+        refresh.assert_called_once_with()
+
+    def test_conflict(self):
+        error = ConflictError(["User.1"])
+        with patch.object(HBNBCommand, "do_createInstant",
+                          side_effect=error):
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd("createInstant User"))
+                self.assertEqual("** instance changed by another process **",
+                                 output.getvalue().strip())
+
+
 if __name__ == "__main__":
     unittest.main()
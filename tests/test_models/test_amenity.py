@@ -96,10 +96,11 @@ class TestAmenity_save(unittest.TestCase):
             pass
 
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -128,6 +129,7 @@ class TestAmenity_save(unittest.TestCase):
         with self.assertRaises(TypeError):
             am.save(None)
 
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
     def test_save_updates_file(self):
         am = Amenity()
         am.save()
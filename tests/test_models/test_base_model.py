@@ -5,6 +5,7 @@ Unittest classes:
     TestBaseModel_instantiation
     TestBaseModel_save
     TestBaseModel_to_dict
+    TestBaseModel_classes
 """
 import os
 import models
@@ -73,6 +74,27 @@ class TestBaseModel_instantiation(unittest.TestCase):
         self.assertEqual(bm.crea_at, dt)
         self.assertEqual(bm.upd_at, dt)
 
+    def test_instantiation_with_whole_second_kwargs(self):
+        dt = datetime(2017, 9, 28, 21, 5, 54)
+        bm = BaseModel(id="345", crea_at=dt.isoformat(),
+                       upd_at=dt.isoformat())
+        self.assertEqual(bm.crea_at, dt)
+        self.assertEqual(bm.upd_at, dt)
+
+    def test_instantiation_with_same_timestamps_parses_once(self):
+        dt_iso = datetime.today().isoformat()
+        bm = BaseModel(id="345", crea_at=dt_iso, upd_at=dt_iso)
+        self.assertIs(bm.crea_at, bm.upd_at)
+
+    def test_instantiation_with_partial_kwargs(self):
+        dt = datetime.today()
+        bm = BaseModel(upd_at=dt.isoformat(), name="Holberton")
+        self.assertEqual(str, type(bm.id))
+        self.assertEqual(datetime, type(bm.crea_at))
+        self.assertEqual(bm.upd_at, dt)
+        self.assertEqual(["id", "crea_at", "upd_at", "name"],
+                         list(bm.__dict__))
+
     def test_instantiation_with_None_kwargs(self):
         with self.assertRaises(TypeError):
             BaseModel(id=None, crea_at=None, upd_at=None)
@@ -98,10 +120,11 @@ class TestBaseModel_save(unittest.TestCase):
 
     @classmethod
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -130,6 +153,7 @@ class TestBaseModel_save(unittest.TestCase):
         with self.assertRaises(TypeError):
             bm.save(None)
 
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
     def test_save_updates_file(self):
         bm = BaseModel()
         bm.save()
@@ -188,5 +212,26 @@ class TestBaseModel_to_dict(unittest.TestCase):
             bm.to_dict(None)
 
 
+class TestBaseModel_classes(unittest.TestCase):
+    """Unittests for testing the class registry of the BaseModel class."""
+
+    def tearDown(self):
+        BaseModel.classes.pop("Widget", None)
+
+    def test_model_classes_registered(self):
+        for name in ("BaseModel", "User", "State", "City", "Place",
+                     "Amenity", "Review"):
+            self.assertIn(name, BaseModel.classes)
+            self.assertEqual(name, BaseModel.classes[name].__name__)
+        self.assertIs(BaseModel, BaseModel.classes["BaseModel"])
+
+    def test_subclass_registered(self):
+        class Widget(BaseModel):
+            color = ""
+        self.assertIs(Widget, BaseModel.classes["Widget"])
+        wg = BaseModel.classes["Widget"](id="1", color="red")
+        self.assertEqual("Widget", wg.to_dict()["__class__"])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -5,6 +5,7 @@ Unittest classes:
     TestCity_instantiation
     TestCity_save
     TestCity_to_dict
+    TestCity_places
 """
 import os
 import models
@@ -12,6 +13,7 @@ import unittest
 from datetime import datetime
 from time import sleep
 from models.city import City
+from models.place import Place
 
 
 class TestCity_instantiation(unittest.TestCase):
@@ -101,10 +103,11 @@ class TestCity_save(unittest.TestCase):
             pass
 
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -133,6 +136,7 @@ class TestCity_save(unittest.TestCase):
         with self.assertRaises(TypeError):
             cy.save(None)
 
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
     def test_save_updates_file(self):
         cy = City()
         cy.save()
@@ -191,5 +195,22 @@ class TestCity_to_dict(unittest.TestCase):
             cy.to_dict(None)
 
 
+class TestCity_places(unittest.TestCase):
+    """Unittests for testing the places property of the City class."""
+
+    def setUp(self):
+        models.storage.clear()
+
+    def tearDown(self):
+        models.storage.clear()
+
+    def test_places(self):
+        cy = City()
+        pl = Place()
+        pl.city_id = cy.id
+        Place()
+        self.assertEqual([pl], cy.places)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,151 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/binary_stream.py.
+
+Unittest classes:
+    TestBinaryStream_encode
+    TestBinaryStream_load_items
+"""
+import json
+import unittest
+from io import BytesIO
+from models.engine.binary_stream import MAGIC
+from models.engine.binary_stream import dump_items
+from models.engine.binary_stream import encode
+from models.engine.binary_stream import load_items
+from models.engine.binary_stream import packed_str
+from models.engine.binary_stream import time_string
+from models.engine.binary_stream import uuid_string
+
+
+class TestBinaryStream_encode(unittest.TestCase):
+    """Unittests for testing encode and the packing of strings."""
+
+    def test_packed_uuid(self):
+        uid = "0123abcd-0000-4000-8000-00000000000a"
+        kind, packed = packed_str(uid)
+        self.assertEqual("u", kind)
+        self.assertEqual(16, len(packed))
+        self.assertEqual(uid, uuid_string(packed))
+
+    def test_packed_timestamps(self):
+        for value in ("2020-01-02T03:04:05.000006", "2020-01-02T03:04:05",
+                      "0001-01-01T00:00:00", "9999-12-31T23:59:59.999999"):
+            kind, packed = packed_str(value)
+            self.assertEqual("t", kind)
+            self.assertEqual(value, time_string(packed))
+
+    def test_strings_kept_as_is(self):
+        for value in ("0123ABCD-0000-4000-8000-00000000000a",
+                      "0123abcd-0000-4000-8000-00000000000g",
+                      "0123abcd-0000-4000-80-0-00000000000a",
+                      "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaa  ",
+                      "aaaaaaaa-aaaa-aaaa-aaaa-a aaaaaaaaa ",
+                      "2020-01-02T03:04:05.000000",
+                      "2020-01-02 03:04:05",
+                      "2020-13-02T03:04:05",
+                      "Betty"):
+            self.assertEqual(("j", value), packed_str(value))
+
+    def test_encode_kinds(self):
+        cls_name, names, kinds, values, ident = encode({
+            "id": "0123abcd-0000-4000-8000-00000000000a",
+            "crea_at": "2020-01-02T03:04:05.000006", "name": "Loft",
+            "maxGuest": 4, "lati": 1.5, "big": 1 << 64, "ok": True,
+            "__class__": "Place"})
+        self.assertEqual("Place", cls_name)
+        self.assertEqual("utjifjjc", kinds)
+        self.assertEqual("0123abcd-0000-4000-8000-00000000000a", ident)
+        self.assertEqual(("id", "crea_at", "name", "maxGuest", "lati",
+                          "big", "ok", "__class__"), names)
+
+    def test_encode_shares_names(self):
+        first = encode({"id": "1", "__class__": "User"})
+        second = encode({"id": "2", "__class__": "User"})
+        self.assertIs(first[1], second[1])
+
+    def test_encode_not_serializable(self):
+        with self.assertRaises(TypeError):
+            encode({"id": "1", "value": object()})
+
+
+class TestBinaryStream_load_items(unittest.TestCase):
+    """Unittests for testing dump_items and load_items."""
+
+    objdict = {
+        "User.0123abcd-0000-4000-8000-00000000000a": {
+            "id": "0123abcd-0000-4000-8000-00000000000a",
+            "crea_at": "2020-01-02T03:04:05.000006",
+            "upd_at": "2020-01-02T03:04:05.000006",
+            "name": "Betty", "__class__": "User"},
+        "User.0123abcd-0000-4000-8000-00000000000b": {
+            "id": "0123abcd-0000-4000-8000-00000000000b",
+            "crea_at": "2020-01-02T03:04:05",
+            "upd_at": "2020-01-02T03:04:06.000001",
+            "name": "Holberton", "__class__": "User"},
+        "Place.2": {"id": "2", "maxGuest": 12345, "lati": -1.5e3,
+                    "Amenity_ids": ["a", "b"], "ok": True, "none": None,
+                    "__class__": "Place"},
+        "Review.3": {"text": "say \"hi\" {, }: é", "id": 3,
+                     "__class__": "Review"},
+        "other": {"id": "other", "nested": {"a": [1, 2.5]}}
+    }
+
+    def dump(self, objdict=None):
+        if objdict is None:
+            objdict = self.objdict
+        f = BytesIO()
+        dump_items(((k, encode(o)) for k, o in objdict.items()), f)
+        return f.getvalue()
+
+    def load(self, data, size=1 << 16):
+        return list(load_items(BytesIO(data), size))
+
+    def test_dump_then_load(self):
+        self.assertEqual(list(self.objdict.items()), self.load(self.dump()))
+
+    def test_keeps_field_order(self):
+        for key, o in self.load(self.dump()):
+            self.assertEqual(list(self.objdict[key]), list(o))
+
+    def test_load_items_small_chunks(self):
+        data = self.dump()
+        for size in (1, 2, 3, 7, 16):
+            self.assertEqual(list(self.objdict.items()),
+                             self.load(data, size))
+
+    def test_dump_items_empty(self):
+        data = self.dump({})
+        self.assertEqual(MAGIC, data[:len(MAGIC)])
+        self.assertEqual([], self.load(data))
+
+    def test_smaller_than_json(self):
+        objdict = {"User.{}".format(o["id"]): o for o in (
+            {"id": "0123abcd-0000-4000-8000-{:012x}".format(i),
+             "crea_at": "2020-01-02T03:04:05.{:06d}".format(i + 1),
+             "upd_at": "2020-01-02T03:04:05.{:06d}".format(i + 1),
+             "firstName": "Betty", "__class__": "User"}
+            for i in range(100))}
+        self.assertLess(len(self.dump(objdict)) * 3,
+                        len(json.dumps(objdict)))
+
+    def test_load_items_is_lazy(self):
+        data = self.dump()
+        items = load_items(BytesIO(data[:len(data) // 2]), 4)
+        self.assertEqual(
+            "User.0123abcd-0000-4000-8000-00000000000a", next(items)[0])
+
+    def test_load_items_truncated(self):
+        data = self.dump()
+        for end in (0, 1, len(MAGIC), len(MAGIC) + 1, len(data) // 2,
+                    len(data) - 2, len(data) - 1):
+            with self.assertRaises(ValueError):
+                self.load(data[:end], 3)
+
+    def test_load_items_not_binary(self):
+        for data in (b'{"a": 1}', MAGIC + b"Z\x00E\x00"):
+            with self.assertRaises(ValueError):
+                self.load(data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/columns.py.
+
+Unittest classes:
+    TestColumnStore_maintenance
+    TestColumnStore_aggregates
+"""
+import math
+import unittest
+from models.engine import columns
+from models.engine.columns import ColumnStore
+
+
+class TestColumnStore_maintenance(unittest.TestCase):
+    """Unittests for testing the rows kept by the ColumnStore class."""
+
+    def setUp(self):
+        self.store = ColumnStore({"city_id": "", "maxGuest": 0,
+                                  "lati": 0.0})
+        self.store.add("Place.1", ("c1", 4, 37.5))
+        self.store.add("Place.2", ("c2", 2, 38.5))
+        self.store.add("Place.3", ("c1", "many", None))
+
+    def test_columns(self):
+        self.assertEqual(("city_id", "maxGuest", "lati"), self.store.names)
+        self.assertEqual([0, 1, 0], list(self.store.columns["city_id"]))
+        self.assertEqual(["c1", "c2"], self.store.labels["city_id"])
+        self.assertEqual([4.0, 2.0], list(self.store.columns["maxGuest"])[:2])
+        self.assertTrue(math.isnan(self.store.columns["lati"][2]))
+
+    def test_add_replaces_row(self):
+        self.store.add("Place.2", (5, 3, 39.5))
+        self.assertEqual(["Place.1", "Place.2", "Place.3"], self.store.keys)
+        self.assertEqual(-1, self.store.columns["city_id"][1])
+        self.assertEqual(3.0, self.store.columns["maxGuest"][1])
+
+    def test_discard_moves_last_row(self):
+        self.store.discard("Place.1")
+        self.store.discard("Place.4")
+        self.assertEqual(["Place.3", "Place.2"], self.store.keys)
+        self.assertEqual({"Place.3": 0, "Place.2": 1}, self.store.rows)
+        self.assertEqual([0, 1], list(self.store.columns["city_id"]))
+        self.store.discard("Place.2")
+        self.assertEqual([0], list(self.store.columns["city_id"]))
+
+    @unittest.skipIf(columns.numpy is not None, "numpy is installed")
+    def test_aggregate_without_numpy(self):
+        with self.assertRaises(ImportError):
+            self.store.aggregate("maxGuest")
+
+
+@unittest.skipIf(columns.numpy is None, "numpy is not installed")
+class TestColumnStore_aggregates(unittest.TestCase):
+    """Unittests for testing the aggregates of the ColumnStore class."""
+
+    def setUp(self):
+        self.store = ColumnStore({"city_id": "", "maxGuest": 0,
+                                  "priceByNight": 0})
+        for key, value in (("Place.1", ("c1", 4, 100)),
+                           ("Place.2", ("c2", 2, 50)),
+                           ("Place.3", ("c1", 4, 300)),
+                           ("Place.4", ("c2", 6, "n/a")),
+                           ("Place.5", (None, 2, 70))):
+            self.store.add(key, value)
+
+    def test_column(self):
+        self.assertEqual([4, 2, 4, 6, 2],
+                         self.store.column("maxGuest").tolist())
+        self.assertEqual([0, 1, 0, 1, -1],
+                         self.store.column("city_id").tolist())
+
+    def test_aggregate(self):
+        self.assertEqual(4, self.store.aggregate("priceByNight", "count"))
+        self.assertEqual(520, self.store.aggregate("priceByNight", "sum"))
+        self.assertEqual(130, self.store.aggregate("priceByNight"))
+        self.assertEqual(50, self.store.aggregate("priceByNight", "min"))
+        self.assertEqual(300, self.store.aggregate("priceByNight", "max"))
+        self.assertAlmostEqual(
+            99.75, self.store.aggregate("priceByNight", "std"), places=2)
+
+    def test_aggregate_by(self):
+        self.assertEqual({"c1": 200, "c2": 50}, self.store.aggregate(
+            "priceByNight", "mean", "city_id"))
+        self.assertEqual({"c1": 2, "c2": 1}, self.store.aggregate(
+            "priceByNight", "count", "city_id"))
+        self.assertEqual({2: 50, 4: 100}, self.store.aggregate(
+            "priceByNight", "min", "maxGuest"))
+        self.assertEqual({2: 70, 4: 300}, self.store.aggregate(
+            "priceByNight", "max", "maxGuest"))
+        self.assertEqual({"c1": 100, "c2": 0}, self.store.aggregate(
+            "priceByNight", "std", "city_id"))
+
+    def test_aggregate_follows_rows(self):
+        self.store.discard("Place.3")
+        self.store.add("Place.2", ("c1", 2, 60))
+        self.assertEqual({"c1": 80}, self.store.aggregate(
+            "priceByNight", "mean", "city_id"))
+
+    def test_aggregate_empty(self):
+        store = ColumnStore({"maxGuest": 0})
+        self.assertIsNone(store.aggregate("maxGuest"))
+        self.assertEqual(0, store.aggregate("maxGuest", "count"))
+        self.assertEqual({}, store.counts("maxGuest"))
+
+    def test_counts(self):
+        self.assertEqual({2: 2, 4: 2, 6: 1}, self.store.counts("maxGuest"))
+        self.assertEqual({"c1": 2, "c2": 2}, self.store.counts("city_id"))
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            self.store.aggregate("city_id")
+        with self.assertRaises(ValueError):
+            self.store.aggregate("maxGuest", "median")
+        with self.assertRaises(ValueError):
+            self.store.aggregate("name")
+        with self.assertRaises(ValueError):
+            self.store.aggregate("maxGuest", "sum", "name")
+
+
+if __name__ == "__main__":
+    unittest.main()
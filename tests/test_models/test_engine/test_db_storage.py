@@ -0,0 +1,152 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/db_storage.py.
+
+Unittest classes:
+    TestDBStorage_instantiation
+    TestDBStorage_methods
+"""
+import os
+import models
+import sqlite3
+import unittest
+from models.base_model import BaseModel
+from models.engine.db_storage import DBStorage
+from models.user import User
+from models.state import State
+from models.place import Place
+
+
+class TestDBStorage_instantiation(unittest.TestCase):
+    """Unittests for testing instantiation of the DBStorage class."""
+
+    def test_DBStorage_instantiation_no_args(self):
+        self.assertEqual(type(DBStorage()), DBStorage)
+
+    def test_DBStorage_instantiation_with_arg(self):
+        with self.assertRaises(TypeError):
+            DBStorage(None)
+
+    def test_DBStorage_db_path_is_private_str(self):
+        self.assertEqual(str, type(DBStorage._DBStorage__db_path))
+
+
+class TestDBStorage_methods(unittest.TestCase):
+    """Unittests for testing methods of the DBStorage class."""
+
+    def setUp(self):
+        self.saved_db = (DBStorage._DBStorage__db_path,
+                         DBStorage._DBStorage__connection)
+        DBStorage._DBStorage__db_path = "test_hbnb.db"
+        DBStorage._DBStorage__connection = None
+        models.storage.clear()
+        self.storage = DBStorage()
+        self.storage.changes()
+        self.saved_storage = models.storage
+        models.storage = self.storage
+
+    def tearDown(self):
+        models.storage = self.saved_storage
+        DBStorage._DBStorage__connection.close()
+        (DBStorage._DBStorage__db_path,
+         DBStorage._DBStorage__connection) = self.saved_db
+        names = ["test_hbnb.db"]
+        if models.storage_t == "db":
+            names.append(DBStorage._DBStorage__db_path)
+        for name in names:
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.remove(name + suffix)
+                except IOError:
+                    pass
+        models.storage.clear()
+
+    def rows(self, table):
+        db = sqlite3.connect("test_hbnb.db")
+        db.row_factory = sqlite3.Row
+        rows = [dict(row) for row in db.execute(
+            'SELECT * FROM "{}"'.format(table))]
+        db.close()
+        return rows
+
+    def test_convert_refused(self):
+        self.storage.reload()
+        with self.assertRaises(ValueError):
+            self.storage.convert("binary")
+
+    def test_wal_mode(self):
+        self.storage.reload()
+        mode = DBStorage._DBStorage__connection.execute(
+            "PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual("wal", mode)
+
+    def test_one_table_per_class(self):
+        self.storage.reload()
+        for table in ("BaseModel", "User", "State", "City", "Place",
+                      "Amenity", "Review"):
+            self.assertEqual([], self.rows(table))
+
+    def test_save_inserts_row(self):
+        us = User()
+        us.firstName = "Betty"
+        self.storage.save()
+        rows = self.rows("User")
+        self.assertEqual(1, len(rows))
+        self.assertEqual(us.id, rows[0]["id"])
+        self.assertEqual("Betty", rows[0]["firstName"])
+        self.assertIsNone(rows[0]["lastName"])
+
+    def test_save_updates_row(self):
+        pl = Place()
+        self.storage.save()
+        pl.maxGuest = 4
+        pl.save()
+        rows = self.rows("Place")
+        self.assertEqual(1, len(rows))
+        self.assertEqual(4, rows[0]["maxGuest"])
+        self.assertEqual(pl.upd_at.isoformat(), rows[0]["upd_at"])
+
+    def test_save_deletes_row(self):
+        st = State()
+        self.storage.save()
+        self.storage.delete(st)
+        self.storage.save()
+        self.assertEqual([], self.rows("State"))
+
+    def test_reload(self):
+        bm = BaseModel()
+        pl = Place()
+        pl.priceByNight = 120
+        pl.lati = 37.77
+        pl.Amenity_ids = ["a", "b"]
+        pl.maxGuest = "4"
+        pl.color = "blue"
+        self.storage.save()
+        models.storage.clear()
+        self.storage.reload()
+        objs = self.storage.all()
+        self.assertIn("BaseModel." + bm.id, objs)
+        reloaded = objs["Place." + pl.id]
+        self.assertIsNot(pl, reloaded)
+        self.assertEqual(pl.to_dict(), reloaded.to_dict())
+        self.assertNotIn("name", reloaded.__dict__)
+
+    def test_batch(self):
+        self.storage.reload()
+        with self.storage.batch():
+            us = User()
+            us.save()
+            st = State()
+            self.storage.save()
+            self.assertEqual([], self.rows("User"))
+        self.assertEqual([us.id], [r["id"] for r in self.rows("User")])
+        self.assertEqual([st.id], [r["id"] for r in self.rows("State")])
+
+    def test_reload_has_no_changes(self):
+        User()
+        self.storage.save()
+        self.storage.reload()
+        self.assertEqual(set(), self.storage.changes())
+
+
+if __name__ == "__main__":
+    unittest.main()
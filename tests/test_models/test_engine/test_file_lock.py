@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/file_lock.py.
+
+Unittest classes:
+    TestFileLock_generations
+    TestFileLock_hold
+"""
+import os
+import threading
+import unittest
+from models.engine import file_lock
+from models.engine.file_lock import FileLock
+
+
+class TestFileLock_generations(unittest.TestCase):
+    """Unittests for testing the generations kept by a FileLock."""
+
+    def tearDown(self):
+        try:
+            os.remove("test.lock")
+        except IOError:
+            pass
+
+    def test_new_file(self):
+        lock = FileLock("test.lock")
+        with lock.hold():
+            self.assertEqual((0, 0), lock.read())
+        self.assertTrue(os.path.exists("test.lock"))
+
+    def test_bump(self):
+        lock = FileLock("test.lock")
+        with lock.hold():
+            self.assertEqual(((0, 0), (1, 0)), lock.bump())
+            self.assertEqual(((1, 0), (2, 1)), lock.bump(True))
+        with FileLock("test.lock").hold() as other:
+            self.assertEqual((2, 1), other.read())
+
+
+class TestFileLock_hold(unittest.TestCase):
+    """Unittests for testing holding a FileLock."""
+
+    def setUp(self):
+        self.lock = FileLock("test.lock")
+
+    def tearDown(self):
+        try:
+            os.remove("test.lock")
+        except IOError:
+            pass
+
+    def holder(self, exclusive, held, release):
+        def run():
+            with self.lock.hold(exclusive):
+                held.set()
+                release.wait(5)
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def test_nested(self):
+        self.assertFalse(self.lock.held())
+        with self.lock.hold(False):
+            with self.lock.hold(True):
+                self.assertTrue(self.lock.held())
+            self.assertTrue(self.lock.held())
+        self.assertFalse(self.lock.held())
+
+    @unittest.skipIf(file_lock.fcntl is None, "no fcntl")
+    def test_exclusive_waits(self):
+        first, second, release = (threading.Event(), threading.Event(),
+                                  threading.Event())
+        threads = [self.holder(True, first, release)]
+        self.assertTrue(first.wait(5))
+        threads.append(self.holder(True, second, release))
+        self.assertFalse(second.wait(0.2))
+        release.set()
+        self.assertTrue(second.wait(5))
+        for thread in threads:
+            thread.join(5)
+
+    @unittest.skipIf(file_lock.fcntl is None, "no fcntl")
+    def test_shared_together(self):
+        first, second, release = (threading.Event(), threading.Event(),
+                                  threading.Event())
+        threads = [self.holder(False, first, release),
+                   self.holder(False, second, release)]
+        self.assertTrue(first.wait(5))
+        self.assertTrue(second.wait(5))
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,14 +4,47 @@
 Unittest classes:
     TestFileStorage_instantiation
     TestFileStorage_methods
+    TestFileStorage_journal
+    TestFileStorage_compaction
+    TestFileStorage_dirty_tracking
+    TestFileStorage_lazy
+    TestFileStorage_class_index
+    TestFileStorage_lookup
+    TestFileStorage_where
+    TestFileStorage_sorted_index
+    TestFileStorage_spatial
+    TestFileStorage_columns
+    TestFileStorage_compact
+    TestFileStorage_batch
+    TestFileStorage_records
+    TestFileStorage_durability
+    TestFileStorage_atomic_save
+    TestFileStorage_formats
+    TestFileStorage_mapped
+    TestFileStorage_shared
+    TestFileStorage_threads
+    TestFileStorage_async
 """
 import os
+import sys
+import asyncio
 import json
+import time
 import models
+import threading
 import unittest
+import subprocess
 from datetime import datetime
+from unittest.mock import patch
 from models.base_model import BaseModel
+from models.engine import json_stream
+from models.engine.binary_stream import MAGIC
+from models.engine import file_lock
+from models.engine.file_lock import COUNTERS
+from models.engine.file_storage import ConflictError
 from models.engine.file_storage import FileStorage
+from models.engine.offset_index import OffsetIndex
+from models.engine.record import Record
 from models.user import User
 from models.state import State
 from models.place import Place
@@ -36,10 +69,12 @@ class TestFileStorage_instantiation(unittest.TestCase):
     def testFileStorage_objects_is_private_dict(self):
         self.assertEqual(dict, type(FileStorage._FileStorage__objects))
 
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
     def test_storage_initializes(self):
         self.assertEqual(type(models.storage), FileStorage)
 
 
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
 class TestFileStorage_methods(unittest.TestCase):
     """Unittests for testing methods of the FileStorage class."""
 
@@ -52,22 +87,31 @@ class TestFileStorage_methods(unittest.TestCase):
 
     @classmethod
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
             pass
-        FileStorage._FileStorage__objects = {}
+        models.storage.clear()
 
     def test_all(self):
         self.assertEqual(dict, type(models.storage.all()))
 
-    def test_all_with_arg(self):
+    def test_all_with_cls(self):
+        us = User()
+        st = State()
+        self.assertEqual({"User." + us.id: us}, models.storage.all(User))
+        self.assertEqual({"State." + st.id: st},
+                         models.storage.all("State"))
+        self.assertEqual({}, models.storage.all("MyModel"))
+
+    def test_all_with_two_args(self):
         with self.assertRaises(TypeError):
-            models.storage.all(None)
+            models.storage.all(User, None)
 
     def test_new(self):
         bm = BaseModel()
@@ -165,5 +209,2044 @@ class TestFileStorage_methods(unittest.TestCase):
             models.storage.reload(None)
 
 
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorage_journal(unittest.TestCase):
+    """Unittests for testing the journal mode of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        models.storage.clear()
+        FileStorage._FileStorage__journaling = True
+
+    def tearDown(self):
+        FileStorage._FileStorage__journaling = False
+        for path in ("file.json", "file.json.idx", "file.json.log"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def read_journal(self):
+        with open("file.json.log", "r") as f:
+            return [json.loads(line) for line in f]
+
+    def test_save_appends_put_record(self):
+        us = User()
+        models.storage.save()
+        self.assertFalse(os.path.exists("file.json"))
+        self.assertEqual(["put", "User." + us.id, us.to_dict()],
+                         self.read_journal()[0])
+
+    def test_save_appends_only_changed_keys(self):
+        us = User()
+        State()
+        models.storage.save()
+        us.firstName = "Betty"
+        us.save()
+        records = self.read_journal()
+        self.assertEqual(3, len(records))
+        self.assertEqual("User." + us.id, records[2][1])
+        self.assertEqual("Betty", records[2][2]["firstName"])
+
+    def test_delete_appends_del_record(self):
+        us = User()
+        models.storage.save()
+        models.storage.delete(us)
+        models.storage.save()
+        self.assertNotIn("User." + us.id, models.storage.all())
+        self.assertEqual(["del", "User." + us.id], self.read_journal()[1])
+
+    def test_save_without_changes_writes_nothing(self):
+        models.storage.save()
+        self.assertFalse(os.path.exists("file.json.log"))
+
+    def test_reload_replays_journal(self):
+        us = User()
+        st = State()
+        models.storage.save()
+        us.firstName = "Betty"
+        us.save()
+        models.storage.delete(st)
+        models.storage.save()
+        models.storage.clear()
+        models.storage.reload()
+        objs = FileStorage._FileStorage__objects
+        self.assertIn("User." + us.id, objs)
+        self.assertEqual("Betty", objs["User." + us.id].firstName)
+        self.assertNotIn("State." + st.id, objs)
+
+    def test_reload_replays_journal_over_snapshot(self):
+        FileStorage._FileStorage__journaling = False
+        us = User()
+        models.storage.save()
+        FileStorage._FileStorage__journaling = True
+        pl = Place()
+        models.storage.save()
+        models.storage.clear()
+        models.storage.reload()
+        self.assertIn("User." + us.id, models.storage.all())
+        self.assertIn("Place." + pl.id, models.storage.all())
+
+    def test_reload_ignores_torn_record(self):
+        us = User()
+        models.storage.save()
+        with open("file.json.log", "a") as f:
+            f.write('["put", "User.1234", {"id": "12')
+        models.storage.clear()
+        models.storage.reload()
+        self.assertIn("User." + us.id, models.storage.all())
+        self.assertNotIn("User.1234", models.storage.all())
+
+    def test_append_after_torn_record(self):
+        us = User()
+        models.storage.save()
+        with open("file.json.log", "a") as f:
+            f.write('["put", "User.1234", {"id": "12')
+        models.storage.clear()
+        models.storage.reload()
+        other = User()
+        models.storage.save()
+        models.storage.clear()
+        models.storage.reload()
+        for obj in (us, other):
+            self.assertIn("User." + obj.id, models.storage.all())
+        models.storage.compact()
+        models.storage.clear()
+        models.storage.reload()
+        for obj in (us, other):
+            self.assertIn("User." + obj.id, models.storage.all())
+        self.assertNotIn("User.1234", models.storage.all())
+
+    def test_snapshot_save_removes_journal(self):
+        User()
+        models.storage.save()
+        FileStorage._FileStorage__journaling = False
+        models.storage.save()
+        self.assertFalse(os.path.exists("file.json.log"))
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorage_compaction(unittest.TestCase):
+    """Unittests for testing journal compaction of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        models.storage.clear()
+        FileStorage._FileStorage__journaling = True
+
+    def tearDown(self):
+        FileStorage._FileStorage__journaling = False
+        FileStorage._FileStorage__compact_bytes = 1 << 20
+        FileStorage._FileStorage__compact_ratio = 1.0
+        for path in ("file.json", "file.json.idx",
+                     "file.json.log", "file.json.log.1"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def test_compact_folds_journal_into_snapshot(self):
+        us = User()
+        st = State()
+        models.storage.save()
+        models.storage.delete(st)
+        models.storage.save()
+        models.storage.compact()
+        self.assertFalse(os.path.exists("file.json.log"))
+        self.assertFalse(os.path.exists("file.json.log.1"))
+        with open("file.json", "r") as f:
+            objdict = json.load(f)
+        self.assertEqual({"User." + us.id: us.to_dict()}, objdict)
+
+    def test_fold_already_folded(self):
+        us = User()
+        models.storage.save()
+        fold = FileStorage._FileStorage__fold
+
+        def fold_twice(storage, folding):
+            fold(storage, folding)
+            fold(storage, folding)
+        runs = models.storage.compaction_stats()["runs"]
+        with patch.object(FileStorage, "_FileStorage__fold", fold_twice):
+            models.storage.compact()
+        self.assertEqual(runs + 1, models.storage.compaction_stats()["runs"])
+        with open("file.json", "r") as f:
+            self.assertIn("User." + us.id, json.load(f))
+
+    def test_compact_keeps_reload_result(self):
+        us = User()
+        models.storage.save()
+        us.firstName = "Betty"
+        us.save()
+        models.storage.compact()
+        models.storage.clear()
+        models.storage.reload()
+        self.assertEqual("Betty",
+                         models.storage.all()["User." + us.id].firstName)
+
+    def test_compact_without_journal(self):
+        runs = models.storage.compaction_stats()["runs"]
+        self.assertIsNone(models.storage.compact())
+        self.assertEqual(runs, models.storage.compaction_stats()["runs"])
+
+    def test_compaction_stats(self):
+        before = models.storage.compaction_stats()
+        us = User()
+        models.storage.save()
+        for i in range(3):
+            us.save()
+        models.storage.compact()
+        stats = models.storage.compaction_stats()
+        self.assertEqual(before["runs"] + 1, stats["runs"])
+        self.assertEqual(4, stats["last_records_folded"])
+        self.assertLess(0, stats["last_bytes_reclaimed"])
+        self.assertLessEqual(0.0, stats["last_duration"])
+
+    def test_compact_in_background(self):
+        us = User()
+        models.storage.save()
+        compactor = models.storage.compact(background=True)
+        pl = Place()
+        models.storage.save()
+        compactor.join()
+        self.assertTrue(os.path.exists("file.json.log"))
+        models.storage.clear()
+        models.storage.reload()
+        self.assertIn("User." + us.id, models.storage.all())
+        self.assertIn("Place." + pl.id, models.storage.all())
+
+    def test_save_triggers_compaction(self):
+        FileStorage._FileStorage__compact_bytes = 0
+        FileStorage._FileStorage__compact_ratio = 0.0
+        us = User()
+        models.storage.save()
+        compactor = FileStorage._FileStorage__compactor
+        if compactor is not None:
+            compactor.join()
+        with open("file.json", "r") as f:
+            self.assertIn("User." + us.id, f.read())
+
+    def test_reload_replays_interrupted_compaction(self):
+        us = User()
+        models.storage.save()
+        os.rename("file.json.log", "file.json.log.1")
+        pl = Place()
+        models.storage.save()
+        models.storage.clear()
+        models.storage.reload()
+        self.assertIn("User." + us.id, models.storage.all())
+        self.assertIn("Place." + pl.id, models.storage.all())
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorage_dirty_tracking(unittest.TestCase):
+    """Unittests for testing re-serialization of changed objects only."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def tearDown(self):
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def test_save_encodes_only_changed_objects(self):
+        objs = [User() for i in range(5)]
+        models.storage.save()
+        objs[2].firstName = "Betty"
+        with patch.object(User, "to_dict", autospec=True,
+                          side_effect=BaseModel.to_dict) as to_dict:
+            models.storage.save()
+        self.assertEqual(1, to_dict.call_count)
+
+    def test_save_without_changes_encodes_nothing(self):
+        User()
+        models.storage.save()
+        with patch.object(User, "to_dict", autospec=True,
+                          side_effect=BaseModel.to_dict) as to_dict:
+            models.storage.save()
+        self.assertEqual(0, to_dict.call_count)
+
+    def test_attribute_assignment_is_saved(self):
+        us = User()
+        models.storage.save()
+        us.firstName = "Betty"
+        models.storage.save()
+        with open("file.json", "r") as f:
+            objdict = json.load(f)
+        self.assertEqual("Betty", objdict["User." + us.id]["firstName"])
+
+    def test_saved_file_matches_to_dict(self):
+        us = User()
+        pl = Place()
+        models.storage.save()
+        pl.maxGuest = 4
+        models.storage.save()
+        with open("file.json", "r") as f:
+            objdict = json.load(f)
+        self.assertEqual({"User." + us.id: us.to_dict(),
+                          "Place." + pl.id: pl.to_dict()}, objdict)
+
+    def test_mark_dirty_with_arg(self):
+        with self.assertRaises(TypeError):
+            models.storage.mark_dirty()
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorage_lazy(unittest.TestCase):
+    """Unittests for testing lazy reload of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        models.storage.clear()
+        self.mapped = FileStorage._FileStorage__mapped
+        FileStorage._FileStorage__mapped = False
+        self.us = User()
+        self.pl = Place()
+        self.pl.name = "Loft"
+        models.storage.save()
+        models.storage.clear()
+        FileStorage._FileStorage__lazy = True
+        models.storage.reload()
+
+    def tearDown(self):
+        FileStorage._FileStorage__lazy = False
+        FileStorage._FileStorage__mapped = self.mapped
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def test_reload_builds_no_object(self):
+        self.assertEqual({}, FileStorage._FileStorage__objects)
+        self.assertEqual(2, len(FileStorage._FileStorage__raw))
+
+    def test_get_builds_one_object(self):
+        pl = models.storage.get(Place, self.pl.id)
+        self.assertEqual(Place, type(pl))
+        self.assertEqual(self.pl.to_dict(), pl.to_dict())
+        self.assertEqual(["Place." + self.pl.id],
+                         list(FileStorage._FileStorage__objects))
+        self.assertIs(pl, models.storage.get("Place", self.pl.id))
+
+    def test_get_missing(self):
+        self.assertIsNone(models.storage.get("Place", "1234"))
+        self.assertIsNone(models.storage.get(User, self.pl.id))
+
+    def test_all_builds_every_object(self):
+        objs = models.storage.all()
+        self.assertEqual(2, len(objs))
+        self.assertEqual(User, type(objs["User." + self.us.id]))
+        self.assertEqual({}, FileStorage._FileStorage__raw)
+
+    def test_save_keeps_lazy_records(self):
+        us = models.storage.get(User, self.us.id)
+        us.firstName = "Betty"
+        models.storage.save()
+        with open("file.json", "r") as f:
+            objdict = json.load(f)
+        self.assertEqual("Loft", objdict["Place." + self.pl.id]["name"])
+        self.assertEqual("Betty", objdict["User." + self.us.id]["firstName"])
+
+    def test_get_with_no_args(self):
+        with self.assertRaises(TypeError):
+            models.storage.get()
+
+    def check_file(self, count):
+        with open("file.json") as f:
+            records = json.load(f)
+        self.assertEqual(count, len(records))
+        for key, o in records.items():
+            self.assertEqual(key, "{}.{}".format(o["__class__"], o["id"]))
+            self.assertEqual(o["id"], o.get("email", o["id"]))
+
+    def test_reload_save_keeps_records(self):
+        for i in range(50):
+            us = User()
+            us.email = us.id
+        models.storage.save()
+        for i in range(3):
+            models.storage.reload()
+            models.storage.save()
+        self.check_file(52)
+
+    def test_insert_save_keeps_records(self):
+        records = []
+        for i in range(200):
+            us = User()
+            us.email = us.id
+            records.append(us.to_dict())
+        for i in range(3):
+            for o in records:
+                models.storage.insert(o)
+            models.storage.save()
+        self.check_file(202)
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorage_class_index(unittest.TestCase):
+    """Unittests for testing the per-class index of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def tearDown(self):
+        FileStorage._FileStorage__lazy = False
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def test_count(self):
+        for i in range(3):
+            User()
+        Review()
+        self.assertEqual(4, models.storage.count())
+        self.assertEqual(3, models.storage.count(User))
+        self.assertEqual(1, models.storage.count("Review"))
+        self.assertEqual(0, models.storage.count("Place"))
+
+    def test_count_after_delete(self):
+        us = User()
+        User()
+        models.storage.delete(us)
+        self.assertEqual(1, models.storage.count(User))
+        self.assertNotIn("User." + us.id, models.storage.all(User))
+
+    def test_all_with_cls_keeps_insertion_order(self):
+        users = [User() for i in range(5)]
+        self.assertEqual(["User." + us.id for us in users],
+                         list(models.storage.all(User)))
+
+    def test_index_follows_clear(self):
+        old = User()
+        models.storage.lookup(User, "firstName", "")
+        models.storage.clear()
+        self.assertEqual(0, models.storage.count(User))
+        self.assertEqual([], models.storage.lookup(User, "firstName", ""))
+        us = User()
+        self.assertEqual({"User." + us.id: us}, models.storage.all(User))
+        self.assertEqual([us], models.storage.lookup(User, "firstName", ""))
+        self.assertIsNone(models.storage.get(User, old.id))
+
+    def test_lazy_records_are_indexed(self):
+        us = User()
+        Place()
+        models.storage.save()
+        models.storage.clear()
+        FileStorage._FileStorage__lazy = True
+        models.storage.reload()
+        self.assertEqual(1, models.storage.count(User))
+        self.assertEqual(2, models.storage.count())
+        self.assertEqual({}, FileStorage._FileStorage__objects)
+        self.assertEqual(["User." + us.id], list(models.storage.all(User)))
+        self.assertEqual(["User." + us.id],
+                         list(FileStorage._FileStorage__objects))
+
+    def test_count_with_two_args(self):
+        with self.assertRaises(TypeError):
+            models.storage.count(User, None)
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorage_lookup(unittest.TestCase):
+    """Unittests for testing attribute lookups of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def tearDown(self):
+        FileStorage._FileStorage__lazy = False
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def test_lookup(self):
+        cy1 = City()
+        cy1.stat_id = "s1"
+        cy2 = City()
+        cy2.stat_id = "s2"
+        self.assertEqual([cy1], models.storage.lookup(City, "stat_id", "s1"))
+        self.assertEqual([cy2],
+                         models.storage.lookup("City", "stat_id", "s2"))
+        self.assertEqual([], models.storage.lookup(City, "stat_id", "s3"))
+
+    def test_lookup_class_default(self):
+        cy = City()
+        self.assertEqual([cy], models.storage.lookup(City, "stat_id", ""))
+
+    def test_lookup_follows_new(self):
+        self.assertEqual([], models.storage.lookup(City, "stat_id", "s1"))
+        cy = City()
+        cy.stat_id = "s1"
+        self.assertEqual([cy], models.storage.lookup(City, "stat_id", "s1"))
+
+    def test_lookup_follows_update(self):
+        cy = City()
+        cy.stat_id = "s1"
+        models.storage.lookup(City, "stat_id", "s1")
+        cy.stat_id = "s2"
+        self.assertEqual([], models.storage.lookup(City, "stat_id", "s1"))
+        self.assertEqual([cy], models.storage.lookup(City, "stat_id", "s2"))
+
+    def test_lookup_follows_delete(self):
+        cy = City()
+        cy.stat_id = "s1"
+        models.storage.lookup(City, "stat_id", "s1")
+        models.storage.delete(cy)
+        self.assertEqual([], models.storage.lookup(City, "stat_id", "s1"))
+
+    def test_lookup_lazy_records(self):
+        cy1 = City()
+        cy1.stat_id = "s1"
+        cy2 = City()
+        cy2.stat_id = "s2"
+        models.storage.save()
+        models.storage.clear()
+        FileStorage._FileStorage__lazy = True
+        models.storage.reload()
+        cities = models.storage.lookup(City, "stat_id", "s2")
+        self.assertEqual([cy2.to_dict()], [cy.to_dict() for cy in cities])
+        self.assertEqual(["City." + cy2.id],
+                         list(FileStorage._FileStorage__objects))
+
+    def test_lookup_with_no_args(self):
+        with self.assertRaises(TypeError):
+            models.storage.lookup()
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorage_where(unittest.TestCase):
+    """Unittests for testing attribute queries of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        models.storage.clear()
+        self.places = []
+        for price, guests in ((50, 2), (150, 6), (80, 4), (90, 8)):
+            pl = Place()
+            pl.priceByNight = price
+            pl.maxGuest = guests
+            self.places.append(pl)
+
+    def tearDown(self):
+        FileStorage._FileStorage__lazy = False
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def test_where_no_conditions(self):
+        self.assertEqual(self.places, list(models.storage.where(Place)))
+
+    def test_where_equality(self):
+        pl = self.places
+        self.assertEqual([pl[2]], list(models.storage.where(
+            "Place", [("maxGuest", "==", 4)])))
+        self.assertEqual([pl[0], pl[1], pl[3]], list(models.storage.where(
+            "Place", [("maxGuest", "!=", 4)])))
+
+    def test_where_range(self):
+        pl = self.places
+        found = models.storage.where(
+            Place, [("priceByNight", "<", 100), ("maxGuest", ">=", 4)])
+        self.assertEqual([pl[2], pl[3]], list(found))
+
+    def test_where_order_by(self):
+        pl = self.places
+        self.assertEqual([pl[0], pl[2], pl[3], pl[1]], list(
+            models.storage.where(Place, order_by="priceByNight")))
+        self.assertEqual([pl[1], pl[3], pl[2], pl[0]], list(
+            models.storage.where(Place, order_by="priceByNight",
+                                 reverse=True)))
+
+    def test_where_limit(self):
+        pl = self.places
+        self.assertEqual([pl[0], pl[1]], list(
+            models.storage.where(Place, limit=2)))
+        self.assertEqual([pl[3], pl[1]], list(models.storage.where(
+            Place, order_by="maxGuest", limit=2, reverse=True)))
+        self.assertEqual([], list(models.storage.where(Place, limit=0)))
+
+    def test_where_mismatched_type(self):
+        self.places[0].priceByNight = "cheap"
+        found = models.storage.where(Place, [("priceByNight", "<", 100)])
+        self.assertEqual([self.places[2], self.places[3]], list(found))
+
+    def test_where_unknown_operator(self):
+        with self.assertRaises(ValueError):
+            models.storage.where(Place, [("maxGuest", "~", 4)])
+
+    def test_explain(self):
+        conditions = [("name", "==", ""), ("city_id", "==", "")]
+        self.assertEqual("scan Place",
+                         models.storage.explain(Place, conditions))
+        models.storage.lookup(Place, "city_id", "")
+        self.assertEqual("index Place.city_id",
+                         models.storage.explain(Place, conditions))
+        self.assertEqual(self.places, list(
+            models.storage.where(Place, conditions)))
+
+    def test_where_lazy_records(self):
+        models.storage.save()
+        models.storage.clear()
+        FileStorage._FileStorage__lazy = True
+        models.storage.reload()
+        found = list(models.storage.where(Place, [("maxGuest", ">", 6)]))
+        self.assertEqual([self.places[3].to_dict()],
+                         [pl.to_dict() for pl in found])
+        self.assertEqual(["Place." + self.places[3].id],
+                         list(FileStorage._FileStorage__objects))
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorage_sorted_index(unittest.TestCase):
+    """Unittests for testing sorted indexes of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        models.storage.clear()
+        self.places = []
+        for price, guests in ((50, 2), (150, 6), (80, 4), (90, 8)):
+            pl = Place()
+            pl.priceByNight = price
+            pl.maxGuest = guests
+            self.places.append(pl)
+
+    def tearDown(self):
+        FileStorage._FileStorage__lazy = False
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def test_explain_range(self):
+        self.assertEqual("range Place.priceByNight", models.storage.explain(
+            Place, [("priceByNight", "<", 100)]))
+        self.assertEqual("ordered Place.lati", models.storage.explain(
+            Place, [("name", "==", "")], order_by="lati"))
+
+    def test_explain_picks_narrowest_range(self):
+        conditions = [("priceByNight", ">=", 0), ("maxGuest", ">", 6)]
+        self.assertEqual("range Place.maxGuest",
+                         models.storage.explain(Place, conditions))
+        self.assertEqual([self.places[3]], list(
+            models.storage.where(Place, conditions)))
+
+    def test_range(self):
+        pl = self.places
+        self.assertEqual([pl[2], pl[3]], list(models.storage.where(
+            Place, [("priceByNight", ">=", 80), ("priceByNight", "<", 150)],
+            order_by="priceByNight")))
+        self.assertEqual([pl[1]], list(models.storage.where(
+            Place, [("priceByNight", "==", 150)])))
+        self.assertEqual([pl[2], pl[3]], list(models.storage.where(
+            Place, [("priceByNight", "<", 100), ("maxGuest", ">=", 4)],
+            order_by="priceByNight")))
+
+    def test_top_k(self):
+        pl = self.places
+        self.assertEqual([pl[0], pl[2]], list(models.storage.where(
+            Place, order_by="priceByNight", limit=2)))
+        self.assertEqual([pl[1], pl[3]], list(models.storage.where(
+            Place, order_by="priceByNight", limit=2, reverse=True)))
+        self.assertEqual([pl[3]], list(models.storage.where(
+            Place, [("maxGuest", ">", 4)], order_by="priceByNight",
+            limit=1)))
+
+    def test_follows_update(self):
+        pl = self.places
+        list(models.storage.where(Place, order_by="priceByNight"))
+        pl[1].priceByNight = 10
+        pl[0].priceByNight = "cheap"
+        self.assertEqual([pl[1], pl[2], pl[3], pl[0]], list(
+            models.storage.where(Place, order_by="priceByNight")))
+        self.assertEqual([pl[1], pl[2]], list(models.storage.where(
+            Place, [("priceByNight", "<", 90)])))
+
+    def test_follows_new_and_delete(self):
+        list(models.storage.where(Place, order_by="priceByNight"))
+        pl = Place()
+        pl.priceByNight = 60
+        models.storage.delete(self.places[0])
+        self.assertEqual([pl, self.places[2]], list(models.storage.where(
+            Place, [("priceByNight", "<", 90)], order_by="priceByNight")))
+
+    def test_lazy_records(self):
+        models.storage.save()
+        models.storage.clear()
+        FileStorage._FileStorage__lazy = True
+        models.storage.reload()
+        found = list(models.storage.where(
+            Place, order_by="priceByNight", limit=1))
+        self.assertEqual([self.places[0].to_dict()],
+                         [pl.to_dict() for pl in found])
+        self.assertEqual(["Place." + self.places[0].id],
+                         list(FileStorage._FileStorage__objects))
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorage_spatial(unittest.TestCase):
+    """Unittests for testing spatial queries of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        models.storage.clear()
+        self.places = []
+        for lati, long in ((37.7749, -122.4194), (37.8044, -122.2712),
+                           (34.0522, -118.2437)):
+            pl = Place()
+            pl.lati = lati
+            pl.long = long
+            self.places.append(pl)
+
+    def tearDown(self):
+        FileStorage._FileStorage__lazy = False
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def test_near(self):
+        pl = self.places
+        self.assertEqual([pl[1], pl[0]],
+                         models.storage.near(Place, 37.80, -122.27, 20))
+        self.assertEqual([pl[1]],
+                         models.storage.near("Place", 37.80, -122.27, 20, 1))
+        self.assertEqual([pl[1], pl[0], pl[2]],
+                         models.storage.near(Place, 37, -121, 600))
+
+    def test_within(self):
+        pl = self.places
+        self.assertEqual(pl[:2], models.storage.within(
+            Place, 37, -123, 38, -122))
+        self.assertEqual([pl[2]], models.storage.within(
+            "Place", 33, -119, 35, -118))
+
+    def test_follows_new_and_delete(self):
+        models.storage.near(Place, 0, 0, 1)
+        pl = Place()
+        pl.lati = 37.77
+        pl.long = -122.42
+        models.storage.delete(self.places[0])
+        self.assertEqual([pl], models.storage.near(Place, 37.77, -122.42, 5))
+
+    def test_no_coordinates(self):
+        with self.assertRaises(ValueError):
+            models.storage.near(User, 0, 0, 1)
+        with self.assertRaises(ValueError):
+            models.storage.within("City", 0, 0, 1, 1)
+
+    def test_lazy_records(self):
+        models.storage.save()
+        models.storage.clear()
+        FileStorage._FileStorage__lazy = True
+        models.storage.reload()
+        found = models.storage.near(Place, 34, -118, 30)
+        self.assertEqual([self.places[2].to_dict()],
+                         [pl.to_dict() for pl in found])
+        self.assertEqual(["Place." + self.places[2].id],
+                         list(FileStorage._FileStorage__objects))
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorage_columns(unittest.TestCase):
+    """Unittests for testing the column stores of the FileStorage class."""
+
+    def setUp(self):
+        models.storage.clear()
+        self.places = []
+        for city, price in (("c1", 100), ("c2", 50), ("c1", 300)):
+            pl = Place()
+            pl.city_id = city
+            pl.priceByNight = price
+            self.places.append(pl)
+
+    def tearDown(self):
+        models.storage.clear()
+
+    def test_columns(self):
+        store = models.storage.columns(Place)
+        self.assertIs(store, models.storage.columns("Place"))
+        self.assertIn("priceByNight", store.names)
+        self.assertIn("city_id", store.names)
+        self.assertNotIn("Amenity_ids", store.names)
+        self.assertEqual(["Place." + pl.id for pl in self.places],
+                         store.keys)
+        self.assertEqual([100, 50, 300],
+                         list(store.columns["priceByNight"]))
+
+    def test_columns_follow_changes(self):
+        store = models.storage.columns(Place)
+        pl = Place()
+        pl.priceByNight = 80
+        self.places[0].priceByNight = 120
+        models.storage.delete(self.places[1])
+        self.assertEqual(3, len(store.keys))
+        self.assertEqual([120, 80, 300],
+                         list(store.columns["priceByNight"]))
+
+    def test_columns_rebuilt_after_reset(self):
+        store = models.storage.columns(Place)
+        models.storage.clear()
+        Place()
+        self.assertIsNot(store, models.storage.columns(Place))
+        self.assertEqual(1, len(models.storage.columns(Place).keys))
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorage_compact(unittest.TestCase):
+    """Unittests for testing compact records of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        models.storage.clear()
+        self.mapped = FileStorage._FileStorage__mapped
+        FileStorage._FileStorage__mapped = False
+        self.pl = Place()
+        self.pl.city_id = City().id
+        self.pl.maxGuest = 4
+        self.pl.color = "blue"
+        models.storage.save()
+        models.storage.clear()
+        FileStorage._FileStorage__compact = True
+        models.storage.reload()
+
+    def tearDown(self):
+        FileStorage._FileStorage__compact = False
+        FileStorage._FileStorage__mapped = self.mapped
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def test_reload_keeps_records(self):
+        raw = FileStorage._FileStorage__raw
+        self.assertEqual({}, FileStorage._FileStorage__objects)
+        self.assertEqual(2, len(raw))
+        self.assertEqual(Record, type(raw["Place." + self.pl.id]))
+
+    def test_object_unchanged(self):
+        pl = models.storage.get(Place, self.pl.id)
+        self.assertEqual(self.pl.to_dict(), pl.to_dict())
+        self.assertEqual(str(self.pl), str(pl))
+
+    def test_queries(self):
+        self.assertEqual(1, models.storage.count(Place))
+        found = models.storage.lookup(Place, "city_id", self.pl.city_id)
+        self.assertEqual([self.pl.to_dict()], [pl.to_dict() for pl in found])
+        self.assertEqual(["Place." + self.pl.id],
+                         list(FileStorage._FileStorage__objects))
+
+    def test_save_unchanged(self):
+        with open("file.json", "r") as f:
+            before = f.read()
+        models.storage.save()
+        with open("file.json", "r") as f:
+            self.assertEqual(before, f.read())
+
+    def test_save_caches_no_records(self):
+        User().save()
+        State().save()
+        self.assertNotIn(Record, [type(obj) for obj, fragment in
+                                  FileStorage._FileStorage__cache.values()])
+        with open("file.json", "r") as f:
+            self.assertEqual(self.pl.to_dict(),
+                             json.load(f)["Place." + self.pl.id])
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorage_batch(unittest.TestCase):
+    """Unittests for testing batches of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        models.storage.clear()
+        models.storage.changes()
+
+    def tearDown(self):
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def saved(self):
+        with open("file.json", "r") as f:
+            return json.load(f)
+
+    def test_batch_saves_once(self):
+        with patch("models.engine.json_stream.dump_items") as dump:
+            with models.storage.batch() as storage:
+                self.assertIs(models.storage, storage)
+                for _ in range(3):
+                    User().save()
+                models.storage.save()
+                self.assertEqual(0, dump.call_count)
+            self.assertEqual(1, dump.call_count)
+
+    def test_batch_flushes_changes(self):
+        us = User()
+        models.storage.save()
+        with models.storage.batch():
+            pl = Place()
+            us.firstName = "Betty"
+            us.save()
+            self.assertNotIn("Place." + pl.id, self.saved())
+        saved = self.saved()
+        self.assertIn("Place." + pl.id, saved)
+        self.assertEqual("Betty", saved["User." + us.id]["firstName"])
+
+    def test_batch_flushes_deletes(self):
+        st = State()
+        models.storage.save()
+        with models.storage.batch():
+            models.storage.delete(st)
+            models.storage.save()
+            self.assertIn("State." + st.id, self.saved())
+        self.assertNotIn("State." + st.id, self.saved())
+
+    def test_nested_batches(self):
+        with models.storage.batch():
+            with models.storage.batch():
+                cy = City()
+            self.assertTrue(models.storage.batching())
+            self.assertFalse(os.path.exists("file.json"))
+        self.assertFalse(models.storage.batching())
+        self.assertIn("City." + cy.id, self.saved())
+
+    def test_batch_flushes_on_exception(self):
+        with self.assertRaises(KeyError):
+            with models.storage.batch():
+                am = Amenity()
+                raise KeyError
+        self.assertFalse(models.storage.batching())
+        self.assertIn("Amenity." + am.id, self.saved())
+
+    def test_batch_without_changes(self):
+        with models.storage.batch():
+            pass
+        self.assertFalse(os.path.exists("file.json"))
+
+    def test_batch_is_per_thread(self):
+        with models.storage.batch():
+            us = User()
+            thread = threading.Thread(target=models.storage.save)
+            thread.start()
+            thread.join()
+            self.assertIn("User." + us.id, self.saved())
+            self.assertTrue(models.storage.batching())
+            batching = []
+            thread = threading.Thread(
+                target=lambda: batching.append(models.storage.batching()))
+            thread.start()
+            thread.join()
+            self.assertEqual([False], batching)
+
+
+class TestFileStorage_records(unittest.TestCase):
+    """Unittests for testing insert() and records() of the FileStorage
+    class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        models.storage.clear()
+        models.storage.changes()
+        self.record = {"id": "1", "crea_at": "2020-01-02T03:04:05",
+                       "upd_at": "2020-01-02T03:04:05", "name": "Loft",
+                       "__class__": "Place"}
+
+    def tearDown(self):
+        FileStorage._FileStorage__compact = False
+        FileStorage._FileStorage__journaling = False
+        for name in ("file.json", "file.json.idx", "file.json.log"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def test_insert_builds_object(self):
+        models.storage.insert(self.record)
+        pl = models.storage.get(Place, "1")
+        self.assertEqual("Loft", pl.name)
+        self.assertEqual(self.record, pl.to_dict())
+        self.assertEqual({"Place.1"}, models.storage.changes())
+
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
+    def test_insert_compact(self):
+        FileStorage._FileStorage__compact = True
+        models.storage.insert(self.record)
+        self.assertEqual({}, FileStorage._FileStorage__objects)
+        self.assertEqual(1, models.storage.count(Place))
+        models.storage.save()
+        with open("file.json", "r") as f:
+            self.assertEqual(self.record, json.load(f)["Place.1"])
+
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
+    def test_insert_journal(self):
+        FileStorage._FileStorage__compact = True
+        FileStorage._FileStorage__journaling = True
+        models.storage.insert(self.record)
+        models.storage.save()
+        with open("file.json.log", "r") as f:
+            self.assertEqual(["put", "Place.1", self.record],
+                             json.loads(f.read()))
+
+    def test_records(self):
+        us = User()
+        FileStorage._FileStorage__compact = True
+        models.storage.insert(self.record)
+        self.assertEqual([self.record], list(models.storage.records(Place)))
+        self.assertEqual([us.to_dict()],
+                         list(models.storage.records("User")))
+        self.assertEqual(2, len(list(models.storage.records())))
+        self.assertNotIn("Place.1", FileStorage._FileStorage__objects)
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorage_durability(unittest.TestCase):
+    """Unittests for testing the durability modes of the FileStorage
+    class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        models.storage.clear()
+        self.saved_flush = (FileStorage._FileStorage__flush_interval,
+                            FileStorage._FileStorage__flush_count)
+
+    def tearDown(self):
+        FileStorage._FileStorage__durability = "none"
+        FileStorage._FileStorage__journaling = False
+        (FileStorage._FileStorage__flush_interval,
+         FileStorage._FileStorage__flush_count) = self.saved_flush
+        FileStorage._FileStorage__dirty = False
+        flusher = FileStorage._FileStorage__flusher
+        FileStorage._FileStorage__flusher = None
+        if flusher is not None:
+            FileStorage._FileStorage__wake.set()
+            flusher.join()
+        for name in ("file.json", "file.json.idx", "file.json.log"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def wait_for(self, name, text):
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            if os.path.exists(name):
+                with open(name, "r") as f:
+                    if text in f.read():
+                        return True
+            time.sleep(0.01)
+        return False
+
+    def test_durability_is_private_str(self):
+        self.assertEqual(str, type(FileStorage._FileStorage__durability))
+
+    def test_fsync_mode(self):
+        FileStorage._FileStorage__durability = "fsync"
+        with patch("models.engine.file_storage.fsync") as fsync:
+            us = User()
+            models.storage.save()
+        self.assertEqual(2, fsync.call_count)
+        self.assertTrue(self.wait_for("file.json", us.id))
+
+    def test_fsync_mode_journal(self):
+        FileStorage._FileStorage__durability = "fsync"
+        FileStorage._FileStorage__journaling = True
+        with patch("models.engine.file_storage.fsync") as fsync:
+            us = User()
+            models.storage.save()
+        self.assertEqual(1, fsync.call_count)
+        self.assertTrue(self.wait_for("file.json.log", us.id))
+
+    def test_exit_mode_puts_off_writes(self):
+        FileStorage._FileStorage__durability = "exit"
+        us = User()
+        models.storage.save()
+        self.assertFalse(os.path.exists("file.json"))
+        with patch("models.engine.file_storage.fsync") as fsync:
+            models.storage.sync()
+        self.assertEqual(2, fsync.call_count)
+        self.assertTrue(self.wait_for("file.json", us.id))
+
+    def test_reload_keeps_put_off_writes(self):
+        FileStorage._FileStorage__durability = "group"
+        FileStorage._FileStorage__flush_interval = 60
+        us = User()
+        st = State()
+        models.storage.save()
+        models.storage.delete(st)
+        models.storage.save()
+        models.storage.reload()
+        self.assertIn("User." + us.id, models.storage.all())
+        self.assertNotIn("State." + st.id, models.storage.all())
+        self.assertEqual(set(), models.storage.changes())
+        self.assertTrue(self.wait_for("file.json", us.id))
+
+    def test_sync_without_changes(self):
+        FileStorage._FileStorage__durability = "exit"
+        models.storage.sync()
+        self.assertFalse(os.path.exists("file.json"))
+
+    def test_group_mode_interval(self):
+        FileStorage._FileStorage__durability = "group"
+        FileStorage._FileStorage__flush_interval = 0.01
+        us = User()
+        models.storage.save()
+        self.assertTrue(self.wait_for("file.json", us.id))
+
+    def test_group_mode_count(self):
+        FileStorage._FileStorage__durability = "group"
+        FileStorage._FileStorage__flush_interval = 60
+        FileStorage._FileStorage__flush_count = 3
+        us = User()
+        models.storage.save()
+        time.sleep(0.05)
+        self.assertFalse(os.path.exists("file.json"))
+        State()
+        Place()
+        models.storage.save()
+        self.assertTrue(self.wait_for("file.json", us.id))
+
+    def test_group_mode_batch(self):
+        FileStorage._FileStorage__durability = "group"
+        FileStorage._FileStorage__flush_interval = 60
+        with models.storage.batch():
+            am = Amenity()
+        models.storage.sync()
+        self.assertTrue(self.wait_for("file.json", am.id))
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorage_atomic_save(unittest.TestCase):
+    """Unittests for testing atomic saves and recovery of the FileStorage
+    class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        models.storage.clear()
+        self.mapped = FileStorage._FileStorage__mapped
+        FileStorage._FileStorage__mapped = False
+
+    def tearDown(self):
+        models.storage._FileStorage__unmap()
+        FileStorage._FileStorage__backups = 0
+        FileStorage._FileStorage__mapped = self.mapped
+        for name in ("file.json", "file.json.idx", "file.json.tmp",
+                     "file.json.torn", "file.json.bak.1", "file.json.bak.2",
+                     "file.json.bak.3"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def saved(self, name="file.json"):
+        with open(name, "r") as f:
+            return json.load(f)
+
+    def reload(self):
+        models.storage.clear()
+        models.storage.reload()
+        return models.storage.all()
+
+    def test_save_fsyncs_then_replaces(self):
+        us = User()
+        with patch("models.engine.file_storage.fsync") as fsync:
+            with patch("models.engine.file_storage.replace",
+                       wraps=os.replace) as replace:
+                models.storage.save()
+        self.assertEqual(1, fsync.call_count)
+        replace.assert_called_once_with("file.json.tmp", "file.json")
+        self.assertFalse(os.path.exists("file.json.tmp"))
+        self.assertIn("User." + us.id, self.saved())
+
+    def test_failed_save_keeps_snapshot(self):
+        us = User()
+        models.storage.save()
+        State()
+        with patch("models.engine.json_stream.dump_items",
+                   side_effect=OSError):
+            with self.assertRaises(OSError):
+                models.storage.save()
+        self.assertEqual(["User." + us.id], list(self.saved()))
+
+    def test_rolling_backups(self):
+        FileStorage._FileStorage__backups = 2
+        objs = []
+        for _ in range(4):
+            objs.append(User())
+            models.storage.save()
+        self.assertEqual(4, len(self.saved()))
+        self.assertEqual(3, len(self.saved("file.json.bak.1")))
+        self.assertEqual(2, len(self.saved("file.json.bak.2")))
+        self.assertFalse(os.path.exists("file.json.bak.3"))
+
+    def test_no_backups_by_default(self):
+        User()
+        models.storage.save()
+        models.storage.save()
+        self.assertFalse(os.path.exists("file.json.bak.1"))
+
+    def test_reload_restores_backup(self):
+        FileStorage._FileStorage__backups = 1
+        us = User()
+        models.storage.save()
+        State()
+        models.storage.save()
+        with open("file.json", "r") as f:
+            torn = f.read()[:-20]
+        with open("file.json", "w") as f:
+            f.write(torn)
+        objs = self.reload()
+        self.assertEqual(["User." + us.id], list(objs))
+        self.assertEqual(["User." + us.id], list(self.saved()))
+        with open("file.json.torn", "r") as f:
+            self.assertEqual(torn, f.read())
+
+    def test_reload_salvages_torn_file(self):
+        us = User()
+        st = State()
+        models.storage.save()
+        with open("file.json", "r") as f:
+            whole = f.read()
+        cut = whole.index('"State.' + st.id + '"')
+        with open("file.json", "w") as f:
+            f.write(whole[:cut + 20])
+        objs = self.reload()
+        self.assertEqual(["User." + us.id], list(objs))
+        self.assertTrue(os.path.exists("file.json.torn"))
+        self.assertFalse(os.path.exists("file.json"))
+        models.storage.save()
+        self.assertEqual(["User." + us.id], list(self.saved()))
+
+    def test_reload_rejects_bad_record(self):
+        objs = [User(), State(), City()]
+        models.storage.save()
+        saved = self.saved()
+        bad = "State." + objs[1].id
+        saved[bad]["crea_at"] = "not a date"
+        with open("file.json", "w") as f:
+            json.dump(saved, f)
+        loaded = self.reload()
+        self.assertEqual(2, len(loaded))
+        self.assertNotIn(bad, loaded)
+        self.assertEqual(["not a date"], [
+            o["crea_at"] for o in models.storage.rejected().values()])
+        self.assertFalse(os.path.exists("file.json.torn"))
+        models.storage.save()
+        self.assertEqual(saved, self.saved())
+
+    def test_failed_encode_removes_tmp(self):
+        User()
+        with patch("models.engine.json_stream.encode",
+                   side_effect=TypeError):
+            with self.assertRaises(TypeError):
+                models.storage.save()
+        self.assertFalse(os.path.exists("file.json.tmp"))
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorage_formats(unittest.TestCase):
+    """Unittests for testing the snapshot formats of the FileStorage
+    class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def tearDown(self):
+        FileStorage._FileStorage__format = "json"
+        FileStorage._FileStorage__journaling = False
+        FileStorage._FileStorage__cache.clear()
+        for path in ("file.json", "file.json.idx",
+                     "file.json.log", "file.json.log.1"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def head(self):
+        with open("file.json", "rb") as f:
+            return f.read(len(MAGIC))
+
+    def reload(self):
+        models.storage.clear()
+        models.storage.reload()
+        return models.storage.all()
+
+    def test_save_binary(self):
+        FileStorage._FileStorage__format = "binary"
+        User()
+        models.storage.save()
+        self.assertEqual(MAGIC, self.head())
+
+    def test_reload_binary(self):
+        FileStorage._FileStorage__format = "binary"
+        us = User()
+        us.firstName = "Betty"
+        pl = Place()
+        pl.Amenity_ids = ["a", "b"]
+        models.storage.save()
+        objs = self.reload()
+        self.assertEqual(us.to_dict(), objs["User." + us.id].to_dict())
+        self.assertEqual(pl.to_dict(), objs["Place." + pl.id].to_dict())
+
+    def test_reload_sniffs_format(self):
+        us = User()
+        models.storage.save()
+        FileStorage._FileStorage__format = "binary"
+        self.assertIn("User." + us.id, self.reload())
+
+    def test_convert(self):
+        us = User()
+        models.storage.save()
+        models.storage.convert("binary")
+        self.assertEqual(MAGIC, self.head())
+        self.assertIn("User." + us.id, self.reload())
+        models.storage.convert("json")
+        with open("file.json", "r") as f:
+            self.assertEqual(us.to_dict(), json.load(f)["User." + us.id])
+
+    def test_convert_unknown_format(self):
+        with self.assertRaises(ValueError):
+            models.storage.convert("xml")
+
+    def test_convert_keeps_saving_in_format(self):
+        models.storage.convert("binary")
+        us = User()
+        models.storage.save()
+        self.assertEqual(MAGIC, self.head())
+        self.assertIn("User." + us.id, self.reload())
+
+    def test_binary_journal_and_compaction(self):
+        FileStorage._FileStorage__format = "binary"
+        FileStorage._FileStorage__journaling = True
+        us = User()
+        st = State()
+        models.storage.save()
+        models.storage.delete(st)
+        us.firstName = "Betty"
+        models.storage.save()
+        with open("file.json.log", "r") as f:
+            self.assertEqual(4, len([json.loads(line) for line in f]))
+        models.storage.compact()
+        self.assertFalse(os.path.exists("file.json.log"))
+        self.assertEqual(MAGIC, self.head())
+        objs = self.reload()
+        self.assertEqual(["User." + us.id], list(objs))
+        self.assertEqual("Betty", objs["User." + us.id].firstName)
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorage_mapped(unittest.TestCase):
+    """Unittests for testing the mapped mode of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        models.storage.clear()
+        self.mapped = FileStorage._FileStorage__mapped
+        FileStorage._FileStorage__mapped = True
+        self.us = User()
+        self.us.firstName = "Betty"
+        self.st = State()
+        self.pl = Place()
+        self.pl.maxGuest = 4
+        models.storage.save()
+
+    def tearDown(self):
+        models.storage._FileStorage__unmap()
+        FileStorage._FileStorage__mapped = self.mapped
+        FileStorage._FileStorage__journaling = False
+        FileStorage._FileStorage__format = "json"
+        FileStorage._FileStorage__cache.clear()
+        for path in ("file.json", "file.json.idx", "file.json.log"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def reload(self):
+        models.storage.clear()
+        models.storage.reload()
+
+    def loaded(self):
+        return (list(FileStorage._FileStorage__objects) +
+                list(FileStorage._FileStorage__raw))
+
+    def test_save_writes_index(self):
+        index = OffsetIndex("file.json.idx", "file.json", json_stream)
+        self.assertEqual(3, len(index))
+        self.assertEqual(self.us.to_dict(), index.get("User." + self.us.id))
+        index.close()
+
+    def test_reload_loads_nothing(self):
+        self.reload()
+        self.assertEqual([], self.loaded())
+        self.assertEqual(3, models.storage.count())
+
+    def test_get_loads_one_record(self):
+        self.reload()
+        us = models.storage.get("User", self.us.id)
+        self.assertEqual(self.us.to_dict(), us.to_dict())
+        self.assertIs(us, models.storage.get(User, self.us.id))
+        self.assertEqual(["User." + self.us.id], self.loaded())
+        self.assertIsNone(models.storage.get("User", self.st.id))
+        self.assertEqual(set(), models.storage.changes())
+
+    def test_all_of_class_loads_class(self):
+        self.reload()
+        self.assertEqual(["State." + self.st.id],
+                         list(models.storage.all(State)))
+        self.assertEqual(["State." + self.st.id], self.loaded())
+        self.assertEqual(1, models.storage.count("Place"))
+
+    def test_all(self):
+        self.reload()
+        self.assertEqual(3, len(models.storage.all()))
+
+    def test_records_load_nothing(self):
+        self.reload()
+        self.assertEqual([self.pl.to_dict()],
+                         list(models.storage.records(Place)))
+        self.assertEqual(3, len(list(models.storage.records())))
+        self.assertEqual([], self.loaded())
+
+    def test_where(self):
+        self.reload()
+        found = list(models.storage.where(Place, [("maxGuest", ">", 2)]))
+        self.assertEqual([self.pl.id], [pl.id for pl in found])
+
+    def test_delete(self):
+        self.reload()
+        models.storage.delete(models.storage.get("State", self.st.id))
+        self.assertIsNone(models.storage.get("State", self.st.id))
+        self.assertEqual(2, models.storage.count())
+        models.storage.save()
+        self.reload()
+        self.assertIsNone(models.storage.get("State", self.st.id))
+        self.assertEqual(2, models.storage.count())
+
+    def test_save_keeps_records_not_loaded(self):
+        self.reload()
+        am = Amenity()
+        us = models.storage.get("User", self.us.id)
+        us.firstName = "Holberton"
+        models.storage.save()
+        self.reload()
+        self.assertEqual(4, models.storage.count())
+        self.assertIsNotNone(models.storage.get("Amenity", am.id))
+        self.assertEqual("Holberton",
+                         models.storage.get("User", self.us.id).firstName)
+
+    def test_stale_index(self):
+        FileStorage._FileStorage__mapped = False
+        am = Amenity()
+        models.storage.save()
+        FileStorage._FileStorage__mapped = True
+        self.reload()
+        self.assertEqual(4, len(self.loaded()))
+        index = OffsetIndex("file.json.idx", "file.json", json_stream)
+        self.assertIn("Amenity." + am.id, index)
+        index.close()
+
+    def test_journal(self):
+        FileStorage._FileStorage__journaling = True
+        self.reload()
+        models.storage.get("User", self.us.id).firstName = "Holberton"
+        models.storage.save()
+        self.reload()
+        self.assertEqual(["User." + self.us.id], self.loaded())
+        self.assertEqual("Holberton",
+                         models.storage.get("User", self.us.id).firstName)
+        models.storage.compact()
+        self.reload()
+        self.assertEqual([], self.loaded())
+        self.assertEqual("Holberton",
+                         models.storage.get("User", self.us.id).firstName)
+
+    def test_binary(self):
+        models.storage.convert("binary")
+        self.reload()
+        self.assertEqual(self.pl.to_dict(),
+                         models.storage.get("Place", self.pl.id).to_dict())
+        self.assertEqual(["Place." + self.pl.id], self.loaded())
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorage_shared(unittest.TestCase):
+    """Unittests for testing the shared mode of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        models.storage.clear()
+        FileStorage._FileStorage__shared = True
+        models.storage.reload()
+        self.us = User()
+        self.us.firstName = "Betty"
+        self.st = State()
+        models.storage.save()
+
+    def tearDown(self):
+        FileStorage._FileStorage__shared = False
+        FileStorage._FileStorage__journaling = False
+        FileStorage._FileStorage__generations = None
+        FileStorage._FileStorage__journal_seen = 0
+        for path in ("file.json", "file.json.idx",
+                     "file.json.lock", "file.json.log"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def other(self, code, **env):
+        """Run code in another process sharing the store."""
+        env = dict(os.environ, HBNB_FS_SHARED="1", **env)
+        env.pop("HBNB_TYPE_STORAGE", None)
+        subprocess.run(
+            [sys.executable, "-c", "from models import storage\n" +
+             "from models.state import State\n" + code],
+            env=env, check=True)
+
+    def generations(self):
+        with open("file.json.lock", "rb") as f:
+            return COUNTERS.unpack(f.read())
+
+    def test_save_counts_writes(self):
+        self.assertEqual((1, 1), self.generations())
+        models.storage.save()
+        self.assertEqual((2, 2), self.generations())
+
+    @unittest.skipIf(file_lock.fcntl is None, "no fcntl")
+    def test_save_holds_lock(self):
+        with patch.object(file_lock.fcntl, "flock",
+                          wraps=file_lock.fcntl.flock) as flock:
+            models.storage.save()
+        self.assertIn(file_lock.fcntl.LOCK_EX,
+                      [call.args[1] for call in flock.call_args_list])
+
+    def test_refresh_loads_changed_records(self):
+        self.other("us = storage.get('User', '{}')\n"
+                   "us.firstName = 'Holberton'\n"
+                   "us.save()".format(self.us.id))
+        models.storage.refresh()
+        us = models.storage.get("User", self.us.id)
+        self.assertEqual("Holberton", us.firstName)
+        self.assertIsNot(self.us, us)
+        self.assertIs(self.st, models.storage.get("State", self.st.id))
+
+    def test_refresh_loads_changes_without_upd_at(self):
+        self.other("us = storage.get('User', '{}')\n"
+                   "us.lastName = 'Holberton'\n"
+                   "storage.save()".format(self.us.id))
+        models.storage.refresh()
+        us = models.storage.get("User", self.us.id)
+        self.assertEqual("Holberton", us.lastName)
+        Amenity()
+        models.storage.save()
+        with open("file.json", "r") as f:
+            o = json.load(f)["User." + self.us.id]
+        self.assertEqual("Holberton", o["lastName"])
+
+    def test_save_stamps_insert_of_same_version(self):
+        o = self.us.to_dict()
+        o["lastName"] = "Holberton"
+        FileStorage._FileStorage__lazy = True
+        try:
+            models.storage.insert(o)
+            models.storage.save()
+        finally:
+            FileStorage._FileStorage__lazy = False
+        self.other("us = storage.get('User', '{}')\n"
+                   "assert us.lastName == 'Holberton', us.lastName\n"
+                   "assert us.upd_at.isoformat() > '{}'".format(
+                       self.us.id, o["upd_at"]))
+
+    def test_refresh_deleted_records(self):
+        self.other("storage.delete(storage.get('State', '{}'))\n"
+                   "storage.save()".format(self.st.id))
+        models.storage.refresh()
+        self.assertIsNone(models.storage.get("State", self.st.id))
+        self.assertEqual(1, models.storage.count())
+
+    def test_save_keeps_other_writes(self):
+        self.other("State().save()")
+        am = Amenity()
+        models.storage.save()
+        self.assertEqual(2, models.storage.count(State))
+        with open("file.json", "r") as f:
+            objdict = json.load(f)
+        self.assertEqual(4, len(objdict))
+        self.assertIn("Amenity." + am.id, objdict)
+
+    def test_conflict(self):
+        self.us.firstName = "Changed here"
+        self.other("us = storage.get('User', '{}')\n"
+                   "us.firstName = 'Holberton'\n"
+                   "us.save()".format(self.us.id))
+        am = Amenity()
+        with self.assertRaises(ConflictError) as error:
+            models.storage.save()
+        self.assertEqual(["User." + self.us.id], error.exception.keys)
+        self.assertEqual("Holberton",
+                         models.storage.get("User", self.us.id).firstName)
+        with open("file.json", "r") as f:
+            objdict = json.load(f)
+        self.assertEqual("Holberton",
+                         objdict["User." + self.us.id]["firstName"])
+        self.assertIn("Amenity." + am.id, objdict)
+
+    def test_conflict_seen_by_refresh(self):
+        self.us.firstName = "Changed here"
+        self.other("storage.delete(storage.get('User', '{}'))\n"
+                   "storage.save()".format(self.us.id))
+        models.storage.refresh()
+        self.assertIs(self.us, models.storage.get("User", self.us.id))
+        with self.assertRaises(ConflictError):
+            models.storage.save()
+        self.assertIsNone(models.storage.get("User", self.us.id))
+
+    def test_no_conflict_on_other_objects(self):
+        self.other("st = storage.get('State', '{}')\n"
+                   "st.name = 'CA'\n"
+                   "st.save()".format(self.st.id))
+        self.us.firstName = "Changed here"
+        models.storage.save()
+        self.assertEqual("CA", models.storage.get("State", self.st.id).name)
+
+    def test_journal_reads_new_records_only(self):
+        FileStorage._FileStorage__journaling = True
+        self.other("us = storage.get('User', '{}')\n"
+                   "us.firstName = 'Holberton'\n"
+                   "us.save()".format(self.us.id), HBNB_FS_JOURNAL="1")
+        with patch("models.engine.json_stream.load_items") as load:
+            models.storage.refresh()
+        load.assert_not_called()
+        self.assertEqual("Holberton",
+                         models.storage.get("User", self.us.id).firstName)
+        self.us = models.storage.get("User", self.us.id)
+        self.us.save()
+        self.other("us = storage.get('User', '{}')\n"
+                   "assert us.upd_at.isoformat() == '{}'".format(
+                       self.us.id, self.us.upd_at.isoformat()),
+                   HBNB_FS_JOURNAL="1")
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorage_threads(unittest.TestCase):
+    """Unittests for testing the FileStorage class used by threads."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        models.storage.clear()
+        FileStorage._FileStorage__durability = "none"
+
+    def tearDown(self):
+        FileStorage._FileStorage__threaded = False
+        FileStorage._FileStorage__journaling = False
+        for name in ("file.json", "file.json.idx", "file.json.log"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def test_all_returns_copy(self):
+        us = User()
+        objs = models.storage.all()
+        self.assertIsNot(FileStorage._FileStorage__objects, objs)
+        self.assertIs(objs, models.storage.all())
+        self.assertIn("User." + us.id, objs)
+        st = State()
+        self.assertNotIn("State." + st.id, objs)
+        self.assertIn("State." + st.id, models.storage.all())
+        models.storage.delete(st)
+        self.assertNotIn("State." + st.id, models.storage.all())
+
+    def test_save_leaves_writers_free(self):
+        FileStorage._FileStorage__journaling = False
+        us = User()
+        created = []
+        dump_items = json_stream.dump_items
+
+        def dump_while_creating(items, f, positions=None):
+            thread = threading.Thread(
+                target=lambda: created.append(State()))
+            thread.start()
+            thread.join(5)
+            return dump_items(items, f, positions)
+        with patch.object(json_stream, "dump_items",
+                          side_effect=dump_while_creating):
+            models.storage.save()
+        self.assertEqual(1, len(created))
+        with open("file.json", "r") as f:
+            objdict = json.load(f)
+        self.assertIn("User." + us.id, objdict)
+        self.assertNotIn("State." + created[0].id, objdict)
+        models.storage.save()
+        with open("file.json", "r") as f:
+            self.assertIn("State." + created[0].id, json.load(f))
+
+    def test_failed_save_keeps_changes(self):
+        FileStorage._FileStorage__journaling = False
+        us = User()
+        with patch.object(json_stream, "dump_items", side_effect=OSError):
+            with self.assertRaises(OSError):
+                models.storage.save()
+        models.storage.save()
+        with open("file.json", "r") as f:
+            self.assertIn("User." + us.id, json.load(f))
+
+    def test_reads_wait_for_writers(self):
+        FileStorage._FileStorage__threaded = True
+        us = User()
+        found = []
+        with FileStorage._FileStorage__lock.hold():
+            thread = threading.Thread(
+                target=lambda: found.append(models.storage.get(User, us.id)))
+            thread.start()
+            thread.join(0.2)
+            self.assertEqual([], found)
+        thread.join(5)
+        self.assertEqual([us], found)
+
+    def test_where_yields_unlocked(self):
+        FileStorage._FileStorage__threaded = True
+        for i in range(3):
+            Place().name = "Loft"
+        for pl in models.storage.where(Place, [("name", "==", "Loft")]):
+            self.assertFalse(FileStorage._FileStorage__lock.held())
+            pl.name = "House"
+        self.assertEqual([], list(models.storage.where(
+            Place, [("name", "==", "Loft")])))
+
+    def test_reads_and_writes_together(self):
+        FileStorage._FileStorage__threaded = True
+        errors = []
+        stop = threading.Event()
+
+        def run(work):
+            try:
+                while not stop.is_set():
+                    work()
+            except Exception as error:
+                errors.append(error)
+                stop.set()
+
+        def write():
+            for i in range(20):
+                models.storage.delete(State())
+                User().firstName = "Betty"
+            models.storage.save()
+
+        def read():
+            for obj in list(models.storage.all().values()):
+                models.storage.get(type(obj), obj.id)
+            models.storage.count(User)
+            list(models.storage.where(User, [("firstName", "==", "Betty")],
+                                      limit=5))
+        threads = [threading.Thread(target=run, args=(work,))
+                   for work in (write, write, read, read, read)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.3)
+        stop.set()
+        for thread in threads:
+            thread.join(10)
+        self.assertEqual([], errors)
+        models.storage.save()
+        count = models.storage.count(User)
+        self.assertEqual(0, models.storage.count(State))
+        models.storage.clear()
+        models.storage.reload()
+        self.assertEqual(count, models.storage.count(User))
+        self.assertEqual(0, models.storage.count(State))
+
+
+class TestFileStorage_async(unittest.TestCase):
+    """Unittests for testing the async methods of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def tearDown(self):
+        FileStorage._FileStorage__threaded = False
+        FileStorage._FileStorage__lazy = False
+        FileStorage._FileStorage__chunk = 256
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        models.storage.clear()
+
+    def test_aget(self):
+        us = User()
+        self.assertIs(us, asyncio.run(models.storage.aget(User, us.id)))
+        self.assertIs(us, asyncio.run(models.storage.aget("User", us.id)))
+        self.assertIsNone(asyncio.run(models.storage.aget(User, "1")))
+        self.assertTrue(FileStorage._FileStorage__threaded)
+
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
+    def test_aget_lazy(self):
+        FileStorage._FileStorage__lazy = True
+        models.storage.insert({"__class__": "User", "id": "1",
+                               "crea_at": "2020-01-02T03:04:05.000006",
+                               "upd_at": "2020-01-02T03:04:05.000006"})
+        us = asyncio.run(models.storage.aget(User, "1"))
+        self.assertEqual(User, type(us))
+        self.assertIs(us, models.storage.get(User, "1"))
+
+    def test_asave(self):
+        us = User()
+        asyncio.run(models.storage.asave())
+        models.storage.clear()
+        models.storage.reload()
+        self.assertIn("User." + us.id, models.storage.all())
+
+    def test_asave_coalesces(self):
+        async def save_all():
+            await asyncio.gather(*(models.storage.asave()
+                                   for i in range(10)))
+        User()
+        with patch.object(type(models.storage), "save",
+                          wraps=models.storage.save) as save:
+            asyncio.run(save_all())
+        self.assertEqual(1, save.call_count)
+
+    def test_asave_during_write(self):
+        async def save_twice():
+            first = asyncio.ensure_future(models.storage.asave())
+            await asyncio.sleep(0.05)
+            await asyncio.gather(*(models.storage.asave()
+                                   for i in range(10)))
+            await first
+        User()
+        save = models.storage.save
+
+        def slow_save():
+            time.sleep(0.1)
+            save()
+        with patch.object(type(models.storage), "save",
+                          side_effect=slow_save) as saved:
+            asyncio.run(save_twice())
+        self.assertEqual(2, saved.call_count)
+
+    def test_asave_error(self):
+        async def save_all():
+            return await asyncio.gather(
+                *(models.storage.asave() for i in range(3)),
+                return_exceptions=True)
+        with patch.object(type(models.storage), "save", side_effect=OSError):
+            errors = asyncio.run(save_all())
+        self.assertEqual([OSError] * 3, [type(e) for e in errors])
+
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
+    def test_asave_leaves_loop_free(self):
+        async def save_and_tick():
+            ticks = 0
+            saving = asyncio.ensure_future(models.storage.asave())
+            while not saving.done():
+                await asyncio.sleep(0.01)
+                ticks += 1
+            await saving
+            return ticks
+        User()
+        dump_items = json_stream.dump_items
+
+        def slow_dump(items, f, positions=None):
+            time.sleep(0.2)
+            return dump_items(items, f, positions)
+        with patch.object(json_stream, "dump_items", side_effect=slow_dump):
+            self.assertGreater(asyncio.run(save_and_tick()), 5)
+
+    def test_aiter(self):
+        FileStorage._FileStorage__chunk = 2
+        users = {User().id for i in range(5)}
+        State()
+
+        async def collect(cls):
+            return [obj async for obj in models.storage.aiter(cls)]
+        self.assertEqual(users, {us.id for us in asyncio.run(
+            collect(User))})
+        self.assertEqual(6, len(asyncio.run(collect(None))))
+        self.assertEqual([], asyncio.run(collect("Place")))
+
+    def test_awhere(self):
+        for name in ("b", "a", "c"):
+            State().name = name
+        states = asyncio.run(models.storage.awhere(
+            State, [("name", "!=", "c")], "name"))
+        self.assertEqual(["a", "b"], [st.name for st in states])
+        self.assertTrue(FileStorage._FileStorage__threaded)
+        with self.assertRaises(ValueError):
+            asyncio.run(models.storage.awhere(State, [("name", "~", "a")]))
+
+
 if __name__ == "__main__":
     unittest.main()
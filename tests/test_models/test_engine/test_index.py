@@ -0,0 +1,219 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/index.py.
+
+Unittest classes:
+    TestHashIndex
+    TestSortedIndex
+    TestGridIndex
+"""
+import time
+import unittest
+from models.engine.index import GridIndex
+from models.engine.index import HashIndex
+from models.engine.index import SortedIndex
+
+
+class TestHashIndex(unittest.TestCase):
+    """Unittests for testing the HashIndex class."""
+
+    def test_add_and_lookup(self):
+        index = HashIndex()
+        index.add("City.1", "s1")
+        index.add("City.2", "s1")
+        index.add("City.3", "s2")
+        self.assertEqual(["City.1", "City.2"], index.lookup("s1"))
+        self.assertEqual(["City.3"], index.lookup("s2"))
+        self.assertEqual([], index.lookup("s3"))
+
+    def test_add_replaces_value(self):
+        index = HashIndex()
+        index.add("City.1", "s1")
+        index.add("City.1", "s2")
+        self.assertEqual([], index.lookup("s1"))
+        self.assertEqual(["City.1"], index.lookup("s2"))
+        self.assertNotIn("s1", index.keys)
+
+    def test_discard(self):
+        index = HashIndex()
+        index.add("City.1", "s1")
+        index.discard("City.1")
+        index.discard("City.2")
+        self.assertEqual([], index.lookup("s1"))
+        self.assertEqual({}, index.values)
+
+    def test_unhashable_value(self):
+        index = HashIndex()
+        index.add("Place.1", ["a"])
+        self.assertEqual([], index.lookup(["a"]))
+        index.add("Place.1", "b")
+        self.assertEqual(["Place.1"], index.lookup("b"))
+        index.discard("Place.1")
+        index.add("Place.2", ["a"])
+        index.discard("Place.2")
+        self.assertEqual({}, index.values)
+
+
+class TestSortedIndex(unittest.TestCase):
+    """Unittests for testing the SortedIndex class."""
+
+    def setUp(self):
+        self.index = SortedIndex()
+        for key, value in (("Place.1", 50), ("Place.2", 150),
+                           ("Place.3", 80.5), ("Place.4", 80.5),
+                           ("Place.5", "n/a")):
+            self.index.add(key, value)
+
+    def test_numbers_sorted(self):
+        self.assertEqual([50, 80.5, 80.5, 150], self.index.numbers)
+        self.assertEqual(["Place.1", "Place.3", "Place.4", "Place.2"],
+                         self.index.order)
+        self.assertEqual({"Place.5": None}, self.index.others)
+
+    def test_range(self):
+        self.assertEqual(["Place.3", "Place.4", "Place.2"],
+                         list(self.index.range(80.5)))
+        self.assertEqual(["Place.2"],
+                         list(self.index.range(80.5, low_inclusive=False)))
+        self.assertEqual(["Place.1"],
+                         list(self.index.range(high=80.5,
+                                               high_inclusive=False)))
+        self.assertEqual(["Place.4", "Place.3", "Place.1"],
+                         list(self.index.range(high=100, reverse=True)))
+        self.assertEqual([], list(self.index.range(200, 100)))
+
+    def test_span(self):
+        self.assertEqual((1, 3), self.index.span(60, 100))
+        self.assertEqual((4, 4), self.index.span(200, 100))
+
+    def test_ordered(self):
+        self.assertEqual(["Place.1", "Place.3", "Place.4", "Place.2",
+                          "Place.5"], list(self.index.ordered()))
+        self.assertEqual(["Place.5", "Place.2", "Place.4", "Place.3",
+                          "Place.1"], list(self.index.ordered(True)))
+
+    def test_lookup(self):
+        self.assertEqual(["Place.3", "Place.4"], self.index.lookup(80.5))
+        self.assertEqual(["Place.5"], self.index.lookup("n/a"))
+        self.assertEqual([], self.index.lookup(81))
+
+    def test_add_replaces_value(self):
+        self.index.add("Place.3", "free")
+        self.index.add("Place.5", 10)
+        self.assertEqual([10, 50, 80.5, 150], self.index.numbers)
+        self.assertEqual(["Place.5", "Place.1", "Place.4", "Place.2"],
+                         self.index.order)
+        self.assertEqual({"Place.3": None}, self.index.others)
+
+    def test_discard(self):
+        self.index.discard("Place.3")
+        self.index.discard("Place.5")
+        self.index.discard("Place.6")
+        self.assertEqual(["Place.1", "Place.4", "Place.2"],
+                         self.index.order)
+        self.assertEqual({}, self.index.others)
+        self.assertNotIn("Place.3", self.index.values)
+
+    def test_discard_among_equal_values(self):
+        keys = ["Place.{}".format(i) for i in range(10, 20)]
+        for key in keys:
+            self.index.add(key, 80.5)
+        for key in keys[::3] + ["Place.4"]:
+            self.index.discard(key)
+        self.index.add("Place.10", 80.5)
+        self.assertEqual(["Place.3"] + [k for k in keys if k not in
+                                        keys[::3]] + ["Place.10"],
+                         self.index.lookup(80.5))
+        self.assertEqual(len(self.index.numbers), len(self.index.seqs))
+
+    def test_nan_is_not_a_number(self):
+        self.index.add("Place.6", float("nan"))
+        self.assertIn("Place.6", self.index.others)
+        self.assertEqual(4, len(self.index.numbers))
+
+    def test_build_matches_add(self):
+        pairs = [("Place.{}".format(i), v) for i, v in enumerate(
+            (3, 1.5, "n/a", 3, float("nan"), -2, 1.5, None, 3.0, 0))]
+        index = SortedIndex()
+        for key, value in pairs:
+            index.add(key, value)
+        built = SortedIndex.build(pairs)
+        for attr in ("numbers", "order", "seqs", "others", "values",
+                     "seq_of", "added"):
+            self.assertEqual(repr(getattr(index, attr)),
+                             repr(getattr(built, attr)))
+        built.discard("Place.3")
+        built.add("Place.10", 3)
+        self.assertEqual(["Place.0", "Place.8", "Place.10"],
+                         built.lookup(3))
+
+    def test_build_large_index(self):
+        pairs = [("Place.{}".format(i), (i * 7919) % 1000)
+                 for i in range(200000)]
+        start = time.perf_counter()
+        index = SortedIndex.build(pairs)
+        self.assertLess(time.perf_counter() - start, 2)
+        self.assertEqual(sorted(v for k, v in pairs), index.numbers)
+
+
+class TestGridIndex(unittest.TestCase):
+    """Unittests for testing the GridIndex class."""
+
+    def setUp(self):
+        self.index = GridIndex()
+        for key, value in (("Place.sf", (37.7749, -122.4194)),
+                           ("Place.oak", (37.8044, -122.2712)),
+                           ("Place.la", (34.0522, -118.2437)),
+                           ("Place.fiji", (-17.7134, 178.0650)),
+                           ("Place.samoa", (-13.7590, -172.1046)),
+                           ("Place.none", ("", 0.0))):
+            self.index.add(key, value)
+
+    def test_cells(self):
+        self.assertEqual({"Place.sf": None},
+                         self.index.cells[(377, -1225)])
+        self.assertNotIn("Place.none",
+                         [k for c in self.index.cells.values() for k in c])
+        self.assertEqual(("", 0.0), self.index.values["Place.none"])
+
+    def test_distance(self):
+        self.assertAlmostEqual(
+            559, GridIndex.distance(37.7749, -122.4194, 34.0522, -118.2437),
+            delta=1)
+        self.assertEqual(0, GridIndex.distance(10, 20, 10, 20))
+
+    def test_radius(self):
+        self.assertEqual(["Place.sf", "Place.oak"],
+                         self.index.radius(37.77, -122.42, 20))
+        self.assertEqual(["Place.oak", "Place.sf"],
+                         self.index.radius(37.80, -122.27, 20))
+        self.assertEqual([], self.index.radius(0, 0, 100))
+        self.assertEqual(6, len(self.index.radius(0, 0, 20040)) + 1)
+
+    def test_radius_across_antimeridian(self):
+        self.assertEqual(["Place.fiji", "Place.samoa"],
+                         self.index.radius(-17.7, 179.9, 1300))
+
+    def test_bbox(self):
+        self.assertEqual(["Place.sf", "Place.oak"],
+                         list(self.index.bbox(37, -123, 38, -122)))
+        self.assertEqual(["Place.fiji", "Place.samoa"],
+                         sorted(self.index.bbox(-20, 170, -10, -170)))
+        self.assertEqual([], list(self.index.bbox(0, -10, 10, 10)))
+
+    def test_add_replaces_value(self):
+        self.index.add("Place.la", (37.7750, -122.4195))
+        self.assertEqual(["Place.sf", "Place.la"],
+                         list(self.index.bbox(37.7, -122.5, 37.8, -122.4)))
+        self.assertNotIn((340, -1183), self.index.cells)
+
+    def test_discard(self):
+        self.index.discard("Place.sf")
+        self.index.discard("Place.none")
+        self.index.discard("Place.missing")
+        self.assertNotIn((377, -1225), self.index.cells)
+        self.assertEqual(["Place.oak"],
+                         list(self.index.bbox(37, -123, 38, -122)))
+
+
+if __name__ == "__main__":
+    unittest.main()
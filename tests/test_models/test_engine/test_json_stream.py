@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/json_stream.py.
+
+Unittest classes:
+    TestJsonStream_load_items
+    TestJsonStream_dump_items
+"""
+import json
+import unittest
+from io import StringIO
+from models.engine.json_stream import dump_items
+from models.engine.json_stream import load_items
+
+
+class TestJsonStream_load_items(unittest.TestCase):
+    """Unittests for testing load_items."""
+
+    objdict = {
+        "User.1": {"id": "1", "name": "Betty", "__class__": "User"},
+        "Place.2": {"id": "2", "maxGuest": 12345, "lati": -1.5e3,
+                    "Amenity_ids": ["a", "b"], "ok": True, "none": None},
+        "Review.3": {"text": "say \"hi\" {, }: \u00e9"}
+    }
+
+    def load(self, text, size=1 << 16):
+        return list(load_items(StringIO(text), size))
+
+    def test_load_items(self):
+        text = json.dumps(self.objdict)
+        self.assertEqual(list(self.objdict.items()), self.load(text))
+
+    def test_load_items_small_chunks(self):
+        text = json.dumps(self.objdict)
+        for size in (1, 2, 3, 7, 16):
+            self.assertEqual(list(self.objdict.items()),
+                             self.load(text, size))
+
+    def test_load_items_whitespace(self):
+        text = json.dumps(self.objdict, indent=4)
+        self.assertEqual(list(self.objdict.items()), self.load(text, 5))
+
+    def test_load_items_empty_object(self):
+        self.assertEqual([], self.load("{}"))
+        self.assertEqual([], self.load(" { \n } ", 1))
+
+    def test_load_items_is_lazy(self):
+        items = load_items(StringIO('{"a": 1, "b": '), 4)
+        self.assertEqual(("a", 1), next(items))
+        with self.assertRaises(json.JSONDecodeError):
+            next(items)
+
+    def test_load_items_truncated(self):
+        text = json.dumps(self.objdict)
+        for end in (0, 1, 10, len(text) - 1):
+            with self.assertRaises(json.JSONDecodeError):
+                self.load(text[:end], 3)
+
+    def test_load_items_not_an_object(self):
+        for text in ("[]", '{"a" 1}', '{"a": 1 "b": 2}', "{1: 2}"):
+            with self.assertRaises(json.JSONDecodeError):
+                self.load(text)
+
+
+class TestJsonStream_dump_items(unittest.TestCase):
+    """Unittests for testing dump_items."""
+
+    def test_dump_items(self):
+        objdict = {"User.1": {"id": "1"}, "Place.\"2": {"id": "2"}}
+        f = StringIO()
+        dump_items(((k, json.dumps(v)) for k, v in objdict.items()), f)
+        self.assertEqual(json.dumps(objdict), f.getvalue())
+
+    def test_dump_items_empty(self):
+        f = StringIO()
+        dump_items([], f)
+        self.assertEqual("{}", f.getvalue())
+
+    def test_dump_then_load(self):
+        objdict = {"k{}".format(i): {"n": i} for i in range(100)}
+        f = StringIO()
+        dump_items(((k, json.dumps(v)) for k, v in objdict.items()), f)
+        f.seek(0)
+        self.assertEqual(objdict, dict(load_items(f, 10)))
+
+
+if __name__ == "__main__":
+    unittest.main()
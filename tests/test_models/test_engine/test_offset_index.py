@@ -0,0 +1,141 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/offset_index.py.
+
+Unittest classes:
+    TestOffsetIndex_write
+    TestOffsetIndex_stale
+"""
+import os
+import unittest
+from models.engine import binary_stream
+from models.engine import json_stream
+from models.engine.offset_index import OffsetIndex
+
+
+class TestOffsetIndex_write(unittest.TestCase):
+    """Unittests for testing writing and reading offset indexes."""
+
+    objdict = {
+        "User.0123abcd-0000-4000-8000-00000000000a": {
+            "id": "0123abcd-0000-4000-8000-00000000000a",
+            "crea_at": "2020-01-02T03:04:05.000006",
+            "name": "Betty", "__class__": "User"},
+        "Place.2": {"id": "2", "maxGuest": 4, "Amenity_ids": ["a"],
+                    "__class__": "Place"},
+        "Place.3": {"id": "3", "name": "Loft é", "__class__": "Place"},
+        "other": {"id": "other"}
+    }
+
+    def tearDown(self):
+        for name in ("test.snap", "test.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+
+    def write(self, serializer, objdict=None):
+        if objdict is None:
+            objdict = self.objdict
+        positions = []
+        with open("test.snap", "wb" if serializer.BINARY else "w") as f:
+            serializer.dump_items(((k, serializer.encode(o))
+                                   for k, o in objdict.items()), f,
+                                  positions)
+        OffsetIndex.write("test.idx", "test.snap", positions)
+        return OffsetIndex("test.idx", "test.snap", serializer)
+
+    def test_get_json(self):
+        index = self.write(json_stream)
+        for key, o in self.objdict.items():
+            self.assertEqual(o, index.get(key))
+        index.close()
+
+    def test_get_binary(self):
+        index = self.write(binary_stream)
+        for key, o in self.objdict.items():
+            self.assertEqual(o, index.get(key))
+        index.close()
+
+    def test_missing_key(self):
+        index = self.write(json_stream)
+        self.assertIsNone(index.find("User.1"))
+        self.assertIsNone(index.get("User.1"))
+        self.assertNotIn("User.1", index)
+        self.assertIn("Place.2", index)
+        index.close()
+
+    def test_keys(self):
+        index = self.write(json_stream)
+        self.assertEqual(4, len(index))
+        self.assertEqual(list(self.objdict), list(index.keys()))
+        self.assertEqual(["Place.2", "Place.3"], list(index.keys("Place")))
+        self.assertEqual([], list(index.keys("State")))
+        index.close()
+
+    def test_empty(self):
+        index = self.write(json_stream, {})
+        self.assertEqual(0, len(index))
+        self.assertIsNone(index.get("User.1"))
+        index.close()
+
+    def test_many_keys(self):
+        objdict = {"User.{}".format(i): {"id": str(i), "__class__": "User"}
+                   for i in range(1000)}
+        index = self.write(binary_stream, objdict)
+        for key, o in objdict.items():
+            self.assertEqual(o, index.get(key))
+        self.assertEqual(1000, len(index))
+        index.close()
+
+
+class TestOffsetIndex_stale(unittest.TestCase):
+    """Unittests for testing offset indexes not matching a snapshot."""
+
+    def setUp(self):
+        positions = []
+        with open("test.snap", "w") as f:
+            json_stream.dump_items([("User.1", '{"id": "1"}')], f, positions)
+        OffsetIndex.write("test.idx", "test.snap", positions)
+
+    def tearDown(self):
+        for name in ("test.snap", "test.idx", "test.tmp"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+
+    def test_snapshot_replaced(self):
+        with open("test.tmp", "w") as f:
+            f.write('{"User.1": {"id": "2"}}')
+        os.replace("test.tmp", "test.snap")
+        with self.assertRaises(ValueError):
+            OffsetIndex("test.idx", "test.snap", json_stream)
+
+    def test_snapshot_missing(self):
+        os.remove("test.snap")
+        with self.assertRaises(FileNotFoundError):
+            OffsetIndex("test.idx", "test.snap", json_stream)
+
+    def test_index_missing(self):
+        os.remove("test.idx")
+        with self.assertRaises(FileNotFoundError):
+            OffsetIndex("test.idx", "test.snap", json_stream)
+
+    def test_index_truncated(self):
+        with open("test.idx", "rb") as f:
+            data = f.read()
+        for end in (0, 10, len(data) - 1):
+            with open("test.idx", "wb") as f:
+                f.write(data[:end])
+            with self.assertRaises(ValueError):
+                OffsetIndex("test.idx", "test.snap", json_stream)
+
+    def test_not_an_index(self):
+        with open("test.idx", "wb") as f:
+            f.write(b"{}" * 40)
+        with self.assertRaises(ValueError):
+            OffsetIndex("test.idx", "test.snap", json_stream)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/record.py.
+
+Unittest classes:
+    TestRecord
+"""
+import gc
+import json
+import tracemalloc
+import unittest
+from models.engine.record import Record
+from models.place import Place
+
+
+class TestRecord(unittest.TestCase):
+    """Unittests for testing the Record class."""
+
+    def setUp(self):
+        self.o = {"id": "5c1c2d0e-7c43-4b3a-9b5e-2c8e5f0d1a2b",
+                  "crea_at": "2017-09-28T21:05:54.119427",
+                  "upd_at": "2017-09-28T21:05:54.119572",
+                  "city_id": "0e2a4054-bf01-4fa2-bffb-590b72f4ea56",
+                  "name": "Loft", "maxGuest": 4, "lati": 37.77,
+                  "Amenity_ids": ["a", "b"], "__class__": "Place"}
+
+    def test_no_dict(self):
+        self.assertFalse(hasattr(Record(self.o), "__dict__"))
+        with self.assertRaises(AttributeError):
+            Record(self.o).color = "blue"
+
+    def test_packed(self):
+        rc = Record(self.o)
+        self.assertEqual(32, len(rc.head))
+        self.assertEqual(("city_id", "name", "maxGuest", "lati",
+                          "Amenity_ids"), rc.names)
+        self.assertEqual(bytes, type(rc.values[0]))
+
+    def test_to_dict(self):
+        self.assertEqual(self.o, Record(self.o).to_dict())
+        self.assertEqual(list(self.o), list(Record(self.o).to_dict()))
+
+    def test_getitem(self):
+        rc = Record(self.o)
+        for name, value in self.o.items():
+            self.assertEqual(value, rc[name])
+        with self.assertRaises(KeyError):
+            rc["color"]
+
+    def test_contains(self):
+        rc = Record(self.o)
+        self.assertIn("upd_at", rc)
+        self.assertIn("maxGuest", rc)
+        self.assertNotIn("color", rc)
+
+    def test_shapes_shared(self):
+        other = dict(self.o, id="0e2a4054-bf01-4fa2-bffb-590b72f4ea57")
+        self.assertIs(Record(self.o).names, Record(other).names)
+
+    def test_unpackable_values(self):
+        o = {"id": "1234", "crea_at": "2017-09-28 21:05:54.119427",
+             "upd_at": 5, "city_id": "0E2A4054-BF01-4FA2-BFFB-590B72F4EA56",
+             "__class__": "City"}
+        rc = Record(o)
+        self.assertEqual(16, len(rc.head))
+        self.assertEqual(("id", "crea_at", "upd_at", "city_id"), rc.names)
+        self.assertEqual(o, rc.to_dict())
+
+    def test_missing_values(self):
+        rc = Record({"name": "Loft", "__class__": "Place"})
+        self.assertNotIn("id", rc)
+        self.assertNotIn("crea_at", rc)
+        self.assertEqual({"name": "Loft", "__class__": "Place"},
+                         rc.to_dict())
+
+    def test_packed_data(self):
+        rc = Record(self.o)
+        self.assertEqual(("data",), Record.__slots__)
+        self.assertEqual(bytes, type(rc.data))
+        self.assertEqual(rc.head, rc.data[4:36])
+
+    def test_memory(self):
+        """A Record is at least 3x smaller than the Place built of it."""
+        lines = []
+        for i in range(2000):
+            o = {key: self.o[key] for key in
+                 ("id", "crea_at", "upd_at", "city_id", "__class__")}
+            o.update(id=o["id"][:-4] + "{:04x}".format(i),
+                     idUser=o["city_id"], name="Loft {}".format(i),
+                     descpt="A nice loft near the park", roomNumber=3,
+                     bathroomsNumber=1, maxGuest=4, priceByNight=120,
+                     lati=37.77 + i * 1e-5, long=-122.4)
+            lines.append(json.dumps(o))
+
+        def size(build):
+            gc.collect()
+            tracemalloc.start()
+            objs = [build(json.loads(line)) for line in lines]
+            used = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            return used / len(objs)
+
+        def place(o):
+            del o["__class__"]
+            return Place(**o)
+        self.assertGreaterEqual(size(place) / size(Record), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
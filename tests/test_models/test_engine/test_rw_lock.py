@@ -0,0 +1,136 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/rw_lock.py.
+
+Unittest classes:
+    TestReadWriteLock_hold
+    TestReadWriteLock_wait
+"""
+import threading
+import unittest
+from models.engine.rw_lock import ReadWriteLock
+
+
+class TestReadWriteLock_hold(unittest.TestCase):
+    """Unittests for testing holding a ReadWriteLock in one thread."""
+
+    def setUp(self):
+        self.lock = ReadWriteLock()
+
+    def test_held(self):
+        self.assertFalse(self.lock.held())
+        with self.lock.hold(False):
+            self.assertTrue(self.lock.held())
+            self.assertFalse(self.lock.held(True))
+        with self.lock.hold():
+            self.assertTrue(self.lock.held(True))
+        self.assertFalse(self.lock.held())
+
+    def test_nested(self):
+        with self.lock.hold():
+            with self.lock.hold(False):
+                self.assertTrue(self.lock.held(True))
+            with self.lock.hold():
+                self.assertTrue(self.lock.held(True))
+            self.assertTrue(self.lock.held(True))
+        self.assertFalse(self.lock.writing)
+
+    def test_upgrade(self):
+        with self.lock.hold(False):
+            with self.lock.hold():
+                self.assertTrue(self.lock.held(True))
+                self.assertEqual(0, self.lock.readers)
+            self.assertFalse(self.lock.held(True))
+            self.assertEqual(1, self.lock.readers)
+        self.assertEqual(0, self.lock.readers)
+
+    def test_released_on_error(self):
+        with self.assertRaises(ValueError):
+            with self.lock.hold():
+                raise ValueError
+        self.assertFalse(self.lock.held())
+        self.assertFalse(self.lock.writing)
+
+
+class TestReadWriteLock_wait(unittest.TestCase):
+    """Unittests for testing a ReadWriteLock held by several threads."""
+
+    def setUp(self):
+        self.lock = ReadWriteLock()
+
+    def holder(self, exclusive, held, release):
+        def run():
+            with self.lock.hold(exclusive):
+                held.set()
+                release.wait(5)
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def test_shared_together(self):
+        first, second, release = (threading.Event(), threading.Event(),
+                                  threading.Event())
+        threads = [self.holder(False, first, release),
+                   self.holder(False, second, release)]
+        self.assertTrue(first.wait(5))
+        self.assertTrue(second.wait(5))
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+    def test_exclusive_waits_for_readers(self):
+        first, second, release = (threading.Event(), threading.Event(),
+                                  threading.Event())
+        threads = [self.holder(False, first, release)]
+        self.assertTrue(first.wait(5))
+        threads.append(self.holder(True, second, release))
+        self.assertFalse(second.wait(0.2))
+        release.set()
+        self.assertTrue(second.wait(5))
+        for thread in threads:
+            thread.join(5)
+
+    def test_readers_wait_for_exclusive(self):
+        first, second, release = (threading.Event(), threading.Event(),
+                                  threading.Event())
+        threads = [self.holder(True, first, release)]
+        self.assertTrue(first.wait(5))
+        threads.append(self.holder(False, second, release))
+        self.assertFalse(second.wait(0.2))
+        release.set()
+        self.assertTrue(second.wait(5))
+        for thread in threads:
+            thread.join(5)
+
+    def test_waiting_writer_goes_first(self):
+        reading, writing, late, release = (
+            threading.Event(), threading.Event(), threading.Event(),
+            threading.Event())
+        order = []
+        threads = [self.holder(False, reading, release)]
+        self.assertTrue(reading.wait(5))
+
+        def write():
+            with self.lock.hold():
+                order.append("writer")
+                writing.set()
+
+        def read():
+            late.set()
+            with self.lock.hold(False):
+                order.append("reader")
+        threads.append(threading.Thread(target=write, daemon=True))
+        threads[-1].start()
+        while not self.lock.waiting:
+            writing.wait(0.01)
+        threads.append(threading.Thread(target=read, daemon=True))
+        threads[-1].start()
+        self.assertTrue(late.wait(5))
+        self.assertFalse(writing.wait(0.2))
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(["writer", "reader"], order)
+
+
+if __name__ == "__main__":
+    unittest.main()
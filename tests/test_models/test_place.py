@@ -5,6 +5,8 @@ Unittest classes:
     TestPlace_instantiation
     TestPlace_save
     TestPlace_to_dict
+    TestPlace_reviews
+    TestPlace_spatial
 """
 import os
 import models
@@ -12,6 +14,7 @@ import unittest
 from datetime import datetime
 from time import sleep
 from models.place import Place
+from models.review import Review
 
 
 class TestPlace_instantiation(unittest.TestCase):
@@ -155,10 +158,11 @@ class TestPlace_save(unittest.TestCase):
             pass
 
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -187,6 +191,7 @@ class TestPlace_save(unittest.TestCase):
         with self.assertRaises(TypeError):
             pl.save(None)
 
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
     def test_save_updates_file(self):
         pl = Place()
         pl.save()
@@ -245,5 +250,58 @@ class TestPlace_to_dict(unittest.TestCase):
             pl.to_dict(None)
 
 
+class TestPlace_reviews(unittest.TestCase):
+    """Unittests for testing the reviews property of the Place class."""
+
+    def setUp(self):
+        models.storage.clear()
+
+    def tearDown(self):
+        models.storage.clear()
+
+    def test_reviews(self):
+        pl = Place()
+        rv = Review()
+        rv.idPlace = pl.id
+        Review()
+        self.assertEqual([rv], pl.reviews)
+
+
+class TestPlace_spatial(unittest.TestCase):
+    """Unittests for testing spatial queries of the Place class."""
+
+    def setUp(self):
+        models.storage.clear()
+        self.sf = Place()
+        self.sf.lati = 37.7749
+        self.sf.long = -122.4194
+        self.oak = Place()
+        self.oak.lati = 37.8044
+        self.oak.long = -122.2712
+        self.la = Place()
+        self.la.lati = 34.0522
+        self.la.long = -118.2437
+
+    def tearDown(self):
+        models.storage.clear()
+
+    def test_near(self):
+        self.assertEqual([self.sf, self.oak],
+                         Place.near(37.77, -122.42, 20))
+        self.assertEqual([self.oak], Place.near(37.80, -122.27, 5))
+        self.assertEqual([self.sf], Place.near(37.77, -122.42, 20, 1))
+
+    def test_within(self):
+        self.assertEqual([self.sf, self.oak],
+                         Place.within(37, -123, 38, -122))
+        self.assertEqual([], Place.within(40, -123, 41, -122))
+
+    def test_near_follows_update(self):
+        self.la.lati = 37.78
+        self.la.long = -122.41
+        self.assertEqual([self.la, self.sf],
+                         Place.near(37.78, -122.41, 2))
+
+
 if __name__ == "__main__":
     unittest.main()
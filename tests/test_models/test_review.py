@@ -107,10 +107,11 @@ class TestReview_save(unittest.TestCase):
             pass
 
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -139,6 +140,7 @@ class TestReview_save(unittest.TestCase):
         with self.assertRaises(TypeError):
             rv.save(None)
 
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
     def test_save_updates_file(self):
         rv = Review()
         rv.save()
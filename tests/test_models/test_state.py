@@ -5,6 +5,7 @@ Unittest classes:
     TestState_instantiation
     TestState_save
     TestState_to_dict
+    TestState_cities
 """
 import os
 import models
@@ -12,6 +13,7 @@ import unittest
 from datetime import datetime
 from time import sleep
 from models.state import State
+from models.city import City
 
 
 class TestState_instantiation(unittest.TestCase):
@@ -95,10 +97,11 @@ class TestState_save(unittest.TestCase):
             pass
 
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -127,6 +130,7 @@ class TestState_save(unittest.TestCase):
         with self.assertRaises(TypeError):
             st.save(None)
 
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
     def test_save_updates_file(self):
         st = State()
         st.save()
@@ -185,5 +189,29 @@ class TestState_to_dict(unittest.TestCase):
             st.to_dict(None)
 
 
+class TestState_cities(unittest.TestCase):
+    """Unittests for testing the cities property of the State class."""
+
+    def setUp(self):
+        models.storage.clear()
+
+    def tearDown(self):
+        models.storage.clear()
+
+    def test_cities(self):
+        st = State()
+        cy = City()
+        cy.stat_id = st.id
+        City()
+        self.assertEqual([cy], st.cities)
+
+    def test_cities_follow_destroy(self):
+        st = State()
+        cy = City()
+        cy.stat_id = st.id
+        models.storage.delete(cy)
+        self.assertEqual([], st.cities)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -5,6 +5,7 @@ Unittest classes:
     TestUser_instantiation
     TestUser_save
     TestUser_to_dict
+    TestUser_relations
 """
 import os
 import models
@@ -12,6 +13,8 @@ import unittest
 from datetime import datetime
 from time import sleep
 from models.user import User
+from models.place import Place
+from models.review import Review
 
 
 class TestUser_instantiation(unittest.TestCase):
@@ -101,10 +104,11 @@ class TestUser_save(unittest.TestCase):
             pass
 
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -133,6 +137,7 @@ class TestUser_save(unittest.TestCase):
         with self.assertRaises(TypeError):
             us.save(None)
 
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
     def test_save_updates_file(self):
         us = User()
         us.save()
@@ -191,5 +196,29 @@ class TestUser_to_dict(unittest.TestCase):
             us.to_dict(None)
 
 
+class TestUser_relations(unittest.TestCase):
+    """Unittests for testing the places and reviews of the User class."""
+
+    def setUp(self):
+        models.storage.clear()
+
+    def tearDown(self):
+        models.storage.clear()
+
+    def test_places(self):
+        us = User()
+        pl = Place()
+        pl.idUser = us.id
+        Place()
+        self.assertEqual([pl], us.places)
+
+    def test_reviews(self):
+        us = User()
+        rv = Review()
+        rv.idUser = us.id
+        Review()
+        self.assertEqual([rv], us.reviews)
+
+
 if __name__ == "__main__":
     unittest.main()